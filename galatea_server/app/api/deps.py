@@ -1,4 +1,4 @@
-from app.core.container import session_manager, web_manager, unity_manager, character_registry
+from app.core.container import session_manager, web_manager, unity_manager, character_registry, tts_service, tts_replica_pool, turn_registry, history_summarizer, session_reaper, contacts_snapshot
 
 # 定义依赖获取函数
 def get_session_manager():
@@ -12,3 +12,21 @@ def get_unity_manager():
 
 def get_character_registry():
     return character_registry
+
+def get_tts_service():
+    return tts_service
+
+def get_tts_replica_pool():
+    return tts_replica_pool
+
+def get_turn_registry():
+    return turn_registry
+
+def get_history_summarizer():
+    return history_summarizer
+
+def get_session_reaper():
+    return session_reaper
+
+def get_contacts_snapshot():
+    return contacts_snapshot
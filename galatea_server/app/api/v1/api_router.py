@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import web_websocket, unity_websocket, session, unity_client, tts
+from app.api.v1.endpoints import web_websocket, unity_websocket, session, unity_client, tts, connection
 
 api_router = APIRouter()
 
@@ -12,4 +12,6 @@ api_router.include_router(unity_client.router, prefix="/unity", tags=["unity"])
 # 会话管理端点
 api_router.include_router(session.router, prefix="/session", tags=["session"])
 # TTS 模型管理端点
-api_router.include_router(tts.router, prefix="/tts", tags=["tts"])
\ No newline at end of file
+api_router.include_router(tts.router, prefix="/tts", tags=["tts"])
+# WebSocket 连接状态端点
+api_router.include_router(connection.router, prefix="/connections", tags=["connection"])
@@ -0,0 +1,34 @@
+"""WebSocket 连接状态相关的 API 端点"""
+from fastapi import APIRouter, Depends
+from app.schemas.connection import ConnectionStatsResponse, TurnStats
+from app.schemas.common import UnifiedResponse
+from app.api.deps import get_web_manager, get_unity_manager, get_turn_registry
+from app.infrastructure.managers.web_connection import WebConnectionManager
+from app.infrastructure.managers.unity_connection import UnityConnectionManager
+from app.infrastructure.managers.turn_registry import TurnRegistry
+
+router = APIRouter()
+
+
+@router.get("/stats", response_model=UnifiedResponse[ConnectionStatsResponse])
+def get_connection_stats_endpoint(
+    web_manager: WebConnectionManager = Depends(get_web_manager),
+    unity_manager: UnityConnectionManager = Depends(get_unity_manager),
+    turn_registry: TurnRegistry = Depends(get_turn_registry)
+):
+    """
+    获取各连接的发送队列指标
+    
+    返回每个 Web / Unity 连接的队列深度、排队字节数、已发送 / 丢弃 / 合并的消息数，
+    以及因跟不上（音频积压超出预算或阻塞超时）被断开的连接数；
+    另附会话轮次调度的排队 / 合并 / 拒绝计数
+    """
+    return UnifiedResponse.success(
+        data=ConnectionStatsResponse(
+            web=web_manager.send_queue_stats(),
+            unity=unity_manager.send_queue_stats(),
+            web_overflow_disconnects=web_manager.overflow_disconnects,
+            unity_overflow_disconnects=unity_manager.overflow_disconnects,
+            turns=TurnStats(**turn_registry.stats())
+        )
+    )
@@ -1,9 +1,14 @@
 from app.services.session_service import *
 from app.schemas.session import *
 from app.schemas.common import UnifiedResponse
-from fastapi import APIRouter, Depends
-from app.api.deps import get_session_manager, get_character_registry, get_unity_manager
+from typing import Optional
+from fastapi import APIRouter, Depends, Header
+from app.api.deps import get_session_manager, get_character_registry, get_unity_manager, get_session_reaper, get_contacts_snapshot, get_turn_registry, get_history_summarizer
 from app.infrastructure.managers.session_manager import SessionManager
+from app.infrastructure.managers.session_reaper import SessionReaper
+from app.infrastructure.managers.turn_registry import TurnRegistry
+from app.services.summary_service import HistorySummarizer
+from app.services.contacts_service import ContactsSnapshot
 from app.infrastructure.managers.character_registry import CharacterRegistry
 from app.infrastructure.managers.unity_connection import UnityConnectionManager
 
@@ -30,25 +35,29 @@ async def create_session_endpoint(
 
 
 @router.delete("/delete/{session_id}", response_model=UnifiedResponse)   
-def delete_session_endpoint(
+async def delete_session_endpoint(
     session_id: str,
-    session_manager: SessionManager = Depends(get_session_manager)
+    session_manager: SessionManager = Depends(get_session_manager),
+    turn_registry: TurnRegistry = Depends(get_turn_registry),
+    history_summarizer: HistorySummarizer = Depends(get_history_summarizer)
 ):
     """删除会话的端点"""
     try:
-        return delete_session_service(
+        return await delete_session_service(
             session_id=session_id,
-            session_manager=session_manager
+            session_manager=session_manager,
+            turn_registry=turn_registry,
+            history_summarizer=history_summarizer
         )
     except Exception as e:
         raise e
 
 
 @router.get("/contacts", response_model=UnifiedResponse[ContactsResponse])
-def get_contacts_endpoint(
+async def get_contacts_endpoint(
     language: str = "zh",
-    session_manager: SessionManager = Depends(get_session_manager),
-    character_registry: CharacterRegistry = Depends(get_character_registry)
+    if_none_match: Optional[str] = Header(None),
+    contacts_snapshot: ContactsSnapshot = Depends(get_contacts_snapshot)
 ):
     """
     获取通讯录
@@ -57,36 +66,80 @@ def get_contacts_endpoint(
     1. 角色按最近交互排序（最新的在前）
     2. 每个角色下的会话也按最近交互排序（最新的在前）
     
+    响应带 ETag，轮询时带上 If-None-Match，通讯录没有变化则返回 304
+    （在事件循环中执行，读取会话排序时不会与消息处理并发修改）
+    
     Args:
         language: 语言代码（zh/en），用于返回对应语言的角色名称
     """
     try:
         return get_contacts_service(
-            session_manager=session_manager,
-            character_registry=character_registry,
-            language=language
+            contacts_snapshot=contacts_snapshot,
+            language=language,
+            if_none_match=if_none_match
         )
     except Exception as e:
         raise e
 
 
 @router.get("/history/{session_id}", response_model=UnifiedResponse[GetHistoryResponse])
-def get_history_endpoint(
+async def get_history_endpoint(
     session_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     session_manager: SessionManager = Depends(get_session_manager)
 ):
     """
-    获取会话历史记录
+    获取会话历史记录（游标分页，默认返回最新的一页）
+    
+    Args:
+        cursor: 上一页返回的 nextCursor，用于获取更早的消息
+        limit: 每页消息数
     """
     try:
-        return get_history_service(
+        return await get_history_service(
             session_id=session_id,
-            session_manager=session_manager
+            session_manager=session_manager,
+            cursor=cursor,
+            limit=limit
         )
     except Exception as e:
         raise e
 
 
+@router.get("/history/{session_id}/export")
+async def export_history_endpoint(
+    session_id: str,
+    session_manager: SessionManager = Depends(get_session_manager)
+):
+    """
+    以 NDJSON 流导出会话的完整聊天记录
+    """
+    return export_history_service(session_id=session_id, session_manager=session_manager)
+
+
+@router.get("/context/{session_id}", response_model=UnifiedResponse[GetContextResponse])
+async def get_context_endpoint(
+    session_id: str,
+    session_manager: SessionManager = Depends(get_session_manager)
+):
+    """
+    获取会话的上下文窗口（消息数、估算 token 数、预算）
+    """
+    return await get_context_service(session_id=session_id, session_manager=session_manager)
+
+
+@router.get("/memory", response_model=UnifiedResponse[SessionMemoryResponse])
+async def get_memory_endpoint(
+    session_manager: SessionManager = Depends(get_session_manager),
+    session_reaper: SessionReaper = Depends(get_session_reaper)
+):
+    """
+    获取会话内存占用与休眠情况
+    """
+    return get_memory_service(session_manager=session_manager, session_reaper=session_reaper)
+
+
 @router.get("/characters", response_model=UnifiedResponse[list[CharacterInfo]])
 def get_available_characters_endpoint(
     character_registry: CharacterRegistry = Depends(get_character_registry)
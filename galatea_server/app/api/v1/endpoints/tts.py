@@ -1,10 +1,12 @@
 """TTS 模型切换相关的 API 端点"""
 from fastapi import APIRouter, Depends
-from app.schemas.tts import SwitchTTSModelRequest, SwitchTTSModelResponse
+from app.schemas.tts import SwitchTTSModelRequest, SwitchTTSModelResponse, TTSCacheStatsResponse, TTSStatusResponse, TTSLatencyResponse
 from app.schemas.common import UnifiedResponse
 from app.services.tts_model_service import switch_tts_model_service
-from app.api.deps import get_character_registry
+from app.api.deps import get_character_registry, get_tts_service, get_tts_replica_pool
 from app.infrastructure.managers.character_registry import CharacterRegistry
+from app.services.tts_service import TTSService
+from app.infrastructure.managers.tts_replica_pool import TTSReplicaPool
 
 router = APIRouter()
 
@@ -55,3 +57,53 @@ async def switch_tts_model_endpoint(
     """
     return await switch_tts_model_service(request, character_registry)
 
+
+@router.get("/cache/stats", response_model=UnifiedResponse[TTSCacheStatsResponse])
+def get_tts_cache_stats_endpoint(
+    tts_service: TTSService = Depends(get_tts_service)
+):
+    """
+    获取 TTS 音频缓存统计
+    
+    返回内存层/磁盘层的命中、未命中、淘汰次数和占用字节数，用于评估缓存容量
+    """
+    if tts_service.audio_cache is None:
+        return UnifiedResponse.success(data=TTSCacheStatsResponse(enabled=False))
+    
+    return UnifiedResponse.success(
+        data=TTSCacheStatsResponse(enabled=True, **tts_service.audio_cache.stats())
+    )
+
+
+@router.get("/status", response_model=UnifiedResponse[TTSStatusResponse])
+def get_tts_status_endpoint(
+    replica_pool: TTSReplicaPool = Depends(get_tts_replica_pool)
+):
+    """
+    获取 TTS 副本状态
+    
+    返回每个副本当前加载的 GPT/SoVITS 权重路径、进行中的请求数和健康状态，
+    以及实际切换与跳过（权重已加载）的切换次数
+    """
+    return UnifiedResponse.success(
+        data=TTSStatusResponse(
+            replicas=replica_pool.status(),
+            switch_count=replica_pool.switch_count,
+            skipped_switches=replica_pool.skipped_switches
+        )
+    )
+
+
+@router.get("/latency", response_model=UnifiedResponse[TTSLatencyResponse])
+def get_tts_latency_endpoint(
+    tts_service: TTSService = Depends(get_tts_service)
+):
+    """
+    获取首音频延迟统计
+    
+    从收到用户消息到第一段音频发出的耗时，按分段策略（sentence / adaptive）分别统计，
+    用于比较不同策略的首音频延迟
+    """
+    return UnifiedResponse.success(
+        data=TTSLatencyResponse(first_audio=tts_service.first_audio_latency_stats())
+    )
@@ -7,7 +7,6 @@ from app.schemas.unity_protocol import (
     AnimationCompletePayload, StateUpdatePayload
 )
 from app.core.logger import get_logger
-import json
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -27,8 +26,7 @@ async def unity_websocket_endpoint(
             data = await websocket.receive_text()
             
             try:
-                msg_dict = json.loads(data)
-                msg = UnityBaseMessage(**msg_dict)
+                msg = UnityBaseMessage.model_validate_json(data)
             except Exception as e:
                 logger.error(f"Invalid Unity message format: {e}")
                 continue
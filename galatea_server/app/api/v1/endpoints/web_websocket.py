@@ -1,6 +1,6 @@
 """Web 客户端专用 WebSocket 端点"""
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from app.api.deps import get_web_manager, get_session_manager
+from app.api.deps import get_web_manager, get_session_manager, get_turn_registry
 from app.schemas.web_protocol import (
     WebClientMessage, WebServerMessage, WebClientMessageType, WebServerMessageType,
     UserMessagePayload, AITextStreamPayload, AIStatusPayload,
@@ -8,10 +8,14 @@ from app.schemas.web_protocol import (
 )
 from app.infrastructure.managers.web_connection import WebConnectionManager
 from app.infrastructure.managers.session_manager import SessionManager
-from app.services.agent_service import handle_user_message
+from app.infrastructure.managers.turn_registry import TurnRegistry
+from app.services.agent_service import handle_user_message, create_status_message, create_text_stream_message
 from app.exceptions.base import GalateaException
+from app.exceptions.session import SessionBusyException
+from app.core.constants import ErrorCode
 from app.core.logger import get_logger
-import json
+from contextlib import aclosing
+import asyncio
 import time
 import uuid
 
@@ -23,9 +27,15 @@ router = APIRouter()
 async def web_websocket_endpoint(
     websocket: WebSocket,
     session_manager: SessionManager = Depends(get_session_manager),
-    web_connection_manager: WebConnectionManager  = Depends(get_web_manager)
+    web_connection_manager: WebConnectionManager  = Depends(get_web_manager),
+    turn_registry: TurnRegistry = Depends(get_turn_registry)
 ):
-    """Web 客户端 WebSocket 连接端点"""
+    """
+    Web 客户端 WebSocket 连接端点
+    
+    本协程是连接的读循环；每轮回复在独立任务中进行（见 TurnRegistry），
+    同一会话的回复串行（会话忙时按准入策略排队、合并或拒绝），不同会话的回复在同一连接上并发
+    """
     await web_connection_manager.connect(websocket)
     connection_id = uuid.uuid4()
     logger.info(f"🌐 Web 客户端已连接 ( id: {connection_id} ))")
@@ -35,28 +45,31 @@ async def web_websocket_endpoint(
             data = await websocket.receive_text()
             
             try:
-                msg_dict = json.loads(data)
-                msg = WebClientMessage(**msg_dict)
+                msg = WebClientMessage.model_validate_json(data)
             except Exception as e:
                 logger.error(f"Invalid message format: {e}")
                 await send_error_message(websocket, web_connection_manager, 101, f"消息格式非法: {str(e)}")
                 continue
             
             # 处理不同类型的消息
+            # 读循环只做分发，不等待任何回复任务：心跳、stop 和其他会话的消息随时都能处理
             if msg.type == WebClientMessageType.USER_MESSAGE:
-                try:
-                    # 使用生成器处理流式响应
-                    async for response_msg in handle_user_message(msg.session_id, session_manager, msg):
-                        await web_connection_manager.send_to_client(websocket, response_msg)
-                    logger.info(f"✅ 完成处理用户消息 (会话: {msg.session_id})")
-                except GalateaException as e:
-                    # 捕获业务异常，转换成错误消息发送给客户端
-                    logger.error(f"业务异常: {e.code} - {e.message}")
-                    await send_error_message(websocket, web_connection_manager, e.code, e.message, e.details)
-                except Exception as e:
-                    # 捕获未知异常
-                    logger.error(f"未知错误: {e}", exc_info=True)
-                    await send_error_message(websocket, web_connection_manager, 100, f"系统内部错误: {str(e)}")
+                # 发消息的连接自动订阅该会话，接收本轮的文本与音频
+                web_connection_manager.subscribe(websocket, msg.session_id)
+                await submit_user_turn(
+                    websocket, web_connection_manager, session_manager, turn_registry, msg, connection_id
+                )
+            
+            elif msg.type == WebClientMessageType.STOP:
+                # stop 同时丢弃还在排队的消息
+                if not turn_registry.interrupt(msg.session_id, reason="stop", drop_pending=True):
+                    logger.info(f"ℹ️ 会话 {msg.session_id} 没有进行中的回复，忽略 stop")
+            
+            elif msg.type == WebClientMessageType.SUBSCRIBE:
+                web_connection_manager.subscribe(websocket, msg.session_id)
+            
+            elif msg.type == WebClientMessageType.UNSUBSCRIBE:
+                web_connection_manager.unsubscribe(websocket, msg.session_id)
             
             elif msg.type == WebClientMessageType.HEARTBEAT:
                 # 回应心跳
@@ -75,6 +88,100 @@ async def web_websocket_endpoint(
     except Exception as e:
         logger.error(f"Web WebSocket error: {e}", exc_info=True)
         web_connection_manager.disconnect(websocket)
+    finally:
+        # 连接已断开，没人再听这些回复（合并后由其他连接发起的轮次不受影响）
+        await turn_registry.cancel_owned(connection_id, reason="disconnect")
+
+
+async def submit_user_turn(
+    websocket: WebSocket,
+    web_manager: WebConnectionManager,
+    session_manager: SessionManager,
+    turn_registry: TurnRegistry,
+    msg: WebClientMessage,
+    connection_id: uuid.UUID
+):
+    """
+    按准入策略提交一条用户消息，并把排队位置或拒绝原因告诉发送方
+    """
+    content = msg.data.content if isinstance(msg.data, UserMessagePayload) else ""
+    if not content.strip():
+        # 空消息不参与调度，也不打断进行中的回复
+        await send_error_message(websocket, web_manager, ErrorCode.INVALID_DATA, "消息内容不能为空")
+        return
+
+    admission = turn_registry.submit(
+        msg.session_id,
+        content,
+        lambda text: run_user_turn(websocket, web_manager, session_manager, turn_registry, msg, text),
+        owner=connection_id,
+        debounce=web_manager.debounce_ms(websocket) / 1000
+    )
+    if not admission.accepted:
+        error = SessionBusyException(details={"session_id": msg.session_id, "ahead": admission.position})
+        await send_error_message(websocket, web_manager, error.code, error.message, error.details)
+    elif admission.position > 0 or admission.merged:
+        status_text = "已并入下一轮回复" if admission.merged else f"排队中，前面还有 {admission.position} 轮"
+        await web_manager.send_to_client(
+            websocket, create_status_message("queued", status_text, queue_position=admission.position)
+        )
+
+
+async def run_user_turn(
+    websocket: WebSocket,
+    web_manager: WebConnectionManager,
+    session_manager: SessionManager,
+    turn_registry: TurnRegistry,
+    msg: WebClientMessage,
+    text: str
+):
+    """
+    执行一轮回复，把流式结果发送给订阅该会话的客户端
+    
+    text 是本轮的用户消息，排队期间合并了多条消息时与 msg 中的不同；
+    被打断时生成器随之关闭（停止 LLM 与 TTS），并告知订阅者该回复已截断
+    （还没有输出就因防抖被新一轮取代时不通知，新一轮紧接着开始）；
+    错误消息只发给发起本轮的连接
+    """
+    session_id = msg.session_id
+    message_id = None
+    if text != msg.data.content:
+        msg = msg.model_copy(update={"data": msg.data.model_copy(update={"content": text})})
+    try:
+        # 使用生成器处理流式响应
+        # 文本增量按发起本轮的连接协商的窗口合并
+        text_window = web_manager.text_flush_window(websocket)
+        async with aclosing(handle_user_message(session_id, session_manager, msg, text_window)) as responses:
+            async for response_msg in responses:
+                if response_msg.type == WebServerMessageType.AI_TEXT_STREAM and message_id is None:
+                    message_id = response_msg.data.message_id
+                    turn_registry.mark_output(session_id)
+                await web_manager.broadcast(response_msg, session_id=session_id)
+        logger.info(f"✅ 完成处理用户消息 (会话: {session_id})")
+    except asyncio.CancelledError:
+        if message_id is None and turn_registry.is_restarting(session_id):
+            raise
+        try:
+            if message_id:
+                await web_manager.broadcast(
+                    create_text_stream_message(
+                        "", is_finish=True, message_id=message_id,
+                        truncated=True, session_id=session_id
+                    ),
+                    session_id=session_id
+                )
+            await web_manager.broadcast(create_status_message("idle", "已打断"), session_id=session_id)
+        except Exception as e:
+            logger.error(f"Failed to send interruption notice: {e}")
+        raise
+    except GalateaException as e:
+        # 捕获业务异常，转换成错误消息发送给客户端
+        logger.error(f"业务异常: {e.code} - {e.message}")
+        await send_error_message(websocket, web_manager, e.code, e.message, e.details)
+    except Exception as e:
+        # 捕获未知异常
+        logger.error(f"未知错误: {e}", exc_info=True)
+        await send_error_message(websocket, web_manager, 100, f"系统内部错误: {str(e)}")
 
 
 async def send_error_message(
@@ -100,4 +207,3 @@ async def send_error_message(
         )
     except Exception as e:
         logger.error(f"Failed to send error message: {e}")
-
@@ -23,11 +23,71 @@ class Settings:
     TTS_API_HOST: str = os.getenv("TTS_API_HOST", "http://127.0.0.1")
     TTS_API_PORT: int = int(os.getenv("TTS_API_PORT", 9880))
     TTS_ROUTE: str = os.getenv("TTS_ROUTE", "../GPT-SoVITS-v2pro-20250604-nvidia50")
+    # 副本端口列表（逗号分隔），每个端口启动一个 GPT-SoVITS 实例；默认只有 TTS_API_PORT 一个
+    TTS_REPLICA_PORTS: list = [
+        int(port) for port in os.getenv("TTS_REPLICA_PORTS", str(TTS_API_PORT)).split(",") if port.strip()
+    ]
+    TTS_WARMUP_ENABLED: bool = os.getenv("TTS_WARMUP_ENABLED", "true").lower() == "true"  # 切换权重后预热
+    TTS_STALL_TIMEOUT: float = float(os.getenv("TTS_STALL_TIMEOUT", 15.0))  # 副本卡住判定时间（秒）
+    TTS_PIPELINE_DEPTH: int = int(os.getenv("TTS_PIPELINE_DEPTH", 2))  # 同时合成的句子数（1 = 逐句串行）
+    TTS_DELIVERY_MODE: str = os.getenv("TTS_DELIVERY_MODE", "complete")  # complete = 整句发送, stream = 边合成边发送 PCM 帧
+    TEXT_SEGMENTATION_POLICY: str = os.getenv("TEXT_SEGMENTATION_POLICY", "sentence")  # sentence = 逐句切分, adaptive = 首段在子句处提前切分
+    TTS_CACHE_ENABLED: bool = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+    TTS_CACHE_DIR: Path = Path(os.getenv("TTS_CACHE_DIR", BASE_DIR / "cache" / "tts"))
+    TTS_CACHE_MEMORY_BYTES: int = int(os.getenv("TTS_CACHE_MEMORY_BYTES", 64 * 1024 * 1024))
+    TTS_CACHE_DISK_BYTES: int = int(os.getenv("TTS_CACHE_DISK_BYTES", 512 * 1024 * 1024))
+
+    # WebSocket 发送队列（每个连接独立）
+    WS_SEND_QUEUE_MAX_MESSAGES: int = int(os.getenv("WS_SEND_QUEUE_MAX_MESSAGES", 256))
+    WS_SEND_QUEUE_MAX_BYTES: int = int(os.getenv("WS_SEND_QUEUE_MAX_BYTES", 16 * 1024 * 1024))  # 音频积压超出后断开连接
+    WS_SEND_BLOCK_TIMEOUT: float = float(os.getenv("WS_SEND_BLOCK_TIMEOUT", 5.0))  # 阻塞型消息等待队列空位的最长时间
+    # 文本增量合并窗口（连接可通过 ?text_flush_ms=&text_flush_chars= 覆盖；0 表示逐个发送）
+    WS_TEXT_FLUSH_MS: int = int(os.getenv("WS_TEXT_FLUSH_MS", 50))
+    WS_TEXT_FLUSH_CHARS: int = int(os.getenv("WS_TEXT_FLUSH_CHARS", 32))
+    # 同一会话已有回复时新消息的准入策略：interrupt = 打断并合并为下一轮, queue = 排队, merge = 排队并合并, reject = 拒绝
+    TURN_ADMISSION_POLICY: str = os.getenv("TURN_ADMISSION_POLICY", "interrupt")
+    TURN_MAX_PENDING: int = int(os.getenv("TURN_MAX_PENDING", 2))  # 每个会话等待中的轮次上限
+    # 连续消息防抖窗口（连接可通过 ?debounce_ms= 覆盖；0 表示不防抖）
+    # merge = 等窗口结束再开始并合并窗口内的消息, restart = 立即开始，窗口内又来消息且还没有输出时重新开始
+    TURN_DEBOUNCE_MS: int = int(os.getenv("TURN_DEBOUNCE_MS", 0))
+    TURN_DEBOUNCE_MODE: str = os.getenv("TURN_DEBOUNCE_MODE", "merge")
+
+    # 会话持久化（sqlite = SQLite WAL 文件，memory = 不持久化）
+    SESSION_STORE: str = os.getenv("SESSION_STORE", "sqlite")
+    SESSION_DB_PATH: Path = Path(os.getenv("SESSION_DB_PATH", BASE_DIR / "data" / "sessions.db"))
+    SESSION_STORE_BATCH_SIZE: int = int(os.getenv("SESSION_STORE_BATCH_SIZE", 200))  # 攒够多少条写入立即提交
+    SESSION_STORE_FLUSH_INTERVAL: float = float(os.getenv("SESSION_STORE_FLUSH_INTERVAL", 0.5))  # 写入最多延迟多久提交（秒）
+    SESSION_STORE_MAX_RETRIES: int = int(os.getenv("SESSION_STORE_MAX_RETRIES", 5))  # 同一批写入连续失败多少次后丢弃
+    SESSION_STORE_MAX_PENDING_OPS: int = int(os.getenv("SESSION_STORE_MAX_PENDING_OPS", 100000))  # 待写入操作上限
+    # 会话休眠（休眠的会话移出内存，访问时透明恢复；0 表示不启用对应条件）
+    SESSION_IDLE_TTL: float = float(os.getenv("SESSION_IDLE_TTL", 1800.0))  # 空闲多久后休眠（秒）
+    SESSION_MEMORY_BUDGET_BYTES: int = int(os.getenv("SESSION_MEMORY_BUDGET_BYTES", 256 * 1024 * 1024))  # 已加载会话的估算内存上限
+    SESSION_REAPER_INTERVAL: float = float(os.getenv("SESSION_REAPER_INTERVAL", 30.0))  # 回收检查间隔（秒）
+    # 聊天记录分页
+    HISTORY_PAGE_SIZE: int = int(os.getenv("HISTORY_PAGE_SIZE", 50))  # 默认每页消息数
+    HISTORY_PAGE_MAX: int = int(os.getenv("HISTORY_PAGE_MAX", 500))  # 每页消息数上限
 
     # LLM settings
     LLM_API_KEY: str = os.getenv("LLM_API_KEY")
     LLM_BASE_URL: str = os.getenv("LLM_BASE_URL")
     LLM_MODEL: str = os.getenv("LLM_MODEL")
+    # 上下文窗口（角色配置 context 可覆盖预算）
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", 4000))  # 历史的 token 预算（含 system prompt）
+    CONTEXT_MAX_MESSAGES: int = int(os.getenv("CONTEXT_MAX_MESSAGES", 100))
+    CONTEXT_WINDOW_MODE: str = os.getenv("CONTEXT_WINDOW_MODE", "sliding")  # sliding = 逐条移出, block = 整块移出（前缀缓存友好）
+    CONTEXT_BLOCK_RETAIN: float = float(os.getenv("CONTEXT_BLOCK_RETAIN", 0.5))  # block 模式移出后保留的预算比例
+    LLM_STREAM_USAGE: bool = os.getenv("LLM_STREAM_USAGE", "true").lower() == "true"  # 流式请求附带 usage（用于统计缓存命中）
+    # 移出窗口的历史由后台合并进滚动摘要（会额外调用 LLM，默认关闭）
+    SUMMARY_ENABLED: bool = os.getenv("SUMMARY_ENABLED", "false").lower() == "true"
+    SUMMARY_IDLE_DELAY: float = float(os.getenv("SUMMARY_IDLE_DELAY", 10.0))  # 会话空闲多久后开始摘要（秒）
+    SUMMARY_MIN_INTERVAL: float = float(os.getenv("SUMMARY_MIN_INTERVAL", 60.0))  # 同一会话两次摘要的最小间隔（秒）
+    SUMMARY_MIN_TOKENS: int = int(os.getenv("SUMMARY_MIN_TOKENS", 200))  # 待摘要内容达到该 token 数才摘要
+    SUMMARY_MAX_TOKENS: int = int(os.getenv("SUMMARY_MAX_TOKENS", 300))  # 摘要长度上限
+    # 按当前消息从已移出窗口的对话中召回相关内容（会话内 BM25 索引，默认关闭）
+    RECALL_ENABLED: bool = os.getenv("RECALL_ENABLED", "false").lower() == "true"
+    RECALL_TOP_K: int = int(os.getenv("RECALL_TOP_K", 3))
+    RECALL_MAX_TOKENS: int = int(os.getenv("RECALL_MAX_TOKENS", 600))  # 召回内容的 token 上限
+    TOKEN_ESTIMATOR: str = os.getenv("TOKEN_ESTIMATOR", "heuristic")  # heuristic / chars / tiktoken
 
     # Unity settings
     UNITY_EXE_PATH: str = os.getenv("UNITY_EXE_PATH", "../galatea_unity/Build/galatea.exe")
@@ -19,6 +19,7 @@ class ErrorCode(IntEnum):
     SESSION_ERROR = 200
     SESSION_NOT_FOUND = 201
     SESSION_EXPIRED = 202
+    SESSION_BUSY = 203
     
     # --- LLM 错误 (300-399) ---
     LLM_ERROR = 300
@@ -40,6 +41,7 @@ ERROR_MESSAGES = {
     ErrorCode.SESSION_ERROR: "会话异常",
     ErrorCode.SESSION_NOT_FOUND: "会话不存在",
     ErrorCode.SESSION_EXPIRED: "会话已过期",
+    ErrorCode.SESSION_BUSY: "会话正忙，请稍后再发",
     
     ErrorCode.LLM_ERROR: "大模型服务异常",
     ErrorCode.LLM_PROVIDER_ERROR: "大模型供应商接口错误",
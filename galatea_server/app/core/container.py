@@ -1,21 +1,76 @@
 from app.infrastructure.managers.web_connection import WebConnectionManager
 from app.infrastructure.managers.unity_connection import UnityConnectionManager
 from app.infrastructure.managers.session_manager import SessionManager
+from app.infrastructure.managers.session_reaper import SessionReaper
 from app.infrastructure.processes.tts_server import TTSServer
 from app.infrastructure.processes.unity_process import UnityProcess
 from app.infrastructure.managers.character_registry import CharacterRegistry
+from app.infrastructure.managers.tts_replica_pool import TTSReplicaPool
+from app.infrastructure.managers.turn_registry import TurnRegistry
+from app.infrastructure.cache.tts_audio_cache import TTSAudioCache
+from app.infrastructure.persistence.session_store import create_session_store
 from app.services.tts_service import TTSService
+from app.services.summary_service import HistorySummarizer
+from app.services.contacts_service import ContactsSnapshot
+from app.services.llm_service import llm_service
+from app.core.config import settings
 
 
 # 创建底层的 Infrastructure (无依赖)
 web_manager = WebConnectionManager()
 unity_manager = UnityConnectionManager()
 character_registry = CharacterRegistry()
+turn_registry = TurnRegistry(
+    policy=settings.TURN_ADMISSION_POLICY,
+    max_pending=settings.TURN_MAX_PENDING,
+    debounce=settings.TURN_DEBOUNCE_MS / 1000,
+    debounce_mode=settings.TURN_DEBOUNCE_MODE
+)
+session_store = create_session_store(
+    settings.SESSION_STORE,
+    path=settings.SESSION_DB_PATH,
+    batch_size=settings.SESSION_STORE_BATCH_SIZE,
+    flush_interval=settings.SESSION_STORE_FLUSH_INTERVAL,
+    max_retries=settings.SESSION_STORE_MAX_RETRIES,
+    max_pending_ops=settings.SESSION_STORE_MAX_PENDING_OPS
+)
+tts_audio_cache = TTSAudioCache(
+    cache_dir=settings.TTS_CACHE_DIR,
+    memory_budget=settings.TTS_CACHE_MEMORY_BYTES,
+    disk_budget=settings.TTS_CACHE_DISK_BYTES
+) if settings.TTS_CACHE_ENABLED else None
 
 # 创建外部 Process (无依赖)
-tts_server = TTSServer()
+tts_server = TTSServer(ports=settings.TTS_REPLICA_PORTS)
 unity_process = UnityProcess()
 
+# 创建 TTS 副本池 (依赖 tts_server 的副本地址)
+tts_replica_pool = TTSReplicaPool(
+    base_urls=tts_server.base_urls,
+    warmup_enabled=settings.TTS_WARMUP_ENABLED
+)
+
 # 创建 Service (依赖 character_registry 等)
-session_manager = SessionManager(character_registry=character_registry)
-tts_service = TTSService(character_registry=character_registry, unity_manager=unity_manager, web_manager=web_manager)
+session_manager = SessionManager(character_registry=character_registry, store=session_store)
+tts_service = TTSService(
+    character_registry=character_registry,
+    unity_manager=unity_manager,
+    web_manager=web_manager,
+    audio_cache=tts_audio_cache,
+    replica_pool=tts_replica_pool
+)
+history_summarizer = HistorySummarizer(
+    llm=llm_service,
+    idle_delay=settings.SUMMARY_IDLE_DELAY,
+    min_interval=settings.SUMMARY_MIN_INTERVAL,
+    min_tokens=settings.SUMMARY_MIN_TOKENS,
+    max_tokens=settings.SUMMARY_MAX_TOKENS
+)
+contacts_snapshot = ContactsSnapshot(session_manager=session_manager, character_registry=character_registry)
+session_reaper = SessionReaper(
+    session_manager=session_manager,
+    idle_ttl=settings.SESSION_IDLE_TTL,
+    memory_budget=settings.SESSION_MEMORY_BUDGET_BYTES,
+    interval=settings.SESSION_REAPER_INTERVAL,
+    is_busy=lambda session_id: turn_registry.is_active(session_id) or history_summarizer.is_pending(session_id)
+)
@@ -1,6 +1,6 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.core.container import tts_server
+from app.core.container import tts_server, session_manager, session_store, session_reaper
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -9,8 +9,13 @@ logger = get_logger(__name__)
 async def lifespan(app: FastAPI):
     # --- Startup ---
     tts_server.start()
+    session_manager.rehydrate()
+    await session_store.start()
+    await session_reaper.start()
     
     yield
     
     # --- Shutdown ---
+    await session_reaper.stop()
+    await session_store.close()
     tts_server.stop()
@@ -15,3 +15,8 @@ class SessionExpiredException(SessionException):
     """会话已过期"""
     status_code = 401
     default_code = ErrorCode.SESSION_EXPIRED
+
+class SessionBusyException(SessionException):
+    """会话已有进行中的回复，新消息未被接受"""
+    status_code = 429
+    default_code = ErrorCode.SESSION_BUSY
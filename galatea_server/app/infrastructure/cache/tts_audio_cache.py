@@ -0,0 +1,238 @@
+"""TTS 音频缓存
+
+内容寻址的两级缓存：
+- 内存层：按字节预算淘汰的 LRU
+- 磁盘层：每条音频一个文件，重启后仍然有效
+"""
+import asyncio
+import hashlib
+import os
+import struct
+import tempfile
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from app.core.logger import get_logger
+from app.schemas.character import VoiceConfig
+
+logger = get_logger(__name__)
+
+# 磁盘文件格式：4 字节小端采样率 + 音频数据
+_HEADER = struct.Struct("<I")
+_SUFFIX = ".tts"
+
+
+def normalize_text(text: str) -> str:
+    """归一化待合成文本（全半角统一、合并空白）"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def make_cache_key(character_id: str, voice_config: VoiceConfig, text: str) -> str:
+    """
+    计算缓存键
+
+    Args:
+        character_id: 角色ID
+        voice_config: 完整的声音配置（参考音频、prompt_text、语速、语言等）
+        text: 待合成文本
+
+    Returns:
+        str: sha256 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    digest.update(character_id.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(voice_config.model_dump_json().encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TTSAudioCache:
+    """TTS 音频两级缓存（内存 LRU + 磁盘）"""
+
+    def __init__(self, cache_dir: Path, memory_budget: int, disk_budget: int):
+        self.cache_dir = Path(cache_dir)
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+
+        # 内存层：key -> (audio, sample_rate)，按访问顺序排列（最近的在末尾）
+        self._memory: OrderedDict[str, Tuple[bytes, int]] = OrderedDict()
+        self._memory_bytes = 0
+
+        # 磁盘层索引：key -> 文件大小，按访问顺序排列
+        self._disk: OrderedDict[str, int] = OrderedDict()
+        self._disk_bytes = 0
+        # 正在写入磁盘的 key（同一句话的并发写入只写一次）
+        self._writing: Set[str] = set()
+
+        # 统计计数
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+        if self.disk_budget > 0:
+            self._load_disk_index()
+
+        logger.info(
+            f"🗄️ TTS 音频缓存初始化: 内存 {memory_budget // 1024 // 1024}MB, "
+            f"磁盘 {disk_budget // 1024 // 1024}MB, 已有 {len(self._disk)} 条"
+        )
+
+    def _load_disk_index(self):
+        """启动时扫描缓存目录，按修改时间恢复 LRU 顺序"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in self.cache_dir.glob(f"*{_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{_SUFFIX}"
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, int]]:
+        """
+        查询缓存
+
+        Returns:
+            Optional[Tuple[audio, sample_rate]]: 未命中返回 None
+        """
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return entry
+
+        if key in self._disk:
+            try:
+                entry = await asyncio.to_thread(self._read_file, self._path(key))
+            except OSError as e:
+                logger.warning(f"⚠️ 读取磁盘缓存失败 {key[:12]}: {e}")
+                self._drop_disk_entry(key)
+            else:
+                self._disk.move_to_end(key)
+                self.disk_hits += 1
+                # 提升到内存层
+                self._put_memory(key, entry[0], entry[1])
+                return entry
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, audio: bytes, sample_rate: int):
+        """写入缓存（内存层立即写入，磁盘层在线程中写入）"""
+        self._put_memory(key, audio, sample_rate)
+
+        if self.disk_budget <= 0 or key in self._disk or key in self._writing:
+            return
+
+        size = _HEADER.size + len(audio)
+        if size > self.disk_budget:
+            return
+
+        self._writing.add(key)
+        try:
+            await asyncio.to_thread(self._write_file, self._path(key), audio, sample_rate)
+        except OSError as e:
+            logger.warning(f"⚠️ 写入磁盘缓存失败 {key[:12]}: {e}")
+            return
+        finally:
+            self._writing.discard(key)
+
+        if key in self._disk:
+            return
+        self._disk[key] = size
+        self._disk_bytes += size
+
+        evicted = []
+        while self._disk_bytes > self.disk_budget and self._disk:
+            old_key, _ = next(iter(self._disk.items()))
+            self._drop_disk_entry(old_key)
+            evicted.append(self._path(old_key))
+            self.disk_evictions += 1
+
+        if evicted:
+            await asyncio.to_thread(self._remove_files, evicted)
+
+    def _put_memory(self, key: str, audio: bytes, sample_rate: int):
+        """写入内存层并按字节预算淘汰"""
+        size = len(audio)
+        if size > self.memory_budget:
+            return
+
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old[0])
+
+        self._memory[key] = (audio, sample_rate)
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.memory_budget:
+            _, (old_audio, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old_audio)
+            self.memory_evictions += 1
+
+    def _drop_disk_entry(self, key: str):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    @staticmethod
+    def _read_file(path: Path) -> Tuple[bytes, int]:
+        """读取缓存文件（命中后整条提升到内存层），并刷新修改时间以保持 LRU 顺序"""
+        with open(path, "rb") as f:
+            (sample_rate,) = _HEADER.unpack(f.read(_HEADER.size))
+            audio = f.read()
+        os.utime(path)
+        return audio, sample_rate
+
+    @staticmethod
+    def _write_file(path: Path, audio: bytes, sample_rate: int):
+        """先写临时文件再原子替换，避免进程中断留下半截文件"""
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(sample_rate))
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _remove_files(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计（用于容量评估）"""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_evictions": self.memory_evictions,
+            "disk_evictions": self.disk_evictions,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_budget": self.memory_budget,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+            "disk_budget": self.disk_budget,
+        }
@@ -0,0 +1,222 @@
+"""
+WebSocket 连接写队列
+每个连接一个写任务和一个有界队列，慢客户端只会拖慢自己，不会阻塞其他连接和 TTS 流水线
+"""
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Union
+from fastapi import WebSocket
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SendPolicy(str, Enum):
+    """队列满（或超出预算）时的处理策略"""
+    BLOCK = "block"              # 等待队列有空位（超时则断开连接）
+    DROP_OLDEST = "drop_oldest"  # 丢弃队列中最早的一条可丢弃消息
+    COALESCE = "coalesce"        # 与队尾同 key 的消息合并（文本增量），无法合并时按 BLOCK 处理
+    NEVER_DROP = "never_drop"    # 从不丢弃（音频）；超出预算时断开连接
+
+
+@dataclass
+class OutgoingMessage:
+    """
+    待发送的消息
+
+    - data: 已序列化的内容（str 走 send_text，bytes 走 send_bytes）
+    - message: 尚未序列化的消息对象（合并后的文本增量），发送前再序列化
+    - coalesce_key: 相同 key 的相邻消息可以合并（如同一 message_id 的文本增量）
+    - merged_size: 合并后（data 为空）按被合并各条消息的序列化大小之和估算的字节数
+    """
+    policy: SendPolicy
+    data: Optional[Union[str, bytes]] = None
+    message: Any = None
+    coalesce_key: Optional[str] = None
+    merged_size: int = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.data) if self.data is not None else self.merged_size
+
+
+class ConnectionWriter:
+    """
+    单个连接的写任务
+
+    所有发往该连接的消息都经过同一个队列，保证顺序；
+    队列深度、丢弃与合并次数见 stats()
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_overflow: Callable[[WebSocket, str], Awaitable[None]],
+        coalesce: Optional[Callable[[Any, Any], Any]] = None,
+        encode: Callable[[Any], str] = lambda message: message.model_dump_json(),
+        max_messages: int = 256,
+        max_bytes: int = 16 * 1024 * 1024,
+        block_timeout: float = 5.0
+    ):
+        """
+        Args:
+            websocket: 连接
+            on_overflow: 连接跟不上（超出预算或阻塞超时）时的回调，负责断开连接
+            coalesce: 合并两条消息对象的函数 (older, newer) -> merged
+            encode: 序列化消息对象（合并后的消息）的函数
+            max_messages: 队列最多容纳的消息数（NEVER_DROP 消息不受此限制）
+            max_bytes: 队列中已序列化数据的字节预算（超出时 NEVER_DROP 消息触发断开）
+            block_timeout: BLOCK 策略最长等待时间（秒）
+        """
+        self.websocket = websocket
+        self.on_overflow = on_overflow
+        self.coalesce = coalesce
+        self.encode = encode
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.block_timeout = block_timeout
+
+        self.queue: Deque[OutgoingMessage] = deque()
+        self.queued_bytes = 0
+        self._has_items = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self._has_space.set()
+        self.closed = False
+
+        # 指标
+        self.sent_count = 0
+        self.dropped_count = 0
+        self.coalesced_count = 0
+        self.max_depth = 0
+
+        self.task = asyncio.create_task(self._run())
+
+    async def put(self, item: OutgoingMessage):
+        """
+        按消息策略入队
+
+        连接已关闭时直接丢弃；连接跟不上时触发 on_overflow
+        """
+        if self.closed:
+            return
+
+        # 文本增量：与队尾尚未发出的同一回复的增量合并
+        if (
+            item.policy == SendPolicy.COALESCE
+            and self.coalesce is not None
+            and item.coalesce_key is not None
+            and self.queue
+            and self.queue[-1].coalesce_key == item.coalesce_key
+        ):
+            tail = self.queue[-1]
+            # 合并后的内容在发送时才重新序列化，字节预算按两条消息的大小之和计入（略大于实际值）
+            tail.merged_size = tail.size + item.size
+            tail.message = self.coalesce(tail.message, item.message)
+            tail.data = None
+            self.queued_bytes += item.size
+            self.coalesced_count += 1
+            return
+
+        if item.policy == SendPolicy.NEVER_DROP:
+            # 音频只受字节预算约束，不受消息数上限约束
+            if self.queued_bytes + item.size > self.max_bytes:
+                await self._overflow("音频积压超出预算")
+                return
+
+        elif len(self.queue) >= self.max_messages:
+            if item.policy == SendPolicy.DROP_OLDEST and self._drop_oldest():
+                pass
+            elif not await self._wait_for_space():
+                await self._overflow(f"发送队列阻塞超过 {self.block_timeout}s")
+                return
+
+        self.queue.append(item)
+        self.queued_bytes += item.size
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self._has_items.set()
+        if len(self.queue) >= self.max_messages:
+            self._has_space.clear()
+
+    def _drop_oldest(self) -> bool:
+        """丢弃最早的一条 DROP_OLDEST 消息，没有可丢弃的消息时返回 False"""
+        for queued in self.queue:
+            if queued.policy == SendPolicy.DROP_OLDEST:
+                self.queue.remove(queued)
+                self.queued_bytes -= queued.size
+                self.dropped_count += 1
+                return True
+        return False
+
+    async def _wait_for_space(self) -> bool:
+        """等待队列出现空位，超时返回 False"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.block_timeout
+        while len(self.queue) >= self.max_messages:
+            remaining = deadline - loop.time()
+            if remaining <= 0 or self.closed:
+                return False
+            self._has_space.clear()
+            try:
+                await asyncio.wait_for(self._has_space.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False
+        return not self.closed
+
+    async def _overflow(self, reason: str):
+        if self.closed:
+            return
+        self.dropped_count += len(self.queue)
+        logger.warning(f"⚠️ 客户端跟不上 ({reason})，队列 {len(self.queue)} 条 / {self.queued_bytes} bytes，断开连接")
+        await self.on_overflow(self.websocket, reason)
+
+    async def _run(self):
+        """写任务：按顺序发送队列中的消息"""
+        while True:
+            if not self.queue:
+                self._has_items.clear()
+                await self._has_items.wait()
+                continue
+
+            item = self.queue.popleft()
+            self.queued_bytes -= item.size
+            if len(self.queue) < self.max_messages:
+                self._has_space.set()
+
+            data = item.data
+            if data is None:
+                data = self.encode(item.message)
+
+            try:
+                if isinstance(data, bytes):
+                    await self.websocket.send_bytes(data)
+                else:
+                    await self.websocket.send_text(data)
+                self.sent_count += 1
+            except Exception as e:
+                logger.error(f"Failed to send to client: {e}")
+                await self.on_overflow(self.websocket, "发送失败")
+                return
+
+    def close(self):
+        """停止写任务并丢弃未发送的消息"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.clear()
+        self.queued_bytes = 0
+        self._has_space.set()  # 唤醒阻塞中的发送方
+        if self.task is not asyncio.current_task():
+            self.task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        """队列指标"""
+        return {
+            "depth": len(self.queue),
+            "queued_bytes": self.queued_bytes,
+            "max_depth": self.max_depth,
+            "sent": self.sent_count,
+            "dropped": self.dropped_count,
+            "coalesced": self.coalesced_count,
+        }
@@ -2,70 +2,482 @@
 会话管理服务
 管理每个用户的对话历史和角色状态
 """
-from typing import Dict, List, Optional
-from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import json
+import sys
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from collections import deque
+from collections import OrderedDict
 import asyncio
 from app.utils.prompts import load_persona
 from app.core.config import settings
 from app.core.logger import get_logger
 from app.infrastructure.managers.character_registry import CharacterRegistry
+from app.infrastructure.persistence.session_store import SessionRecord, SessionStore, StoredMessage, make_preview
+from app.utils.bm25_index import BM25Index
+from app.utils.message_log import MessageLog
+from app.utils.token_estimator import (
+    MESSAGE_OVERHEAD_TOKENS, TokenEstimator, estimate_tokens_heuristic, get_token_estimator
+)
 
 logger = get_logger(__name__)
 
+# 滚动摘要插入 system prompt 之后时的前缀
+SUMMARY_MESSAGE_PREFIX = "【之前的对话摘要】\n"
+# 召回的早期对话插入当前用户消息之前时的前缀
+RECALL_MESSAGE_PREFIX = "【与当前话题相关的早期对话】\n"
+_RECALL_ROLE_NAMES = {"user": "用户", "assistant": "你"}
+# 估算内存时窗口内 / 待摘要消息（dict）的固定开销，字节
+PENDING_MESSAGE_OVERHEAD_BYTES = 300
+
+
+@dataclass
+class ContextWindowReport:
+    """一次 LLM 请求的上下文窗口情况"""
+    messages: int          # 窗口内消息数（含 system prompt）
+    tokens: int            # 窗口内估算 token 数
+    token_budget: int      # token 预算
+    evicted_messages: int  # 会话累计移出窗口的消息数
+    # 以下由 LLM 返回的 usage 填写（服务端未返回时为 None）
+    prompt_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None  # 命中服务端前缀缓存的 prompt token 数
+    # 早期对话召回（未开启时为 None）
+    recalled_messages: Optional[int] = None
+    recalled_tokens: Optional[int] = None
+    recall_ms: Optional[float] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
 
 @dataclass
 class ChatSession:
-    """聊天会话"""
+    """
+    聊天会话
+    
+    历史按 token 预算滑动：System + 最近的消息，总估算 token 不超过 token_budget，
+    消息数不超过 max_messages。每条消息的 token 数在加入时估算一次，
+    窗口总数随加入 / 移出增量维护，不会每轮重新统计整段历史
+    
+    消息保存在紧凑的 MessageLog（并行数组）中，窗口是其中 [window_start, message_count) 的区间；
+    移出窗口只移动 window_start。窗口内的消息另有一份 dict 列表（window_messages，与记录共享文本），
+    get_messages() 只做一次浅复制，每轮请求不再逐条生成 dict
+    
+    window_mode:
+    - sliding: 超出时只移出刚好够的旧消息，每轮的 prompt 前缀都会变化
+    - block: 超出时一次移出一大块，窗口缩到预算的 block_retain 比例；
+      两次移出之间只在末尾追加消息，prompt 前缀逐字节不变，可以命中服务端的前缀缓存
+    
+    summarize_evicted 开启时，移出窗口的消息暂存在 evicted_pending，
+    由后台摘要任务（HistorySummarizer）合并进 summary；summary 作为一条 system 消息
+    放在 system prompt 之后，计入 token 预算
+    
+    窗口只是发给 LLM 的上下文；完整记录只追加不删除，在存储不持久化（keep_transcript）
+    或开启召回时整段保留在 MessageLog 中，否则移出窗口的消息从内存丢弃，从存储分页读取
+    
+    recall_index 存在时，每条消息加入时以序号为文档编号写入 BM25 索引，
+    build_request() 为当前用户消息召回已移出窗口的相关对话，插在该消息之前
+    
+    store 存在时，消息、窗口起点与摘要的变化会写入会话存储（write-behind，不阻塞）；
+    on_change 存在时，消息数或预览变化后以 session_id 调用（通讯录快照据此增量更新）
+    """
     session_id: str
     character: str
-    history: List[Dict[str, str]] = field(default_factory=list)
+    language: str = "zh"
+    segmentation_policy: str = "sentence"  # TTS 分段策略，见 app/utils/text_buffer.py
+    system_prompt: str = ""
     created_at: datetime = field(default_factory=datetime.now)
     last_active: datetime = field(default_factory=datetime.now)
+    token_budget: int = 4000   # 上下文 token 预算（含 system prompt）
+    max_messages: int = 100    # 窗口内最多保留的消息数（不含 system prompt）
+    window_mode: str = "sliding"  # sliding / block
+    block_retain: float = 0.5      # block 模式下移出后保留的预算比例
+    estimate_tokens: TokenEstimator = field(default=estimate_tokens_heuristic, repr=False)
+    # 消息记录，窗口起点（序号）与窗口总 token 数（含 system prompt 与摘要）
+    log: MessageLog = field(default_factory=MessageLog, repr=False)
+    window_messages: List[Dict[str, str]] = field(default_factory=list, repr=False)
+    window_start: int = 0
+    window_tokens: int = 0
+    system_tokens: int = 0
+    evicted_messages: int = 0
+    last_request_context: Optional[ContextWindowReport] = None  # 最近一次 LLM 请求的窗口情况
+    prompt_tokens_total: int = 0
+    cached_tokens_total: int = 0
+    # 滚动摘要
+    summarize_evicted: bool = False
+    summary: str = ""
+    summary_tokens: int = 0
+    evicted_pending: List[Dict[str, str]] = field(default_factory=list, repr=False)
+    # 早期对话召回
+    recall_index: Optional[BM25Index] = field(default=None, repr=False)
+    recall_top_k: int = 3
+    recall_max_tokens: int = 600
+    # 完整记录（只追加）
+    keep_transcript: bool = False
+    # 持久化
+    store: Optional[SessionStore] = field(default=None, repr=False)
+    preview: str = ""  # 最后一条消息的预览（通讯录显示）
+    on_change: Optional[Callable[[str], None]] = field(default=None, repr=False)
+    
+    def __post_init__(self):
+        self.system_tokens = self._count_text(self.system_prompt) if self.system_prompt else 0
+        self.window_tokens = self.system_tokens + sum(
+            self.log.tokens(seq) for seq in range(self.window_start, self.log.end_seq)
+        )
+        self.window_messages = self.log.messages(self.window_start, self.log.end_seq)
+    
+    def _count_text(self, content: str) -> int:
+        return self.estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+    
+    def _count(self, message: Dict[str, str]) -> int:
+        return self._count_text(message["content"])
+    
+    @property
+    def message_count(self) -> int:
+        """累计消息数（不含 system prompt），也是下一条消息的序号"""
+        return self.log.end_seq
     
     def add_message(self, role: str, content: str):
         """添加消息到历史"""
-        self.history.append({"role": role, "content": content})
+        tokens = self._count_text(content)
+        seq = self.log.append(role, content, tokens)
+        self.window_messages.append({"role": role, "content": content})
+        self.window_tokens += tokens
         self.last_active = datetime.now()
+        if self.recall_index is not None:
+            self.recall_index.add(seq, content)
+        if self.store is not None:
+            self.store.append_message(self.session_id, seq, role, content, self.last_active.timestamp())
+        self.preview = make_preview(content)
+        self._trim()
+        if self.on_change is not None:
+            self.on_change(self.session_id)
+    
+    def restore(self, messages: List[StoredMessage], window_start: int, message_count: int):
+        """
+        恢复从存储或快照读取的消息（在设置 store 之前调用，恢复过程不回写）
         
-        # 滑动窗口：保持 System + 最近 20 条消息
-        if len(self.history) > 21:
-            self.history = [self.history[0]] + self.history[-20:]
+        Args:
+            messages: 按序号排列的消息（至少包含窗口内的消息）
+            window_start: 窗口起点序号
+            message_count: 累计消息数（没有消息时作为起始序号）
+        """
+        if not self.keeps_transcript:
+            messages = [message for message in messages if message.seq >= window_start]
+        # 序号必须与存储一致（历史游标与 window_start 都按序号定位）。写入失败被丢弃的批次会在
+        # 存储中留下空缺，MessageLog 只能保存连续的序号，因此只恢复最后一段连续的消息
+        for i in range(len(messages) - 1, 0, -1):
+            if messages[i].seq != messages[i - 1].seq + 1:
+                logger.error(
+                    f"❌ 会话 {self.session_id} 的消息序号不连续 ({messages[i - 1].seq} → {messages[i].seq})，"
+                    f"丢弃序号 {messages[i].seq} 之前的 {i} 条消息"
+                )
+                messages = messages[i:]
+                break
+        self.log = MessageLog(first_seq=messages[0].seq if messages else message_count)
+        self.window_start = max(window_start, self.log.first_seq)
+        self.window_tokens = self.system_tokens + self.summary_tokens
+        for message in messages:
+            tokens = self._count_text(message.content)
+            self.log.append(message.role, message.content, tokens)
+            if self.recall_index is not None:
+                self.recall_index.add(message.seq, message.content)
+            if message.seq >= self.window_start:
+                self.window_tokens += tokens
+        self.window_messages = self.log.messages(self.window_start, self.log.end_seq)
+    
+    def _trim(self):
+        """
+        从最早的消息开始移出窗口，直到满足 token 预算与消息数上限
+        （block 模式下直到缩到预算的 block_retain 比例）
+        
+        总是保留 system prompt 和最新一条消息；移出后窗口不以 assistant 消息开头
+        """
+        end = self.log.end_seq
+        if self.window_tokens <= self.token_budget and end - self.window_start <= self.max_messages:
+            return
+        
+        token_target, message_target = self.token_budget, self.max_messages
+        if self.window_mode == "block":
+            token_target = int(self.token_budget * self.block_retain)
+            message_target = max(1, int(self.max_messages * self.block_retain))
+        
+        last = end - 1  # 最新一条消息始终保留
+        evict_end = self.window_start
+        tokens = self.window_tokens
+        while evict_end < last and (tokens > token_target or end - evict_end > message_target):
+            tokens -= self.log.tokens(evict_end)
+            evict_end += 1
+        if evict_end == self.window_start:
+            return
+        
+        # 不让窗口以孤立的 assistant 回复开头
+        while evict_end < last and self.log.role(evict_end) == "assistant":
+            tokens -= self.log.tokens(evict_end)
+            evict_end += 1
+        
+        evicted = evict_end - self.window_start
+        if self.summarize_evicted:
+            self.evicted_pending.extend(self.window_messages[:evicted])
+        del self.window_messages[:evicted]
+        self.evicted_messages += evicted
+        self.window_start = evict_end
+        self.window_tokens = tokens
+        if not self.keeps_transcript:
+            self.log.drop_before(evict_end)
+        if self.store is not None:
+            self.store.update_session(self.session_id, window_start=self.window_start)
+    
+    @property
+    def keeps_transcript(self) -> bool:
+        """完整记录是否保留在内存中"""
+        return self.keep_transcript or self.recall_index is not None
+    
+    @property
+    def transcript_start(self) -> int:
+        """内存中完整记录第一条消息的序号"""
+        return self.log.first_seq
+    
+    def transcript_slice(self, start_seq: int, end_seq: int) -> List[StoredMessage]:
+        """
+        内存中完整记录里序号在 [start_seq, end_seq) 内的消息
+        
+        Args:
+            start_seq: 起始序号（含）
+            end_seq: 结束序号（不含）
+        """
+        lo = max(start_seq, self.log.first_seq)
+        hi = min(end_seq, self.log.end_seq)
+        return [StoredMessage(*item) for item in self.log.items(lo, hi)] if lo < hi else []
+    
+    @property
+    def history(self) -> List[Dict[str, str]]:
+        """窗口内的消息（含 system prompt，不含摘要；每次新建列表，只用于查看）"""
+        head = [{"role": "system", "content": self.system_prompt}] if self.system_prompt else []
+        return head + self.window_messages
+    
+    def _head(self) -> Tuple[Dict[str, str], ...]:
+        """窗口之前的 system 消息：system prompt 与摘要"""
+        head = ({"role": "system", "content": self.system_prompt},) if self.system_prompt else ()
+        if self.summary:
+            head += (self._summary_message(),)
+        return head
     
     def get_messages(self) -> List[Dict[str, str]]:
-        """获取当前会话的所有消息"""
-        return self.history.copy()
+        """获取发给 LLM 的消息（有摘要时摘要紧跟 system prompt）；新列表，消息 dict 与窗口共享，不要修改"""
+        return [*self._head(), *self.window_messages]
+    
+    def _summary_message(self) -> Dict[str, str]:
+        return {"role": "system", "content": SUMMARY_MESSAGE_PREFIX + self.summary}
+    
+    def build_request(self, query: str) -> List[Dict[str, str]]:
+        """
+        构建发给 LLM 的消息列表，并记录本次请求的窗口情况（last_request_context）
+        
+        开启召回时，按 query 检索已移出窗口的消息，连同所在轮次的问答
+        在 recall_max_tokens 内插到最后一条消息（当前用户消息）之前；
+        放在末尾而不是开头，不会破坏前面的 prompt 前缀缓存
+        
+        Args:
+            query: 当前用户消息
+        """
+        messages = self.get_messages()
+        report = self.context_report()
+        
+        if self.recall_index is not None:
+            started = time.perf_counter()
+            recalled = self._recall(query)
+            report.recall_ms = (time.perf_counter() - started) * 1000
+            report.recalled_messages = len(recalled)
+            report.recalled_tokens = 0
+            if recalled:
+                recall_message = {
+                    "role": "system",
+                    "content": RECALL_MESSAGE_PREFIX + "\n".join(
+                        f"{_RECALL_ROLE_NAMES.get(m['role'], m['role'])}: {m['content']}" for m in recalled
+                    )
+                }
+                report.recalled_tokens = self._count(recall_message)
+                if self.window_messages:
+                    messages.insert(len(messages) - 1, recall_message)
+        
+        self.last_request_context = report
+        return messages
+    
+    def _recall(self, query: str) -> List[Dict[str, str]]:
+        """检索已移出窗口的相关消息，按原顺序返回（命中的消息连同同一轮的问答）"""
+        first, window_first = self.log.first_seq, self.window_start
+        if window_first <= first:
+            return []
+        
+        selected = set()
+        tokens = 0
+        for doc_id, _ in self.recall_index.search(query, self.recall_top_k, max_doc_id=window_first):
+            if doc_id < first:
+                continue
+            # 用户消息带上回复，回复带上提问
+            pair = {doc_id}
+            role = self.log.role(doc_id)
+            if role == "user" and doc_id + 1 < window_first:
+                pair.add(doc_id + 1)
+            elif role == "assistant" and doc_id > first:
+                pair.add(doc_id - 1)
+            pair -= selected
+            cost = sum(self.log.tokens(seq) for seq in pair)
+            if tokens + cost > self.recall_max_tokens:
+                continue
+            selected |= pair
+            tokens += cost
+        return [self.log.message(seq) for seq in sorted(selected)]
+    
+    def take_evicted(self) -> List[Dict[str, str]]:
+        """取出待摘要的消息"""
+        batch, self.evicted_pending = self.evicted_pending, []
+        return batch
+    
+    def restore_evicted(self, batch: List[Dict[str, str]]):
+        """摘要失败时放回待摘要的消息（放在之后移出的消息前面）"""
+        self.evicted_pending = batch + self.evicted_pending
+    
+    def evicted_pending_tokens(self) -> int:
+        """待摘要消息的估算 token 数"""
+        return sum(self._count(message) for message in self.evicted_pending)
+    
+    def set_summary(self, summary: str):
+        """更新滚动摘要，摘要计入窗口预算（超出时继续移出旧消息）"""
+        self.summary = summary.strip()
+        tokens = self._count(self._summary_message()) if self.summary else 0
+        self.window_tokens += tokens - self.summary_tokens
+        self.summary_tokens = tokens
+        if self.store is not None:
+            self.store.update_session(self.session_id, summary=self.summary)
+        self._trim()
+    
+    def record_usage(self, prompt_tokens: int, cached_tokens: int):
+        """
+        记录 LLM 返回的 prompt token 用量（含前缀缓存命中数）
+        
+        Args:
+            prompt_tokens: 本次请求的 prompt token 数
+            cached_tokens: 其中命中服务端前缀缓存的 token 数
+        """
+        self.prompt_tokens_total += prompt_tokens
+        self.cached_tokens_total += cached_tokens
+        if self.last_request_context is not None:
+            self.last_request_context.prompt_tokens = prompt_tokens
+            self.last_request_context.cached_tokens = cached_tokens
+    
+    def context_report(self) -> ContextWindowReport:
+        """当前上下文窗口的情况（随每次 LLM 请求记录）"""
+        return ContextWindowReport(
+            messages=len(self._head()) + self.log.end_seq - self.window_start,
+            tokens=self.window_tokens,
+            token_budget=self.token_budget,
+            evicted_messages=self.evicted_messages
+        )
     
     def clear_history(self, keep_system: bool = True):
-        """清空历史记录"""
-        if keep_system and self.history:
-            self.history = [self.history[0]]  # 保留 system prompt
-        else:
-            self.history = []
+        """清空上下文窗口（完整记录与存储中的消息不受影响）"""
+        if not keep_system:
+            self.system_prompt = ""
+            self.system_tokens = 0
+        self.window_start = self.log.end_seq
+        self.window_messages = []
+        if not self.keeps_transcript:
+            self.log.drop_before(self.window_start)
+        self.window_tokens = self.system_tokens
+        self.summary = ""
+        self.summary_tokens = 0
+        self.evicted_pending = []
+        if self.recall_index is not None:
+            self.recall_index = BM25Index()  # 清空的对话也不再被召回
+        self.preview = ""
+        if self.store is not None:
+            self.store.update_session(self.session_id, window_start=self.message_count, summary="", preview="")
+        if self.on_change is not None:
+            self.on_change(self.session_id)
+    
+    def to_record(self) -> SessionRecord:
+        """会话元数据"""
+        return SessionRecord(
+            session_id=self.session_id,
+            character=self.character,
+            language=self.language,
+            segmentation_policy=self.segmentation_policy,
+            created_at=self.created_at.timestamp(),
+            last_active=self.last_active.timestamp(),
+            message_count=self.message_count,
+            window_start=self.window_start,
+            summary=self.summary,
+            preview=self.preview
+        )
+    
+    def memory_footprint(self) -> int:
+        """
+        会话的估算内存占用（字节）：消息记录 + 窗口消息 dict + 待摘要消息 + 召回索引 + system prompt 与摘要
+        
+        消息记录的占用随追加 / 丢弃增量维护，空闲会话重复统计时不遍历消息
+        """
+        size = self.log.approx_bytes() + len(self.window_messages) * PENDING_MESSAGE_OVERHEAD_BYTES
+        size += sum(sys.getsizeof(m["content"]) + PENDING_MESSAGE_OVERHEAD_BYTES for m in self.evicted_pending)
+        if self.recall_index is not None:
+            size += self.recall_index.approx_bytes()
+        return size + sys.getsizeof(self.system_prompt) + sys.getsizeof(self.summary)
+    
+    def snapshot_messages(self) -> List[StoredMessage]:
+        """需要随会话保存的消息：保留完整记录时为完整记录，否则为窗口内的消息"""
+        start = self.log.first_seq if self.keeps_transcript else self.window_start
+        return self.transcript_slice(start, self.log.end_seq)
 
 
 class SessionManager:
     """
     会话管理服务
     
-    两级排序结构：
+    两级排序结构（OrderedDict，移到最前 / 删除都是 O(1)）：
     1. 角色层：按最近交互排序（最新交互的角色在前）
     2. 会话层：同一角色下的会话按最近交互排序
+    
+    通讯录版本：排序、会话增删或会话的消息数 / 预览变化时 contacts_version 加一，
+    session_revisions 记录每个会话最后一次变化时的版本，供通讯录快照增量更新
+    
+    持久化：启动时 rehydrate() 只读取会话元数据恢复两级排序，
+    消息在第一次 get_session() 时才从存储中加载（dormant_sessions → sessions）
+    
+    休眠：hibernate() 把空闲会话移出内存，只保留元数据（dormant_sessions）；
+    存储不持久化时另外保留一份压缩的消息快照。之后的 get_session() 透明地恢复
     """
     
-    def __init__(self, character_registry: CharacterRegistry):
+    def __init__(self, character_registry: CharacterRegistry, store: Optional[SessionStore] = None):
         # 存储所有会话（Dict 用于 O(1) 查找）
         self.sessions: Dict[str, ChatSession] = {}
         self.character_registry = character_registry
+        self.store = store or SessionStore()
+        
+        # 已持久化但尚未加载到内存的会话（只有元数据）
+        self.dormant_sessions: Dict[str, SessionRecord] = {}
         
-        # 角色的最近使用顺序（最新的在最前面 index=0）
-        self.character_order: deque[str] = deque()
+        # 角色的最近使用顺序（最新的在最前面，值不使用）
+        self.character_order: OrderedDict[str, None] = OrderedDict()
         
         # 每个角色下的会话列表（也按最近使用排序，最新的在前）
-        self.character_sessions: Dict[str, deque[str]] = {}
+        self.character_sessions: Dict[str, OrderedDict[str, None]] = {}
+        
+        # 通讯录版本
+        self.contacts_version = 0
+        self.session_revisions: Dict[str, int] = {}
+        
+        # 休眠会话的压缩消息快照（仅在存储不持久化时使用）
+        self.hibernated_snapshots: Dict[str, bytes] = {}
+        self.hibernated_count = 0
+        self.restored_count = 0
         
-        # 每个会话的音频队列（用于 TTS 流式播放）
+        # 正在从存储读取消息的会话（同一会话的并发加载共用一次读取）
+        self._loading: Dict[str, asyncio.Future] = {}
+        
+        # 每个会话的音频队列（用于 TTS 流式播放，第一次使用时创建）
         self.audio_queues: Dict[str, asyncio.Queue] = {}
         
         logger.info("✅ 会话管理服务已初始化")
@@ -74,7 +486,8 @@ class SessionManager:
         self, 
         session_id: str,
         character_id: str,
-        language: str = "zh"
+        language: str = "zh",
+        segmentation_policy: Optional[str] = None
     ) -> ChatSession:
         """
         创建新会话
@@ -83,36 +496,253 @@ class SessionManager:
             session_id: 会话ID
             character_id: 角色ID
             language: 会话语言
+            segmentation_policy: TTS 分段策略，None 时使用配置的默认值
         """
+        session = self._build_session(
+            session_id=session_id,
+            character_id=character_id,
+            language=language,
+            segmentation_policy=segmentation_policy or settings.TEXT_SEGMENTATION_POLICY
+        )
+        session.store = self.store
+        session.on_change = self._on_session_changed
+        self.store.save_session(session.to_record())
+        
+        self.sessions[session_id] = session
+        self._on_session_changed(session_id)
+        
+        # 新建会话自动添加到最前面（两级排序）
+        self.move_to_front(session_id)
+        
+        logger.info(f"🆕 创建会话: {session_id} (角色: {character_id})")
+        
+        return session
+    
+    def _build_session(
+        self,
+        session_id: str,
+        character_id: str,
+        language: str,
+        segmentation_policy: str
+    ) -> ChatSession:
+        """构建只含 system prompt 的会话（新建与从存储恢复共用）"""
         # 加载角色人设
         persona = load_persona(character_id, self.character_registry, language=language)
         
+        # 上下文预算与窗口模式：角色配置优先，其次全局配置
+        character_config = self.character_registry.get_character(character_id)
+        context_config = character_config.context if character_config else None
+        
         # 创建会话，初始化 system prompt
-        session = ChatSession(
+        return ChatSession(
             session_id=session_id,
             character=character_id,
-            history=[{"role": "system", "content": persona}]
+            language=language,
+            segmentation_policy=segmentation_policy,
+            system_prompt=persona,
+            token_budget=(context_config and context_config.token_budget) or settings.CONTEXT_TOKEN_BUDGET,
+            max_messages=(context_config and context_config.max_messages) or settings.CONTEXT_MAX_MESSAGES,
+            window_mode=(context_config and context_config.window_mode) or settings.CONTEXT_WINDOW_MODE,
+            block_retain=settings.CONTEXT_BLOCK_RETAIN,
+            summarize_evicted=settings.SUMMARY_ENABLED,
+            keep_transcript=not self.store.durable,  # 持久化时完整记录从存储分页读取
+            recall_index=BM25Index() if settings.RECALL_ENABLED else None,
+            recall_top_k=settings.RECALL_TOP_K,
+            recall_max_tokens=settings.RECALL_MAX_TOKENS,
+            estimate_tokens=get_token_estimator(settings.TOKEN_ESTIMATOR)
         )
+    
+    def rehydrate(self):
+        """
+        启动时从存储恢复会话索引与两级排序
         
-        self.sessions[session_id] = session
+        只读取会话元数据（与消息总量无关），消息在会话第一次被访问时加载
+        """
+        records = self.store.load_index()  # 按 ordered_at 从旧到新
+        for record in records:
+            if record.session_id in self.sessions:
+                continue
+            self.dormant_sessions[record.session_id] = record
+            self._place_front(record.character, record.session_id)
+        if records:
+            logger.info(f"🗃️ 从存储恢复 {len(records)} 个会话的索引")
+    
+    def get_session(self, session_id: str) -> Optional[ChatSession]:
+        """
+        获取会话（未加载或已休眠的会话在此时恢复）
         
-        # 创建该会话的音频队列
-        self.audio_queues[session_id] = asyncio.Queue(maxsize=10)  # 限制队列大小，防止内存溢出
+        只适用于不需要读磁盘的场景（已加载的会话或内存快照）；持久化存储下请使用 load_session()
+        """
+        session = self.sessions.get(session_id)
+        if session is None and session_id in self.dormant_sessions:
+            session = self._load_session(self.dormant_sessions.pop(session_id))
+        return session
+    
+    async def load_session(self, session_id: str) -> Optional[ChatSession]:
+        """获取会话；需要从持久化存储恢复时在线程中读取消息，不阻塞事件循环"""
+        session = self.sessions.get(session_id)
+        if session is not None or session_id not in self.dormant_sessions:
+            return session
+        if not self.store.durable:
+            return self.get_session(session_id)  # 从内存中的压缩快照恢复，没有磁盘 IO
+        
+        loading = self._loading.get(session_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load_from_store(session_id))
+            self._loading[session_id] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(session_id, None))
+        return await asyncio.shield(loading)
+    
+    async def _load_from_store(self, session_id: str) -> Optional[ChatSession]:
+        record = self.dormant_sessions[session_id]
+        messages = await asyncio.to_thread(self.store.load_messages, session_id, self._restore_from_seq(record))
+        # 读取期间会话可能已被同步路径加载、被删除或再次休眠
+        if self.dormant_sessions.get(session_id) is not record:
+            return self.get_session(session_id)
+        return self._load_session(self.dormant_sessions.pop(session_id), messages)
+    
+    def _restore_from_seq(self, record: SessionRecord) -> int:
+        """恢复会话需要读取的第一条消息（与 ChatSession.keeps_transcript 一致：保留完整记录时从头读取）"""
+        keeps_transcript = not self.store.durable or settings.RECALL_ENABLED
+        return 0 if keeps_transcript else record.window_start
+    
+    def _load_session(
+        self,
+        record: SessionRecord,
+        messages: Optional[List[StoredMessage]] = None
+    ) -> Optional[ChatSession]:
+        """
+        从快照或存储加载会话：恢复窗口内的消息与摘要（保留完整记录时加载全部消息）
         
-        # 确保该角色的会话列表存在
-        if character_id not in self.character_sessions:
-            self.character_sessions[character_id] = deque()
+        Args:
+            record: 会话元数据
+            messages: 已从存储读取的消息，None 时在此同步读取
+        """
+        try:
+            session = self._build_session(
+                session_id=record.session_id,
+                character_id=record.character,
+                language=record.language,
+                segmentation_policy=record.segmentation_policy
+            )
+        except Exception as e:
+            logger.error(f"❌ 恢复会话 {record.session_id} 失败 (角色: {record.character}): {e}")
+            self.dormant_sessions[record.session_id] = record
+            return None
         
-        # 新建会话自动添加到最前面（两级排序）
-        self.move_to_front(session_id)
+        snapshot = self.hibernated_snapshots.pop(record.session_id, None)
+        if snapshot is not None:
+            messages = [StoredMessage(*item) for item in json.loads(zlib.decompress(snapshot))]
+            self.restored_count += 1
+        elif messages is None:
+            messages = self.store.load_messages(record.session_id, from_seq=self._restore_from_seq(record))
+        session.restore(messages, window_start=record.window_start, message_count=record.message_count)
+        
+        session.created_at = datetime.fromtimestamp(record.created_at)
+        session.last_active = datetime.fromtimestamp(record.last_active)
+        if record.summary:
+            session.set_summary(record.summary)
+        session.preview = record.preview
+        session.store = self.store  # 恢复过程中的调整不回写
+        session.on_change = self._on_session_changed
+        
+        self.sessions[record.session_id] = session
+        logger.info(f"🗃️ 加载会话 {record.session_id} ({session.message_count - session.window_start} 条窗口消息)")
+        return session
+    
+    async def hibernate(self, session_id: str) -> bool:
+        """
+        让会话休眠：移出内存，只保留元数据，下次 get_session() 时恢复
         
-        logger.info(f"🆕 创建会话: {session_id} (角色: {character_id})")
+        持久化存储先提交待写入的数据；不持久化时把需要的消息压缩后留在内存中。
+        音频队列非空、提交失败或提交期间会话有新消息时放弃本次休眠
         
-        return session
+        Returns:
+            bool: 是否已休眠
+        """
+        session = self.sessions.get(session_id)
+        if session is None or self.get_audio_queue_size(session_id) > 0:
+            return False
+        
+        last_active = session.last_active
+        if self.store.durable and not await self.store.flush():
+            return False
+        if self.sessions.get(session_id) is not session or session.last_active != last_active:
+            return False
+        
+        if not self.store.durable:
+            self.hibernated_snapshots[session_id] = zlib.compress(
+                json.dumps(
+                    [[m.seq, m.role, m.content] for m in session.snapshot_messages()],
+                    ensure_ascii=False
+                ).encode("utf-8")
+            )
+        del self.sessions[session_id]
+        self.audio_queues.pop(session_id, None)
+        self.dormant_sessions[session_id] = session.to_record()
+        self.hibernated_count += 1
+        logger.debug(f"💤 会话 {session_id} 已休眠")
+        return True
     
-    def get_session(self, session_id: str) -> Optional[ChatSession]:
-        """获取会话"""
-        return self.sessions.get(session_id)
+    async def get_transcript_page(
+        self,
+        session_id: str,
+        before: Optional[int] = None,
+        limit: int = 50
+    ) -> Optional[Tuple[List[StoredMessage], int]]:
+        """
+        分页读取会话的完整记录（从最新往前翻）
+        
+        持久化存储直接分页查询，不会加载会话；否则从内存中的完整记录切片
+        
+        Args:
+            session_id: 会话ID
+            before: 只返回序号小于该值的消息，None 表示从最新的消息开始
+            limit: 最多返回的消息数
+            
+        Returns:
+            (按序号从旧到新的消息, 会话累计消息数)，会话不存在时为 None
+        """
+        record = self.describe_session(session_id)
+        if record is None:
+            return None
+        end = record.message_count if before is None else min(before, record.message_count)
+        
+        if self.store.durable:
+            await self.store.flush()  # 让刚写入的消息可见
+            messages = await asyncio.to_thread(self.store.load_messages_before, session_id, end, limit)
+        else:
+            session = self.get_session(session_id)
+            if session is None:
+                return None
+            messages = session.transcript_slice(end - limit, end)
+        return messages, record.message_count
+    
+    async def iter_transcript(self, session_id: str, batch_size: int = 500) -> AsyncIterator[List[StoredMessage]]:
+        """
+        按批次从旧到新遍历会话的完整记录（用于导出）
+        
+        Args:
+            session_id: 会话ID
+            batch_size: 每批的消息数
+        """
+        if self.store.durable:
+            await self.store.flush()
+            from_seq = 0
+            while True:
+                batch = await asyncio.to_thread(self.store.load_messages, session_id, from_seq, batch_size)
+                if batch:
+                    yield batch
+                if len(batch) < batch_size:
+                    return
+                from_seq = batch[-1].seq + 1
+        else:
+            session = self.get_session(session_id)
+            if session is None:
+                return
+            start, end = session.transcript_start, session.message_count
+            for batch_start in range(start, end, batch_size):
+                yield session.transcript_slice(batch_start, min(batch_start + batch_size, end))
     
     def get_or_create_session(
         self, 
@@ -128,13 +758,16 @@ class SessionManager:
     def remove_session(self, session_id: str):
         """删除会话"""
         session = self.sessions.get(session_id)
-        if not session:
+        record = self.dormant_sessions.pop(session_id, None)
+        if not session and not record:
             return
         
-        character_id = session.character
+        character_id = session.character if session else record.character
         
         # 从会话字典中删除
-        del self.sessions[session_id]
+        self.sessions.pop(session_id, None)
+        self.hibernated_snapshots.pop(session_id, None)
+        self.store.delete_session(session_id)
         
         # 清理音频队列
         if session_id in self.audio_queues:
@@ -142,20 +775,33 @@ class SessionManager:
         
         # 从角色的会话列表中移除
         if character_id in self.character_sessions:
-            if session_id in self.character_sessions[character_id]:
-                self.character_sessions[character_id].remove(session_id)
+            self.character_sessions[character_id].pop(session_id, None)
             
             # 如果该角色没有会话了，从角色列表中移除
             if len(self.character_sessions[character_id]) == 0:
                 del self.character_sessions[character_id]
-                if character_id in self.character_order:
-                    self.character_order.remove(character_id)
+                self.character_order.pop(character_id, None)
+        
+        self.session_revisions.pop(session_id, None)
+        self.contacts_version += 1
         
         logger.info(f"🗑️ 删除会话: {session_id} (角色: {character_id})")
     
     def get_session_count(self) -> int:
-        """获取当前活跃会话数"""
-        return len(self.sessions)
+        """获取会话数（含尚未加载的会话）"""
+        return len(self.sessions) + len(self.dormant_sessions)
+    
+    def memory_stats(self) -> Dict[str, Any]:
+        """会话内存占用情况"""
+        return {
+            "loaded_sessions": len(self.sessions),
+            "dormant_sessions": len(self.dormant_sessions),
+            "loaded_bytes": sum(session.memory_footprint() for session in self.sessions.values()),
+            "snapshot_bytes": sum(len(snapshot) for snapshot in self.hibernated_snapshots.values()),
+            "audio_queues": len(self.audio_queues),
+            "hibernated_count": self.hibernated_count,
+            "restored_count": self.restored_count,
+        }
     
     def move_to_front(self, session_id: str):
         """
@@ -173,24 +819,37 @@ class SessionManager:
         if not session:
             return
         
-        character_id = session.character
+        self._place_front(session.character, session_id)
+        self.store.update_session(session_id, ordered_at=time.time())
         
+        logger.debug(f"📌 会话 {session_id} (角色: {session.character}) 移到最前面")
+    
+    def _place_front(self, character_id: str, session_id: str):
+        """把角色和会话放到两级排序的最前面"""
         # 1. 将该角色移到角色列表的最前面
-        if character_id in self.character_order:
-            self.character_order.remove(character_id)
-        self.character_order.appendleft(character_id)
+        self.character_order[character_id] = None
+        self.character_order.move_to_end(character_id, last=False)
         
         # 2. 将该会话移到该角色会话列表的最前面
-        if character_id not in self.character_sessions:
-            self.character_sessions[character_id] = deque()
-        
-        if session_id in self.character_sessions[character_id]:
-            self.character_sessions[character_id].remove(session_id)
-        self.character_sessions[character_id].appendleft(session_id)
+        sessions = self.character_sessions.setdefault(character_id, OrderedDict())
+        sessions[session_id] = None
+        sessions.move_to_end(session_id, last=False)
         
-        logger.debug(f"📌 会话 {session_id} (角色: {character_id}) 移到最前面")
+        self.contacts_version += 1
     
-    def get_recent_sessions(self, limit: Optional[int] = None) -> List[ChatSession]:
+    def _on_session_changed(self, session_id: str):
+        """会话的消息数或预览变化（新建、新消息、清空历史）"""
+        self.contacts_version += 1
+        self.session_revisions[session_id] = self.contacts_version
+    
+    def describe_session(self, session_id: str) -> Optional[SessionRecord]:
+        """会话元数据（不会触发加载，用于通讯录等只读展示）"""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            return session.to_record()
+        return self.dormant_sessions.get(session_id)
+    
+    def get_recent_sessions(self, limit: Optional[int] = None) -> List[SessionRecord]:
         """
         获取最近活跃的会话列表（按两级排序）
         
@@ -208,22 +867,24 @@ class SessionManager:
                 break
             
             # 获取该角色下的所有会话（已排序）
-            session_ids = self.character_sessions.get(character_id, deque())
+            session_ids = self.character_sessions.get(character_id, ())
             for session_id in session_ids:
                 if limit and count >= limit:
                     break
                 
-                session = self.sessions.get(session_id)
-                if session:
-                    sessions.append(session)
+                record = self.describe_session(session_id)
+                if record:
+                    sessions.append(record)
                     count += 1
         
         return sessions
     
-    def get_contacts_grouped_by_character(self) -> Dict[str, List[ChatSession]]:
+    def get_contacts_grouped_by_character(self) -> Dict[str, List[SessionRecord]]:
         """
         获取按角色分组的通讯录（用于前端显示）
         
+        返回会话元数据，尚未加载的会话不会因此被加载
+        
         返回格式：
         {
             "character_id": [session1, session2, ...],  # 按最近交互排序
@@ -234,13 +895,13 @@ class SessionManager:
         contacts = {}
         
         for character_id in self.character_order:
-            session_ids = self.character_sessions.get(character_id, deque())
+            session_ids = self.character_sessions.get(character_id, ())
             character_sessions = []
             
             for session_id in session_ids:
-                session = self.sessions.get(session_id)
-                if session:
-                    character_sessions.append(session)
+                record = self.describe_session(session_id)
+                if record:
+                    character_sessions.append(record)
             
             if character_sessions:
                 contacts[character_id] = character_sessions
@@ -258,13 +919,14 @@ class SessionManager:
         Returns:
             bool: 是否成功入队
         """
-        if session_id not in self.audio_queues:
+        queue = self._audio_queue(session_id)
+        if queue is None:
             logger.warning(f"会话 {session_id} 不存在")
             return False
         
         try:
             await asyncio.wait_for(
-                self.audio_queues[session_id].put(audio_data),
+                queue.put(audio_data),
                 timeout=timeout
             )
             return True
@@ -285,16 +947,17 @@ class SessionManager:
         Returns:
             Optional[bytes]: 音频数据，超时或出错返回 None
         """
-        if session_id not in self.audio_queues:
+        queue = self._audio_queue(session_id)
+        if queue is None:
             logger.warning(f"会话 {session_id} 不存在")
             return None
         
         try:
             if timeout is None:
-                return await self.audio_queues[session_id].get()
+                return await queue.get()
             else:
                 return await asyncio.wait_for(
-                    self.audio_queues[session_id].get(),
+                    queue.get(),
                     timeout=timeout
                 )
         except asyncio.TimeoutError:
@@ -303,25 +966,16 @@ class SessionManager:
             logger.error(f"❌ 音频出队失败: {e}")
             return None
     
+    def _audio_queue(self, session_id: str) -> Optional[asyncio.Queue]:
+        """获取会话的音频队列，会话已加载但还没有队列时创建"""
+        queue = self.audio_queues.get(session_id)
+        if queue is None and session_id in self.sessions:
+            queue = asyncio.Queue(maxsize=10)  # 限制队列大小，防止内存溢出
+            self.audio_queues[session_id] = queue
+        return queue
+    
     def get_audio_queue_size(self, session_id: str) -> int:
         """获取音频队列大小"""
         if session_id not in self.audio_queues:
             return 0
         return self.audio_queues[session_id].qsize()
-    
-    # def cleanup_inactive_sessions(self, max_inactive_minutes: int = 30):
-    #     """清理不活跃的会话"""
-    #     now = datetime.now()
-    #     to_remove = []
-        
-    #     for session_id, session in self.sessions.items():
-    #         inactive_minutes = (now - session.last_active).total_seconds() / 60
-    #         if inactive_minutes > max_inactive_minutes:
-    #             to_remove.append(session_id)
-        
-    #     for session_id in to_remove:
-    #         self.remove_session(session_id)
-        
-    #     if to_remove:
-    #         logger.info(f"🧹 清理了 {len(to_remove)} 个不活跃会话")
-
@@ -0,0 +1,114 @@
+"""
+会话回收
+后台定期让空闲会话休眠，并把已加载会话的估算内存控制在预算内
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from app.infrastructure.managers.session_manager import SessionManager
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SessionReaper:
+    """
+    会话回收任务
+
+    每 interval 秒检查一次已加载的会话，按最近活跃时间从旧到新：
+    - 空闲超过 idle_ttl 秒的会话休眠
+    - 已加载会话的估算内存超过 memory_budget 时，继续让最久未活跃的会话休眠直到回到预算内
+    is_busy 返回 True 的会话（进行中的回复、待执行的摘要等）不会休眠
+    """
+
+    def __init__(
+        self,
+        session_manager: SessionManager,
+        idle_ttl: float = 1800.0,
+        memory_budget: int = 256 * 1024 * 1024,
+        interval: float = 30.0,
+        is_busy: Optional[Callable[[str], bool]] = None
+    ):
+        """
+        Args:
+            session_manager: 会话管理服务
+            idle_ttl: 空闲多久后休眠（秒），0 表示不按空闲时间休眠
+            memory_budget: 已加载会话的估算内存上限（字节），0 表示不限制
+            interval: 检查间隔（秒）
+            is_busy: 判断会话当前是否不能休眠
+        """
+        self.session_manager = session_manager
+        self.idle_ttl = idle_ttl
+        self.memory_budget = memory_budget
+        self.interval = interval
+        self.is_busy = is_busy or (lambda session_id: False)
+        self._task: Optional[asyncio.Task] = None
+
+        # 指标
+        self.idle_hibernated = 0
+        self.budget_hibernated = 0
+
+    async def start(self):
+        if self._task is None and (self.idle_ttl > 0 or self.memory_budget > 0):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reap()
+            except Exception as e:
+                logger.error(f"❌ 会话回收失败: {e}")
+
+    async def reap(self) -> int:
+        """
+        执行一次回收
+
+        Returns:
+            int: 本次休眠的会话数
+        """
+        sessions = sorted(self.session_manager.sessions.values(), key=lambda s: s.last_active)
+        footprints = {session.session_id: session.memory_footprint() for session in sessions}
+        total = sum(footprints.values())
+        now = datetime.now()
+        idle_count = budget_count = 0
+
+        for session in sessions:
+            idle = self.idle_ttl > 0 and (now - session.last_active).total_seconds() >= self.idle_ttl
+            over_budget = self.memory_budget > 0 and total > self.memory_budget
+            if not idle and not over_budget:
+                break  # 之后的会话更新，既不空闲也不需要为预算让路
+            if self.is_busy(session.session_id):
+                continue
+            if await self.session_manager.hibernate(session.session_id):
+                total -= footprints[session.session_id]
+                if idle:
+                    idle_count += 1
+                else:
+                    budget_count += 1
+
+        self.idle_hibernated += idle_count
+        self.budget_hibernated += budget_count
+        if idle_count or budget_count:
+            logger.info(
+                f"💤 会话回收: 空闲休眠 {idle_count} 个, 超出内存预算休眠 {budget_count} 个 "
+                f"(已加载 {len(self.session_manager.sessions)} 个, ~{total / 1024 / 1024:.1f} MB)"
+            )
+        return idle_count + budget_count
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "idle_ttl": self.idle_ttl,
+            "memory_budget": self.memory_budget,
+            "idle_hibernated": self.idle_hibernated,
+            "budget_hibernated": self.budget_hibernated,
+        }
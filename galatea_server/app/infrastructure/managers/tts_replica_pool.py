@@ -0,0 +1,311 @@
+"""GPT-SoVITS 副本池
+
+管理多个 TTS 后端实例，按角色亲和性路由请求：
+- 每个副本记录当前已加载的 GPT/SoVITS 权重路径，已加载的权重不会重复切换
+- 优先路由到已经加载了该角色权重的副本
+- 只有空闲（没有进行中请求）的副本才会切换权重，切换期间不接收新请求
+- 同一组权重的并发切换请求会合并为一次
+- 切换完成后先做一次短合成预热，避免第一句真实请求承担冷启动开销
+- 请求失败或卡住的副本会进入冷却期，期间不再被优先选择
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Collection, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.exceptions.tts import TTSException
+from app.schemas.character import VoiceConfig
+from app.utils.path_utils import resolve_file_path
+
+logger = get_logger(__name__)
+
+# 切换权重后的预热文本（按语言）
+WARMUP_TEXTS = {
+    "zh": "你好。",
+    "en": "Hello.",
+    "ja": "こんにちは。",
+}
+
+
+def build_tts_params(text: str, voice_config: VoiceConfig) -> Dict[str, Any]:
+    """
+    构建 GPT-SoVITS /tts 请求参数
+
+    Args:
+        text: 要合成的文本
+        voice_config: 角色声音配置
+
+    Returns:
+        Dict[str, Any]: 查询参数
+    """
+    # 构建参考音频的完整路径
+    # 配置文件中是相对路径如 "/audio/yanagi.wav"
+    # 需要转换为 BASE_DIR/assets/audio/yanagi.wav
+    ref_audio_path = voice_config.reference_audio
+    if ref_audio_path.startswith("/"):
+        ref_audio_path = str(settings.BASE_DIR / "app" / "assets" / ref_audio_path.lstrip("/"))
+
+    params = {
+        "text": text,
+        "text_lang": voice_config.language,
+        "ref_audio_path": ref_audio_path,
+        "prompt_lang": voice_config.language,
+        "streaming_mode": 1,  # 1=最佳质量流式
+        "media_type": "wav",
+        "batch_size": 1,
+        "speed_factor": voice_config.speed,
+        "temperature": 1.0,
+        "top_p": 1.0,
+        "top_k": 5,
+    }
+
+    # 如果提供了 prompt_text，则添加到参数中
+    if voice_config.prompt_text:
+        params["prompt_text"] = voice_config.prompt_text
+
+    return params
+
+
+@dataclass(frozen=True)
+class TTSModelWeights:
+    """一组 GPT/SoVITS 权重（解析后的绝对路径）"""
+    gpt_path: str
+    sovits_path: str
+
+    @classmethod
+    def from_voice_config(cls, voice_config: VoiceConfig) -> "TTSModelWeights":
+        return cls(
+            gpt_path=resolve_file_path(voice_config.gpt_model),
+            sovits_path=resolve_file_path(voice_config.sovits_model)
+        )
+
+
+@dataclass(eq=False)
+class TTSReplica:
+    """单个 GPT-SoVITS 后端实例的状态"""
+    base_url: str
+    gpt_weights_path: Optional[str] = None          # 当前已加载的 GPT 权重
+    sovits_weights_path: Optional[str] = None       # 当前已加载的 SoVITS 权重
+    loaded_character_id: Optional[str] = None       # 最近一次切换对应的角色（仅用于展示）
+    switching_to: Optional[TTSModelWeights] = None  # 正在切换到的权重（切换中不接收请求）
+    in_flight: int = 0                              # 进行中的 /tts 请求数
+    failed_until: float = 0.0                       # 冷却截止时间（monotonic）
+    last_used: float = 0.0
+
+    @property
+    def is_healthy(self) -> bool:
+        return time.monotonic() >= self.failed_until
+
+    @property
+    def is_idle(self) -> bool:
+        return self.in_flight == 0 and self.switching_to is None
+
+    def holds(self, weights: TTSModelWeights) -> bool:
+        """是否已加载指定权重"""
+        return (
+            self.gpt_weights_path == weights.gpt_path
+            and self.sovits_weights_path == weights.sovits_path
+        )
+
+
+class TTSReplicaPool:
+    """GPT-SoVITS 副本池（角色亲和路由）"""
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        switch_timeout: float = 30.0,
+        failure_cooldown: float = 30.0,
+        warmup_enabled: bool = True
+    ):
+        if not base_urls:
+            raise ValueError("TTS replica pool requires at least one backend")
+
+        self.replicas = [TTSReplica(base_url=url) for url in base_urls]
+        self.switch_timeout = switch_timeout
+        self.failure_cooldown = failure_cooldown
+        self.warmup_enabled = warmup_enabled
+        self.switch_count = 0       # 实际发生的权重切换次数
+        self.skipped_switches = 0   # 因权重已加载而跳过的切换请求次数
+        self._condition = asyncio.Condition()
+
+        logger.info(f"🎤 TTS 副本池初始化: {', '.join(base_urls)}")
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        character_id: str,
+        voice_config: VoiceConfig,
+        exclude: Collection[TTSReplica] = ()
+    ) -> AsyncIterator[TTSReplica]:
+        """
+        占用一个已加载该角色权重的副本（必要时在空闲副本上切换权重）
+
+        Args:
+            character_id: 角色ID
+            voice_config: 角色声音配置（包含权重路径）
+            exclude: 本次请求不再尝试的副本（用于故障转移）
+
+        Yields:
+            TTSReplica: 已加载目标权重的副本，退出上下文时释放
+        """
+        replica = await self._reserve(character_id, voice_config, exclude)
+        try:
+            yield replica
+        finally:
+            async with self._condition:
+                replica.in_flight -= 1
+                replica.last_used = time.monotonic()
+                self._condition.notify_all()
+
+    async def _reserve(
+        self,
+        character_id: str,
+        voice_config: VoiceConfig,
+        exclude: Collection[TTSReplica]
+    ) -> TTSReplica:
+        weights = TTSModelWeights.from_voice_config(voice_config)
+
+        async with self._condition:
+            while True:
+                candidates = [r for r in self.replicas if r not in exclude]
+                if not candidates:
+                    raise TTSException(message="没有可用的 TTS 副本")
+                healthy = [r for r in candidates if r.is_healthy] or candidates
+
+                # 1. 已加载该组权重的副本，选进行中请求最少的
+                loaded = [r for r in healthy if r.holds(weights) and r.switching_to is None]
+                if loaded:
+                    replica = min(loaded, key=lambda r: r.in_flight)
+                    replica.in_flight += 1
+                    return replica
+
+                # 2. 已有副本正在切换到该组权重，等待切换完成即可（合并并发切换）
+                if any(r.switching_to == weights for r in healthy):
+                    await self._condition.wait()
+                    continue
+
+                # 3. 在空闲副本上切换权重（优先未加载过的，其次最久未使用的）
+                idle = [r for r in healthy if r.is_idle]
+                if idle:
+                    replica = min(idle, key=lambda r: (r.gpt_weights_path is not None, r.last_used))
+                    replica.switching_to = weights
+                    break
+
+                # 4. 没有空闲副本，等待任意副本释放
+                await self._condition.wait()
+
+        # 切换权重期间不持有锁，其他角色的请求可以继续路由
+        try:
+            await self._load_weights(replica, weights)
+            replica.loaded_character_id = character_id
+            if self.warmup_enabled:
+                await self._warm_up(replica, voice_config)
+        except BaseException as e:
+            # 包括打断/断开导致的取消：必须清除切换状态，否则等待该副本的请求会一直挂起
+            replica.switching_to = None
+            if isinstance(e, Exception):
+                replica.failed_until = time.monotonic() + self.failure_cooldown
+            async with self._condition:
+                self._condition.notify_all()
+            raise
+
+        async with self._condition:
+            replica.switching_to = None
+            replica.in_flight += 1
+            self._condition.notify_all()
+
+        logger.info(f"🔁 副本 {replica.base_url} 已切换到角色: {character_id}")
+        return replica
+
+    async def _load_weights(self, replica: TTSReplica, weights: TTSModelWeights):
+        """
+        在指定副本上加载 GPT 与 SoVITS 权重
+
+        已经加载的那一半权重会被跳过；每次调用成功后立即更新副本状态，
+        因此即使中途失败，记录的已加载路径也与后端保持一致
+        """
+        async with httpx.AsyncClient(timeout=self.switch_timeout) as client:
+            if replica.gpt_weights_path != weights.gpt_path:
+                await self._call_set_weights(client, replica, "set_gpt_weights", weights.gpt_path)
+                replica.gpt_weights_path = weights.gpt_path
+
+            if replica.sovits_weights_path != weights.sovits_path:
+                await self._call_set_weights(client, replica, "set_sovits_weights", weights.sovits_path)
+                replica.sovits_weights_path = weights.sovits_path
+
+        self.switch_count += 1
+
+    @staticmethod
+    async def _call_set_weights(
+        client: httpx.AsyncClient,
+        replica: TTSReplica,
+        endpoint: str,
+        weights_path: str
+    ):
+        logger.info(f"📡 调用 API: GET {replica.base_url}/{endpoint}")
+        response = await client.get(
+            f"{replica.base_url}/{endpoint}",
+            params={"weights_path": weights_path}
+        )
+        if response.status_code != 200:
+            raise TTSException(
+                message=f"{endpoint} 调用失败: {response.status_code} - {response.text}"
+            )
+
+    async def _warm_up(self, replica: TTSReplica, voice_config: VoiceConfig):
+        """切换后做一次短合成，预热模型（失败只记录日志，不影响切换结果）"""
+        text = WARMUP_TEXTS.get(voice_config.language, WARMUP_TEXTS["zh"])
+        started = time.monotonic()
+        try:
+            async with httpx.AsyncClient(timeout=self.switch_timeout) as client:
+                response = await client.get(
+                    f"{replica.base_url}/tts",
+                    params=build_tts_params(text, voice_config)
+                )
+            if response.status_code != 200:
+                logger.warning(f"⚠️ 副本 {replica.base_url} 预热失败: {response.status_code}")
+                return
+            logger.info(f"🔥 副本 {replica.base_url} 预热完成 ({time.monotonic() - started:.2f}秒)")
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠️ 副本 {replica.base_url} 预热失败: {e}")
+
+    async def ensure_loaded(self, character_id: str, voice_config: VoiceConfig) -> TTSReplica:
+        """
+        确保至少有一个副本加载了该角色的权重（不占用副本）
+
+        已有副本加载了该组权重时直接返回，不等待进行中的合成；否则占用一个空闲副本完成切换后释放
+        """
+        weights = TTSModelWeights.from_voice_config(voice_config)
+        loaded = [r for r in self.replicas if r.holds(weights) and r.switching_to is None]
+        if loaded:
+            self.skipped_switches += 1
+            logger.info(f"⏭️ 角色 {character_id} 的权重已加载，跳过切换")
+            return min(loaded, key=lambda r: (not r.is_healthy, r.in_flight))
+        async with self.acquire(character_id, voice_config) as replica:
+            return replica
+
+    def mark_failed(self, replica: TTSReplica):
+        """标记副本故障（超时/连接失败），冷却期内不优先路由"""
+        replica.failed_until = time.monotonic() + self.failure_cooldown
+        logger.warning(f"⚠️ TTS 副本 {replica.base_url} 标记为故障，冷却 {self.failure_cooldown:.0f} 秒")
+
+    def status(self) -> List[Dict[str, Any]]:
+        """各副本的当前状态"""
+        return [
+            {
+                "base_url": r.base_url,
+                "character_id": r.loaded_character_id,
+                "gpt_weights_path": r.gpt_weights_path,
+                "sovits_weights_path": r.sovits_weights_path,
+                "switching": r.switching_to is not None,
+                "in_flight": r.in_flight,
+                "healthy": r.is_healthy,
+            }
+            for r in self.replicas
+        ]
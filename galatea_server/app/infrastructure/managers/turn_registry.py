@@ -0,0 +1,374 @@
+"""
+会话轮次调度
+每个会话同一时间只执行一轮回复（会话锁），其余消息按准入策略排队、合并或拒绝；
+可选的防抖窗口把连续发来的消息合并为一轮；
+同时记录进行中的回复任务，用于打断（新消息 / 客户端 stop / 断开连接）
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Coroutine, Deque, Dict, Optional
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AdmissionPolicy(str, Enum):
+    """会话已有进行中或等待中的回复时，新消息的处理方式"""
+    INTERRUPT = "interrupt"  # 打断进行中的回复，新消息与尚未开始的消息合并为下一轮
+    QUEUE = "queue"          # 排队等待，等待队列满时拒绝
+    MERGE = "merge"          # 排队等待；已有等待中的一轮时合并进去
+    REJECT = "reject"        # 直接拒绝
+
+
+class DebounceMode(str, Enum):
+    """防抖窗口内连续消息的合并方式"""
+    MERGE = "merge"      # 每轮等最后一条消息之后的窗口结束才开始，窗口内的消息并入本轮
+    RESTART = "restart"  # 立即开始；窗口内又来消息且本轮还没有输出时，取消本轮并用新消息重新开始
+
+
+@dataclass(eq=False)
+class PendingTurn:
+    """一轮待执行的回复"""
+    text: str                                 # 用户消息（合并时按行拼接）
+    run: Callable[[str], Coroutine]           # 以最终的用户消息执行本轮
+    owner: Any = None                         # 发起方（如连接 ID），合并时改为最后一条消息的发起方
+    merged: int = 1                           # 合并的消息数
+    last_message_at: float = 0.0              # 最后一条消息的到达时间（time.monotonic）
+    ready_at: float = 0.0                     # 防抖：不早于该时间开始
+    has_output: bool = False                  # 已开始输出（见 mark_output）
+    superseded: bool = False                  # 因防抖被新的一轮取代（见 is_restarting）
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+@dataclass
+class Admission:
+    """一条消息的准入结果"""
+    accepted: bool
+    position: int = 0     # 前面还有几轮（0 表示前面没有需要等待的回复）
+    merged: bool = False  # 是否合并进了已在等待的一轮
+    restarted: bool = False  # 是否取消了还没有输出的一轮并重新开始
+    task: Optional[asyncio.Task] = None
+
+
+class _SessionLane:
+    """单个会话的调度状态"""
+
+    __slots__ = ("lock", "pending", "running", "running_turn")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()                     # 持有者即正在执行的一轮
+        self.pending: Deque[PendingTurn] = deque()     # 等待会话锁的轮次（按提交顺序）
+        self.running: Optional[asyncio.Task] = None
+        self.running_turn: Optional[PendingTurn] = None
+
+
+class TurnRegistry:
+    """
+    每个会话的回复调度表
+
+    - 同一会话的回复串行：每轮在持有会话锁期间执行，被取消的回复清理完才释放锁，后一轮不会与它重叠
+    - 不同会话的回复互不等待，可以在同一连接上并发进行
+    - 会话忙时按 AdmissionPolicy 处理新消息；等待中的轮次最多 max_pending 个
+    - 防抖窗口（debounce 秒）内的连续消息按 DebounceMode 合并为一轮，优先于准入策略
+    """
+
+    def __init__(
+        self,
+        cancel_timeout: float = 5.0,
+        policy: AdmissionPolicy = AdmissionPolicy.INTERRUPT,
+        max_pending: int = 2,
+        debounce: float = 0.0,
+        debounce_mode: DebounceMode = DebounceMode.MERGE
+    ):
+        """
+        Args:
+            cancel_timeout: 等待被取消任务完成清理的最长时间（秒）
+            policy: 默认准入策略
+            max_pending: 每个会话等待中的轮次上限（queue 策略下超出即拒绝）
+            debounce: 默认防抖窗口（秒），0 表示不防抖
+            debounce_mode: 防抖窗口内连续消息的合并方式
+        """
+        self.active_turns: Dict[str, asyncio.Task] = {}  # 正在执行的回复
+        self.cancel_timeout = cancel_timeout
+        self.policy = AdmissionPolicy(policy)
+        self.max_pending = max(1, max_pending)
+        self.debounce = max(0.0, debounce)
+        self.debounce_mode = DebounceMode(debounce_mode)
+        self._lanes: Dict[str, _SessionLane] = {}
+
+        # 指标
+        self.cancelled_count = 0
+        self.queued_count = 0
+        self.merged_count = 0
+        self.rejected_count = 0
+        self.debounced_count = 0
+        self.restarted_count = 0
+
+    def submit(
+        self,
+        session_id: str,
+        text: str,
+        run: Callable[[str], Coroutine],
+        owner: Any = None,
+        policy: Optional[AdmissionPolicy] = None,
+        debounce: Optional[float] = None
+    ) -> Admission:
+        """
+        提交一条用户消息，按准入策略安排它的回复
+
+        Args:
+            session_id: 会话ID
+            text: 用户消息
+            run: 执行一轮回复的协程工厂，参数为最终的用户消息（可能由多条合并而来）
+            owner: 发起方，cancel_owned() 按它取消
+            policy: 本条消息使用的准入策略，默认使用 self.policy
+            debounce: 本条消息使用的防抖窗口（秒），默认使用 self.debounce
+        """
+        policy = AdmissionPolicy(policy or self.policy)
+        debounce = self.debounce if debounce is None else max(0.0, debounce)
+        now = time.monotonic()
+        lane = self._lanes.get(session_id)
+        if lane is None:
+            lane = self._lanes[session_id] = _SessionLane()
+
+        restarted = False
+        if debounce > 0:
+            last = lane.pending[-1] if lane.pending else None
+            if last is not None and now - last.last_message_at < debounce:
+                # 窗口内的消息并入尚未开始的一轮，MERGE 模式下顺延它的开始时间
+                self.debounced_count += 1
+                if self.debounce_mode == DebounceMode.MERGE:
+                    last.ready_at = now + debounce
+                return self._merge(session_id, lane, last, text, run, owner, now)
+
+            running = lane.running_turn
+            if (
+                self.debounce_mode == DebounceMode.RESTART and last is None
+                and running is not None and not running.has_output
+                and now - running.last_message_at < debounce
+                and self.interrupt(session_id, reason="debounce", restart=True)
+            ):
+                # 被取消的一轮已把用户消息写入历史，新的一轮只需带上新消息
+                self.debounced_count += 1
+                self.restarted_count += 1
+                restarted = True
+
+        busy = lane.running is not None or bool(lane.pending)
+        if busy and policy == AdmissionPolicy.REJECT and not restarted:
+            self.rejected_count += 1
+            return Admission(accepted=False, position=self._ahead(lane))
+
+        if policy == AdmissionPolicy.INTERRUPT:
+            self.interrupt(session_id, reason="barge_in")
+
+        if lane.pending and policy in (AdmissionPolicy.MERGE, AdmissionPolicy.INTERRUPT):
+            return self._merge(session_id, lane, lane.pending[-1], text, run, owner, now)
+
+        if len(lane.pending) >= self.max_pending:
+            self.rejected_count += 1
+            logger.info(f"🚫 会话 {session_id} 等待中的回复已满 ({len(lane.pending)} 轮)，拒绝新消息")
+            return Admission(accepted=False, position=self._ahead(lane))
+
+        turn = PendingTurn(text=text, run=run, owner=owner, last_message_at=now)
+        if debounce > 0 and self.debounce_mode == DebounceMode.MERGE:
+            turn.ready_at = now + debounce
+        lane.pending.append(turn)
+        turn.task = asyncio.create_task(self._run_turn(session_id, lane, turn))
+        turn.task.add_done_callback(lambda done: self._on_done(session_id, lane, turn))
+        position = self._ahead(lane) - 1
+        if position > 0:
+            self.queued_count += 1
+            logger.info(f"⏳ 会话 {session_id} 的新消息排队 (前面还有 {position} 轮)")
+        return Admission(accepted=True, position=position, restarted=restarted, task=turn.task)
+
+    def _merge(
+        self,
+        session_id: str,
+        lane: _SessionLane,
+        turn: PendingTurn,
+        text: str,
+        run: Callable[[str], Coroutine],
+        owner: Any,
+        now: float
+    ) -> Admission:
+        """把新消息合并进一个尚未开始的轮次（它开始执行前才读取 text）"""
+        turn.text = f"{turn.text}\n{text}"
+        turn.run = run
+        turn.owner = owner
+        turn.merged += 1
+        turn.last_message_at = now
+        self.merged_count += 1
+        logger.info(f"🧩 会话 {session_id} 的新消息并入下一轮 (共 {turn.merged} 条)")
+        return Admission(accepted=True, position=self._ahead(lane) - 1, merged=True, task=turn.task)
+
+    @staticmethod
+    def _ahead(lane: _SessionLane) -> int:
+        """等待中的轮次数 + 进行中且未被打断的一轮"""
+        running = lane.running is not None and not lane.running.cancelling()
+        return len(lane.pending) + (1 if running else 0)
+
+    async def _run_turn(self, session_id: str, lane: _SessionLane, turn: PendingTurn):
+        async with lane.lock:
+            # 防抖：等到最后一条消息之后的窗口结束，期间到达的消息仍会并入本轮
+            while (delay := turn.ready_at - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            lane.pending.remove(turn)
+            lane.running = turn.task
+            lane.running_turn = turn
+            self.active_turns[session_id] = turn.task
+            try:
+                # 协程在开始执行时才创建，排队中被取消或合并掉的轮次不会留下未执行的协程
+                await turn.run(turn.text)
+            finally:
+                lane.running = None
+                lane.running_turn = None
+                if self.active_turns.get(session_id) is turn.task:
+                    del self.active_turns[session_id]
+
+    @staticmethod
+    def _drop(lane: _SessionLane, turn: PendingTurn):
+        """取消一个等待中的轮次；立即移出等待队列，之后的消息不会再并入它"""
+        lane.pending.remove(turn)
+        turn.task.cancel()
+
+    def _on_done(self, session_id: str, lane: _SessionLane, turn: PendingTurn):
+        if lane.running is None and not lane.pending and self._lanes.get(session_id) is lane:
+            del self._lanes[session_id]
+
+    def get(self, session_id: str) -> Optional[asyncio.Task]:
+        """获取会话进行中的回复任务"""
+        return self.active_turns.get(session_id)
+
+    def is_active(self, session_id: str) -> bool:
+        """会话是否有进行中或等待中的回复"""
+        return session_id in self._lanes
+
+    def mark_output(self, session_id: str):
+        """记录会话进行中的一轮已开始输出（之后不再因防抖重新开始）"""
+        lane = self._lanes.get(session_id)
+        if lane is not None and lane.running_turn is not None:
+            lane.running_turn.has_output = True
+
+    def is_restarting(self, session_id: str) -> bool:
+        """
+        会话进行中的一轮是否因防抖被新的一轮取代
+
+        在被取消的一轮清理期间（释放会话锁之前）调用；此时还没有输出的回复不需要保存，
+        历史中的用户消息与新一轮的消息相连
+        """
+        lane = self._lanes.get(session_id)
+        return lane is not None and lane.running_turn is not None and lane.running_turn.superseded
+
+    def pending_count(self, session_id: str) -> int:
+        """会话等待中的轮次数"""
+        lane = self._lanes.get(session_id)
+        return len(lane.pending) if lane else 0
+
+    def interrupt(
+        self,
+        session_id: str,
+        reason: str = "",
+        drop_pending: bool = False,
+        restart: bool = False
+    ) -> bool:
+        """
+        请求取消会话进行中的回复，不等待其清理完成
+
+        供 WebSocket 读循环使用，读循环不能被回复任务的清理阻塞
+
+        Args:
+            drop_pending: 同时取消等待中的轮次（客户端 stop）
+            restart: 本轮由新的一轮取代（清理时 is_restarting() 返回 True）
+
+        Returns:
+            是否确实取消了一个进行中的任务
+        """
+        lane = self._lanes.get(session_id)
+        if lane is None:
+            return False
+        if drop_pending:
+            for turn in list(lane.pending):
+                self._drop(lane, turn)
+
+        task = lane.running
+        if task is None or task.done() or task.cancelling():
+            return False
+
+        logger.info(f"⏹️ 打断会话 {session_id} 的回复 ({reason or 'cancel'})")
+        if restart:
+            lane.running_turn.superseded = True
+        task.cancel()
+        self.cancelled_count += 1
+        return True
+
+    async def cancel(self, session_id: str, reason: str = "", drop_pending: bool = False) -> bool:
+        """
+        取消会话进行中的回复，并等待其完成清理（保存截断的回复、停止 TTS）
+
+        Args:
+            session_id: 会话ID
+            reason: 取消原因（仅用于日志）
+            drop_pending: 同时取消等待中的轮次（如删除会话时）
+
+        Returns:
+            是否确实取消了一个进行中的任务
+        """
+        task = self.active_turns.get(session_id)
+        if not self.interrupt(session_id, reason, drop_pending=drop_pending):
+            return False
+        await self._wait_cleanup(session_id, task)
+        return True
+
+    async def cancel_owned(self, owner: Any, reason: str = "") -> int:
+        """
+        取消某个发起方的所有回复（等待中的直接取消，进行中的等待其清理完成）
+
+        Returns:
+            int: 取消的轮次数
+        """
+        running = []
+        count = 0
+        for session_id, lane in list(self._lanes.items()):
+            for turn in list(lane.pending):
+                if turn.owner == owner:
+                    self._drop(lane, turn)
+                    count += 1
+            if lane.running_turn is not None and lane.running_turn.owner == owner:
+                task = lane.running
+                if self.interrupt(session_id, reason):
+                    running.append((session_id, task))
+                    count += 1
+        for session_id, task in running:
+            await self._wait_cleanup(session_id, task)
+        return count
+
+    async def _wait_cleanup(self, session_id: str, task: asyncio.Task):
+        # shield 保证调用方自身被取消时不会连带再次取消该任务
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=self.cancel_timeout)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ 会话 {session_id} 的回复在 {self.cancel_timeout}s 内未完成清理")
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy.value,
+            "max_pending": self.max_pending,
+            "debounce_ms": int(self.debounce * 1000),
+            "debounce_mode": self.debounce_mode.value,
+            "active": len(self.active_turns),
+            "pending": sum(len(lane.pending) for lane in self._lanes.values()),
+            "cancelled": self.cancelled_count,
+            "queued": self.queued_count,
+            "merged": self.merged_count,
+            "rejected": self.rejected_count,
+            "debounced": self.debounced_count,
+            "restarted": self.restarted_count,
+        }
@@ -1,27 +1,72 @@
 """Unity 客户端连接管理服务"""
 from fastapi import WebSocket
-from typing import Set, Optional
+from typing import Any, Callable, Dict, Iterable, List, Set, Optional
 from app.schemas.unity_protocol import (
-    UnityBaseMessage, UnityMessageType, SwitchCharacterPayload
+    UnityBaseMessage, UnityMessageType, SwitchCharacterPayload, StopSpeakingPayload
 )
+from app.schemas.audio_frame_protocol import AUDIO_FORMAT_QUERY_PARAM, AUDIO_FORMAT_BINARY
+from app.infrastructure.managers.connection_writer import ConnectionWriter, OutgoingMessage, SendPolicy
+from app.core.config import settings
 from app.core.logger import get_logger
+import asyncio
 import time
 
 logger = get_logger(__name__)
 
+# 连接时通过该查询参数声明要接收的会话（逗号分隔），如 /ws/unity?session_id=abc
+SESSION_QUERY_PARAM = "session_id"
+
+# 各消息类型在客户端跟不上时的处理策略（未列出的类型按 BLOCK 处理）
+DEFAULT_SEND_POLICIES: Dict[UnityMessageType, SendPolicy] = {
+    UnityMessageType.PLAY_ANIMATION: SendPolicy.DROP_OLDEST,
+    UnityMessageType.SET_EXPRESSION: SendPolicy.DROP_OLDEST,
+    UnityMessageType.IDLE: SendPolicy.DROP_OLDEST,
+    UnityMessageType.AUDIO_START: SendPolicy.NEVER_DROP,
+    UnityMessageType.AUDIO_CHUNK: SendPolicy.NEVER_DROP,
+    UnityMessageType.AUDIO_END: SendPolicy.NEVER_DROP,
+    UnityMessageType.AUDIO_COMPLETE: SendPolicy.NEVER_DROP,
+}
+
 
 class UnityConnectionManager:
-    """管理所有 Unity 客户端的连接"""
+    """
+    管理所有 Unity 客户端的连接
     
-    def __init__(self):
+    每个连接有独立的写任务与有界队列（见 ConnectionWriter）
+    """
+    
+    def __init__(self, send_policies: Optional[Dict[UnityMessageType, SendPolicy]] = None):
         self.active_connections: Set[WebSocket] = set()
+        self.writers: Dict[WebSocket, ConnectionWriter] = {}
+        self.send_policies = {**DEFAULT_SEND_POLICIES, **(send_policies or {})}
+        self.overflow_disconnects = 0
         self.pending_character_id: Optional[str] = None  # 待切换的角色 ID
+        # 协商使用二进制音频帧的连接（其余连接使用 Base64 JSON）
+        self.binary_audio_connections: Set[WebSocket] = set()
+        # 会话订阅：声明了会话的连接只接收这些会话的事件，未声明的连接接收所有会话（兼容旧客户端）
+        self.session_subscribers: Dict[str, Set[WebSocket]] = {}
+        self.connection_sessions: Dict[WebSocket, Set[str]] = {}
     
     async def connect(self, websocket: WebSocket):
         """接受新的 Unity 客户端连接"""
         await websocket.accept()
         self.active_connections.add(websocket)
-        logger.info(f"✅ Unity Client Connected. Total: {len(self.active_connections)}")
+        self.writers[websocket] = ConnectionWriter(
+            websocket,
+            on_overflow=self._on_overflow,
+            max_messages=settings.WS_SEND_QUEUE_MAX_MESSAGES,
+            max_bytes=settings.WS_SEND_QUEUE_MAX_BYTES,
+            block_timeout=settings.WS_SEND_BLOCK_TIMEOUT
+        )
+        if websocket.query_params.get(AUDIO_FORMAT_QUERY_PARAM) == AUDIO_FORMAT_BINARY:
+            self.binary_audio_connections.add(websocket)
+        for session_id in websocket.query_params.get(SESSION_QUERY_PARAM, "").split(","):
+            if session_id.strip():
+                self.subscribe(websocket, session_id.strip())
+        logger.info(
+            f"✅ Unity Client Connected. Total: {len(self.active_connections)} "
+            f"(audio: {'binary' if websocket in self.binary_audio_connections else 'json'})"
+        )
         
         # 如果有待加载的角色，立即发送切换角色消息
         if self.pending_character_id:
@@ -34,23 +79,123 @@ class UnityConnectionManager:
     
     def disconnect(self, websocket: WebSocket):
         """断开 Unity 客户端连接"""
+        if websocket not in self.active_connections:
+            return
         self.active_connections.discard(websocket)
+        self.binary_audio_connections.discard(websocket)
+        writer = self.writers.pop(websocket, None)
+        if writer is not None:
+            writer.close()
+        for session_id in self.connection_sessions.pop(websocket, set()):
+            self._remove_subscriber(session_id, websocket)
         logger.info(f"❌ Unity Client Disconnected. Total: {len(self.active_connections)}")
     
-    async def broadcast(self, message: UnityBaseMessage):
-        """广播消息给所有 Unity 客户端（通常只有一个）"""
-        disconnected = set()
+    async def _on_overflow(self, websocket: WebSocket, reason: str):
+        """客户端跟不上或发送失败：断开连接"""
+        if websocket not in self.active_connections:
+            return
+        self.overflow_disconnects += 1
+        self.disconnect(websocket)
+        try:
+            await websocket.close(code=1013, reason=reason)
+        except Exception:
+            pass
+    
+    def subscribe(self, websocket: WebSocket, session_id: str):
+        """订阅会话：此连接从此只接收已订阅会话的事件"""
+        if websocket not in self.active_connections:
+            return
+        self.connection_sessions.setdefault(websocket, set()).add(session_id)
+        self.session_subscribers.setdefault(session_id, set()).add(websocket)
+        logger.debug(f"📌 Unity 连接订阅会话 {session_id}")
+    
+    def unsubscribe(self, websocket: WebSocket, session_id: str):
+        """取消订阅会话（全部取消后恢复为接收所有会话）"""
+        sessions = self.connection_sessions.get(websocket)
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self.connection_sessions[websocket]
+        self._remove_subscriber(session_id, websocket)
+    
+    def _remove_subscriber(self, session_id: str, websocket: WebSocket):
+        subscribers = self.session_subscribers.get(session_id)
+        if subscribers is None:
+            return
+        subscribers.discard(websocket)
+        if not subscribers:
+            del self.session_subscribers[session_id]
+    
+    def _targets(self, session_id: Optional[str]) -> Iterable[WebSocket]:
+        """session_id 为 None 时发给所有连接，否则发给该会话的订阅者与未声明会话的连接"""
+        if session_id is None:
+            return list(self.active_connections)
+        subscribers = self.session_subscribers.get(session_id, set())
+        return [
+            ws for ws in self.active_connections
+            if ws in subscribers or ws not in self.connection_sessions
+        ]
+    
+    async def broadcast(self, message: UnityBaseMessage, session_id: Optional[str] = None):
+        """
+        广播消息给 Unity 客户端（通常只有一个；只入队，由各连接的写任务发送）
         
-        for ws in self.active_connections:
-            try:
-                await ws.send_text(message.model_dump_json())
-            except Exception as e:
-                logger.error(f"Failed to send to unity client: {e}")
-                disconnected.add(ws)
+        Args:
+            message: 消息
+            session_id: 仅发给关注该会话的连接；None 表示发给所有 Unity 客户端
+        """
+        targets = self._targets(session_id)
+        if not targets:
+            return
         
-        # 清理断开的连接
-        for ws in disconnected:
-            self.disconnect(ws)
+        json_text = message.model_dump_json()
+        policy = self.send_policies.get(message.type, SendPolicy.BLOCK)
+        await asyncio.gather(*(
+            self.writers[ws].put(OutgoingMessage(policy=policy, data=json_text))
+            for ws in targets if ws in self.writers
+        ))
+    
+    async def broadcast_audio(
+        self,
+        frame: bytes,
+        build_json: Callable[[], str],
+        session_id: Optional[str] = None
+    ):
+        """
+        广播音频数据
+        
+        协商了二进制帧的连接直接发送 frame；其余连接回退到 JSON，
+        JSON 消息仅在需要时编码一次（避免无人使用时做 Base64 编码）
+        
+        Args:
+            frame: 二进制音频帧（见 audio_frame_protocol）
+            build_json: 编码 JSON 回退消息的函数（见 message_codec.encode_unity_payload）
+            session_id: 仅发给关注该会话的连接；None 表示发给所有 Unity 客户端
+        """
+        json_text = None
+        
+        for ws in self._targets(session_id):
+            writer = self.writers.get(ws)
+            if writer is None:
+                continue
+            if ws in self.binary_audio_connections:
+                await writer.put(OutgoingMessage(policy=SendPolicy.NEVER_DROP, data=frame))
+            else:
+                if json_text is None:
+                    json_text = build_json()
+                await writer.put(OutgoingMessage(policy=SendPolicy.NEVER_DROP, data=json_text))
+    
+    def send_queue_stats(self) -> List[Dict[str, Any]]:
+        """每个连接的发送队列指标"""
+        return [
+            {
+                "client": f"{ws.client.host}:{ws.client.port}" if ws.client else "",
+                "audio_format": "binary" if ws in self.binary_audio_connections else "json",
+                "sessions": sorted(self.connection_sessions.get(ws, ())),
+                **writer.stats()
+            }
+            for ws, writer in self.writers.items()
+        ]
     
     async def send_command(self, message: UnityBaseMessage):
         """发送指令给 Unity（如果有多个实例，发给所有）"""
@@ -85,3 +230,17 @@ class UnityConnectionManager:
         
         await self.broadcast(message)
         logger.info(f"🎭 已通知Unity切换到角色: {character_id}")
+    
+    async def notify_stop_speaking(self, reason: str = "interrupted", session_id: Optional[str] = None):
+        """通知Unity停止说话（丢弃尚未播放的音频）"""
+        if not self.has_active_client:
+            return
+        
+        message = UnityBaseMessage(
+            type=UnityMessageType.STOP_SPEAKING,
+            data=StopSpeakingPayload(reason=reason, session_id=session_id).model_dump(),
+            timestamp=time.time()
+        )
+        
+        await self.broadcast(message, session_id=session_id)
+        logger.info(f"🔇 已通知Unity停止说话 ({reason})")
@@ -1,52 +1,261 @@
 """Web 客户端连接管理服务"""
+import asyncio
 from fastapi import WebSocket
-from typing import Set
-from app.schemas.web_protocol import WebServerMessage
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from app.schemas.web_protocol import WebServerMessage, WebServerMessageType
+from app.schemas.audio_frame_protocol import AUDIO_FORMAT_QUERY_PARAM, AUDIO_FORMAT_BINARY
+from app.schemas.message_codec import encode_web_message
+from app.infrastructure.managers.connection_writer import ConnectionWriter, OutgoingMessage, SendPolicy
+from app.utils.text_coalescer import TextFlushWindow
+from app.core.config import settings
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 文本增量合并窗口的连接参数：/ws/web?text_flush_ms=30&text_flush_chars=16
+TEXT_FLUSH_MS_QUERY_PARAM = "text_flush_ms"
+TEXT_FLUSH_CHARS_QUERY_PARAM = "text_flush_chars"
+# 连续消息的防抖窗口：/ws/web?debounce_ms=800（0 表示不防抖）
+DEBOUNCE_MS_QUERY_PARAM = "debounce_ms"
+
+# 各消息类型在客户端跟不上时的处理策略
+DEFAULT_SEND_POLICIES: Dict[WebServerMessageType, SendPolicy] = {
+    WebServerMessageType.AI_TEXT_STREAM: SendPolicy.COALESCE,
+    WebServerMessageType.AI_STATUS: SendPolicy.DROP_OLDEST,
+    WebServerMessageType.HEARTBEAT: SendPolicy.DROP_OLDEST,
+    WebServerMessageType.ERROR: SendPolicy.BLOCK,
+    WebServerMessageType.AUDIO_CHUNK: SendPolicy.NEVER_DROP,
+    WebServerMessageType.AUDIO_START: SendPolicy.NEVER_DROP,
+    WebServerMessageType.AUDIO_FRAME: SendPolicy.NEVER_DROP,
+    WebServerMessageType.AUDIO_END: SendPolicy.NEVER_DROP,
+}
+
+
+def merge_text_deltas(older: WebServerMessage, newer: WebServerMessage) -> WebServerMessage:
+    """合并同一回复的两条文本增量（不修改原消息，原消息可能同时排在其他连接的队列里）"""
+    merged_data = older.data.model_copy(update={"text": older.data.text + newer.data.text})
+    return newer.model_copy(update={"data": merged_data})
+
+
+def read_int_param(query_params, name: str, default: int) -> int:
+    """读取非负整数连接参数，缺省或非法时返回 default"""
+    try:
+        return max(0, int(query_params.get(name, default)))
+    except (TypeError, ValueError):
+        logger.warning(f"⚠️ 连接参数 {name} 非法，使用默认值 {default}")
+        return default
+
+
+def parse_text_flush_window(query_params) -> TextFlushWindow:
+    """从连接参数解析文本增量合并窗口，缺省或非法时使用全局配置"""
+    return TextFlushWindow(
+        interval_ms=read_int_param(query_params, TEXT_FLUSH_MS_QUERY_PARAM, settings.WS_TEXT_FLUSH_MS),
+        max_chars=read_int_param(query_params, TEXT_FLUSH_CHARS_QUERY_PARAM, settings.WS_TEXT_FLUSH_CHARS)
+    )
+
 
 class WebConnectionManager:
-    """管理所有 Web 客户端的连接"""
+    """
+    管理所有 Web 客户端的连接
+    
+    每个连接有独立的写任务与有界队列（见 ConnectionWriter），
+    发送方只负责入队，慢客户端不会拖慢其他连接
+    """
     
-    def __init__(self):
+    def __init__(self, send_policies: Optional[Dict[WebServerMessageType, SendPolicy]] = None):
         self.active_connections: Set[WebSocket] = set()
+        self.writers: Dict[WebSocket, ConnectionWriter] = {}
+        self.send_policies = {**DEFAULT_SEND_POLICIES, **(send_policies or {})}
+        self.overflow_disconnects = 0
+        # 协商使用二进制音频帧的连接（其余连接使用 Base64 JSON）
+        self.binary_audio_connections: Set[WebSocket] = set()
+        # 每个连接的文本增量合并窗口
+        self.text_flush_windows: Dict[WebSocket, TextFlushWindow] = {}
+        # 每个连接发来的消息使用的防抖窗口（毫秒）
+        self.debounce_windows: Dict[WebSocket, int] = {}
+        # 会话订阅：session_id → 订阅该会话的连接（及反向索引，便于断开时清理）
+        self.session_subscribers: Dict[str, Set[WebSocket]] = {}
+        self.connection_sessions: Dict[WebSocket, Set[str]] = {}
     
     async def connect(self, websocket: WebSocket):
         """接受新的 Web 客户端连接"""
         await websocket.accept()
         self.active_connections.add(websocket)
-        logger.info(f"✅ Web Client Connected. Total: {len(self.active_connections)}")
+        self.writers[websocket] = ConnectionWriter(
+            websocket,
+            on_overflow=self._on_overflow,
+            coalesce=merge_text_deltas,
+            encode=encode_web_message,
+            max_messages=settings.WS_SEND_QUEUE_MAX_MESSAGES,
+            max_bytes=settings.WS_SEND_QUEUE_MAX_BYTES,
+            block_timeout=settings.WS_SEND_BLOCK_TIMEOUT
+        )
+        if websocket.query_params.get(AUDIO_FORMAT_QUERY_PARAM) == AUDIO_FORMAT_BINARY:
+            self.binary_audio_connections.add(websocket)
+        self.text_flush_windows[websocket] = parse_text_flush_window(websocket.query_params)
+        self.debounce_windows[websocket] = read_int_param(
+            websocket.query_params, DEBOUNCE_MS_QUERY_PARAM, settings.TURN_DEBOUNCE_MS
+        )
+        logger.info(
+            f"✅ Web Client Connected. Total: {len(self.active_connections)} "
+            f"(audio: {'binary' if websocket in self.binary_audio_connections else 'json'})"
+        )
     
     def disconnect(self, websocket: WebSocket):
         """断开 Web 客户端连接"""
+        if websocket not in self.active_connections:
+            return
         self.active_connections.discard(websocket)
+        self.binary_audio_connections.discard(websocket)
+        self.text_flush_windows.pop(websocket, None)
+        self.debounce_windows.pop(websocket, None)
+        writer = self.writers.pop(websocket, None)
+        if writer is not None:
+            writer.close()
+        for session_id in self.connection_sessions.pop(websocket, set()):
+            self._remove_subscriber(session_id, websocket)
         logger.info(f"❌ Web Client Disconnected. Total: {len(self.active_connections)}")
     
-    async def broadcast(self, message: WebServerMessage):
-        """广播消息给所有 Web 客户端"""
-        disconnected = set()
+    async def _on_overflow(self, websocket: WebSocket, reason: str):
+        """客户端跟不上或发送失败：断开连接，读循环随之退出"""
+        if websocket not in self.active_connections:
+            return
+        self.overflow_disconnects += 1
+        self.disconnect(websocket)
+        try:
+            await websocket.close(code=1013, reason=reason)
+        except Exception:
+            pass
+    
+    def _outgoing(self, message: WebServerMessage, data: Optional[str] = None) -> OutgoingMessage:
+        """按消息类型构建待发送项"""
+        policy = self.send_policies.get(message.type, SendPolicy.BLOCK)
+        coalesce_key = None
+        if message.type == WebServerMessageType.AI_TEXT_STREAM:
+            if message.data.is_finish:
+                # 结束标记不与增量合并，也不能丢
+                policy = SendPolicy.BLOCK
+            else:
+                coalesce_key = message.data.message_id
+        return OutgoingMessage(policy=policy, data=data, message=message, coalesce_key=coalesce_key)
+    
+    def text_flush_window(self, websocket: WebSocket) -> TextFlushWindow:
+        """连接的文本增量合并窗口"""
+        return self.text_flush_windows.get(websocket) or TextFlushWindow(
+            interval_ms=settings.WS_TEXT_FLUSH_MS, max_chars=settings.WS_TEXT_FLUSH_CHARS
+        )
+    
+    def debounce_ms(self, websocket: WebSocket) -> int:
+        """连接的消息防抖窗口（毫秒）"""
+        return self.debounce_windows.get(websocket, settings.TURN_DEBOUNCE_MS)
+    
+    def subscribe(self, websocket: WebSocket, session_id: str):
+        """订阅会话：之后该会话的文本与音频事件会发送到此连接"""
+        if websocket not in self.active_connections:
+            return
+        if session_id in self.connection_sessions.setdefault(websocket, set()):
+            return
+        self.connection_sessions[websocket].add(session_id)
+        self.session_subscribers.setdefault(session_id, set()).add(websocket)
+        logger.debug(f"📌 Web 连接订阅会话 {session_id}")
+    
+    def unsubscribe(self, websocket: WebSocket, session_id: str):
+        """取消订阅会话"""
+        sessions = self.connection_sessions.get(websocket)
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self.connection_sessions[websocket]
+        self._remove_subscriber(session_id, websocket)
+    
+    def _remove_subscriber(self, session_id: str, websocket: WebSocket):
+        subscribers = self.session_subscribers.get(session_id)
+        if subscribers is None:
+            return
+        subscribers.discard(websocket)
+        if not subscribers:
+            del self.session_subscribers[session_id]
+    
+    def _targets(self, session_id: Optional[str]) -> Iterable[WebSocket]:
+        """session_id 为 None 时发给所有连接，否则只发给该会话的订阅者"""
+        if session_id is None:
+            return list(self.active_connections)
+        return list(self.session_subscribers.get(session_id, ()))
+    
+    def has_subscribers(self, session_id: str) -> bool:
+        """会话是否有订阅者"""
+        return bool(self.session_subscribers.get(session_id))
+    
+    async def broadcast(self, message: WebServerMessage, session_id: Optional[str] = None):
+        """
+        广播消息（只入队，由各连接的写任务发送）
         
-        for ws in self.active_connections:
-            try:
-                await ws.send_text(message.model_dump_json())
-            except Exception as e:
-                logger.error(f"Failed to send to web client: {e}")
-                disconnected.add(ws)
+        Args:
+            message: 消息
+            session_id: 仅发给订阅该会话的连接；None 表示发给所有 Web 客户端
+        """
+        targets = self._targets(session_id)
+        if not targets:
+            return
         
-        # 清理断开的连接
-        for ws in disconnected:
-            self.disconnect(ws)
+        # 只序列化一次，所有连接共用；并发入队，某个连接阻塞时不影响其他连接
+        json_text = encode_web_message(message)
+        await asyncio.gather(*(
+            self.writers[ws].put(self._outgoing(message, json_text))
+            for ws in targets if ws in self.writers
+        ))
+    
+    async def broadcast_audio(
+        self,
+        frame: bytes,
+        build_json: Callable[[], str],
+        session_id: Optional[str] = None
+    ):
+        """
+        广播音频数据
+        
+        协商了二进制帧的连接直接发送 frame；其余连接回退到 JSON，
+        JSON 消息仅在需要时编码一次（避免无人使用时做 Base64 编码）
+        
+        Args:
+            frame: 二进制音频帧（见 audio_frame_protocol）
+            build_json: 编码 JSON 回退消息的函数（见 message_codec.encode_web_payload）
+            session_id: 仅发给订阅该会话的连接；None 表示发给所有 Web 客户端
+        """
+        json_text = None
+        
+        for ws in self._targets(session_id):
+            writer = self.writers.get(ws)
+            if writer is None:
+                continue
+            if ws in self.binary_audio_connections:
+                await writer.put(OutgoingMessage(policy=SendPolicy.NEVER_DROP, data=frame))
+            else:
+                if json_text is None:
+                    json_text = build_json()
+                await writer.put(OutgoingMessage(policy=SendPolicy.NEVER_DROP, data=json_text))
     
     async def send_to_client(self, websocket: WebSocket, message: WebServerMessage):
-        """发送消息给指定的 Web 客户端"""
-        try:
-            await websocket.send_text(message.model_dump_json())
-        except Exception as e:
-            logger.error(f"Failed to send to web client: {e}")
-            self.disconnect(websocket)
-            raise
+        """发送消息给指定的 Web 客户端（连接已断开时抛出 ConnectionError）"""
+        writer = self.writers.get(websocket)
+        if writer is None:
+            raise ConnectionError("Web client is not connected")
+        await writer.put(self._outgoing(message, encode_web_message(message)))
+    
+    def send_queue_stats(self) -> List[Dict[str, Any]]:
+        """每个连接的发送队列指标"""
+        return [
+            {
+                "client": f"{ws.client.host}:{ws.client.port}" if ws.client else "",
+                "audio_format": "binary" if ws in self.binary_audio_connections else "json",
+                "sessions": sorted(self.connection_sessions.get(ws, ())),
+                "text_flush_ms": self.text_flush_window(ws).interval_ms,
+                "text_flush_chars": self.text_flush_window(ws).max_chars,
+                "debounce_ms": self.debounce_ms(ws),
+                **writer.stats()
+            }
+            for ws, writer in self.writers.items()
+        ]
     
     @property
     def connection_count(self) -> int:
@@ -0,0 +1,122 @@
+"""会话持久化接口
+
+SessionManager 通过 SessionStore 保存会话元数据与消息，重启后按需恢复。
+写入方法只负责入队（write-behind），不阻塞事件循环；读取方法在恢复会话时同步调用。
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 通讯录中消息预览的最大字数
+PREVIEW_CHARS = 40
+
+
+def make_preview(content: str) -> str:
+    """通讯录中显示的消息预览（合并为一行，超出 PREVIEW_CHARS 时截断）"""
+    text = " ".join(content.split())
+    return text if len(text) <= PREVIEW_CHARS else text[:PREVIEW_CHARS] + "…"
+
+
+@dataclass
+class SessionRecord:
+    """会话元数据（不含消息）"""
+    session_id: str
+    character: str
+    language: str = "zh"
+    segmentation_policy: str = "sentence"
+    created_at: float = 0.0    # 时间戳（秒）
+    last_active: float = 0.0
+    ordered_at: float = 0.0    # 最近一次移到通讯录最前面的时间，用于恢复排序
+    message_count: int = 0     # 累计消息数（不含 system prompt），也是下一条消息的序号
+    window_start: int = 0      # 上下文窗口中第一条消息的序号
+    summary: str = ""
+    preview: str = ""          # 最后一条消息的预览
+
+    @property
+    def last_active_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.last_active)
+
+
+@dataclass
+class StoredMessage:
+    """持久化的一条消息"""
+    seq: int
+    role: str
+    content: str
+
+
+class SessionStore:
+    """
+    会话存储基类（也是不持久化的内存实现）
+
+    子类实现具体后端；所有写入方法都应是非阻塞的
+    """
+
+    name = "memory"
+    durable = False  # 数据是否写到了进程外（决定休眠会话能否只保留元数据）
+
+    async def start(self):
+        """启动后台写任务"""
+
+    async def flush(self) -> bool:
+        """立即提交所有待写入的数据，返回是否成功"""
+        return True
+
+    async def close(self):
+        """写出所有待写入的数据并关闭"""
+
+    # ==================== 写入（入队，不阻塞） ====================
+
+    def save_session(self, record: SessionRecord):
+        """新建或覆盖会话元数据"""
+
+    def update_session(self, session_id: str, **fields: Any):
+        """更新会话元数据的部分字段"""
+
+    def append_message(self, session_id: str, seq: int, role: str, content: str, timestamp: float):
+        """追加一条消息（同时更新会话的 message_count、last_active 与 preview）"""
+
+    def delete_session(self, session_id: str):
+        """删除会话及其消息"""
+
+    # ==================== 读取 ====================
+
+    def load_index(self) -> List[SessionRecord]:
+        """所有会话的元数据（按 ordered_at 从旧到新），用于启动时恢复通讯录排序"""
+        return []
+
+    def load_session(self, session_id: str) -> Optional[SessionRecord]:
+        """读取单个会话的元数据"""
+        return None
+
+    def load_messages(self, session_id: str, from_seq: int = 0, limit: Optional[int] = None) -> List[StoredMessage]:
+        """读取会话中序号不小于 from_seq 的消息（按序号排列，最多 limit 条）"""
+        return []
+
+    def load_messages_before(self, session_id: str, before_seq: int, limit: int) -> List[StoredMessage]:
+        """读取会话中序号小于 before_seq 的最后 limit 条消息（按序号排列）"""
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        """存储指标"""
+        return {"backend": self.name}
+
+
+def create_session_store(backend: str, **options: Any) -> SessionStore:
+    """
+    按名称创建会话存储
+
+    Args:
+        backend: sqlite / memory
+        options: 传给具体后端的参数
+    """
+    if backend == "sqlite":
+        from app.infrastructure.persistence.sqlite_session_store import SQLiteSessionStore
+        return SQLiteSessionStore(**options)
+    if backend != "memory":
+        logger.warning(f"⚠️ 未知的会话存储后端 {backend}，会话将只保存在内存中")
+    return SessionStore()
@@ -0,0 +1,305 @@
+"""SQLite 会话存储
+
+- WAL 模式：写入不阻塞读取，恢复会话时可以直接读
+- write-behind：写入方法只把 SQL 追加到内存队列，后台任务按批次（数量或时间窗口）
+  在线程中一次事务提交，事件循环不会被磁盘 IO 阻塞
+- 提交失败的批次单独重试（指数退避），连续失败 max_retries 次后丢弃；
+  重试期间待写入队列超过 max_pending_ops 时丢弃最旧的写入，内存占用有上限
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.logger import get_logger
+from app.infrastructure.persistence.session_store import SessionRecord, SessionStore, StoredMessage, make_preview
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    character TEXT NOT NULL,
+    language TEXT NOT NULL,
+    segmentation_policy TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_active REAL NOT NULL,
+    ordered_at REAL NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    window_start INTEGER NOT NULL DEFAULT 0,
+    summary TEXT NOT NULL DEFAULT '',
+    preview TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+_SESSION_COLUMNS = (
+    "session_id", "character", "language", "segmentation_policy", "created_at",
+    "last_active", "ordered_at", "message_count", "window_start", "summary", "preview"
+)
+_UPDATABLE_COLUMNS = frozenset(_SESSION_COLUMNS) - {"session_id"}
+
+_Operation = Tuple[str, tuple]
+
+# 提交失败后的重试间隔（秒），每次失败翻倍
+_RETRY_BACKOFF_MIN = 1.0
+_RETRY_BACKOFF_MAX = 30.0
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite（WAL）会话存储，写入按批次异步提交"""
+
+    name = "sqlite"
+    durable = True
+
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_retries: int = 5,
+        max_pending_ops: int = 100_000
+    ):
+        """
+        Args:
+            path: 数据库文件路径
+            batch_size: 待写入操作达到该数量时立即提交
+            flush_interval: 待写入操作最多等待多久提交（秒）
+            max_retries: 同一批次连续提交失败多少次后丢弃
+            max_pending_ops: 待写入操作的上限，超出时丢弃最旧的写入
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max(1, max_retries)
+        self.max_pending_ops = max(batch_size, max_pending_ops)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_conn = self._connect(check_same_thread=False)  # 只在写线程中使用（由 _flush_lock 串行化）
+        self._write_conn.executescript(_SCHEMA)
+        # 同步接口的读取可能来自事件循环或 FastAPI 的线程池，用锁串行化
+        self._read_conn = self._connect(check_same_thread=False)
+        self._read_lock = threading.Lock()
+
+        self._ops: List[_Operation] = []
+        self._retry_batch: List[_Operation] = []  # 提交失败、等待重试的批次
+        self._retry_count = 0
+        self._overflow_logged = False
+        self._has_ops = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        # 指标
+        self.committed_ops = 0
+        self.committed_batches = 0
+        self.failed_batches = 0
+        self.dropped_ops = 0
+        self.last_commit_ms = 0.0
+
+        logger.info(f"🗃️ 会话存储: SQLite (WAL) {self.path}")
+
+    def _connect(self, check_same_thread: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL 下仍保证一致性，只在断电时可能丢最后几个事务
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            # 持锁取消，保证写任务不会停在提交中途
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._write_conn.close()
+        self._read_conn.close()
+        logger.info(f"🗃️ 会话存储已关闭 (累计提交 {self.committed_ops} 条写入)")
+
+    async def flush(self) -> bool:
+        """提交所有待写入操作（包括等待重试的批次），返回是否全部成功"""
+        while self._retry_batch or self._ops:
+            if not await self._flush():
+                return False
+        return True
+
+    # ==================== 写入（入队） ====================
+
+    def _enqueue(self, sql: str, params: tuple):
+        if len(self._ops) >= self.max_pending_ops:
+            # 提交持续失败时积压的写入：丢弃最旧的一批，保证内存有上限
+            del self._ops[:self.batch_size]
+            self.dropped_ops += self.batch_size
+            if not self._overflow_logged:
+                self._overflow_logged = True
+                logger.error(f"❌ 会话待写入操作超过 {self.max_pending_ops} 条，开始丢弃最旧的写入")
+        self._ops.append((sql, params))
+        self._has_ops.set()
+        if len(self._ops) >= self.batch_size:
+            self._batch_full.set()
+
+    def save_session(self, record: SessionRecord):
+        placeholders = ", ".join("?" for _ in _SESSION_COLUMNS)
+        self._enqueue(
+            f"INSERT OR REPLACE INTO sessions ({', '.join(_SESSION_COLUMNS)}) VALUES ({placeholders})",
+            tuple(getattr(record, column) for column in _SESSION_COLUMNS)
+        )
+
+    def update_session(self, session_id: str, **fields: Any):
+        unknown = set(fields) - _UPDATABLE_COLUMNS
+        if unknown:
+            raise ValueError(f"未知的会话字段: {unknown}")
+        if not fields:
+            return
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        self._enqueue(
+            f"UPDATE sessions SET {assignments} WHERE session_id = ?",
+            (*fields.values(), session_id)
+        )
+
+    def append_message(self, session_id: str, seq: int, role: str, content: str, timestamp: float):
+        self._enqueue(
+            "INSERT OR REPLACE INTO messages (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+            (session_id, seq, role, content, timestamp)
+        )
+        self._enqueue(
+            "UPDATE sessions SET message_count = MAX(message_count, ?), last_active = ?, preview = ? WHERE session_id = ?",
+            (seq + 1, timestamp, make_preview(content), session_id)
+        )
+
+    def delete_session(self, session_id: str):
+        self._enqueue("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        self._enqueue("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    # ==================== 后台提交 ====================
+
+    async def _run(self):
+        """后台写任务：攒够一批或等满 flush_interval 后提交；失败后按指数退避重试"""
+        backoff = _RETRY_BACKOFF_MIN
+        while True:
+            await self._has_ops.wait()
+            if not self._retry_batch and len(self._ops) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            if await self._flush():
+                backoff = _RETRY_BACKOFF_MIN
+            else:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, _RETRY_BACKOFF_MAX)
+
+    async def _flush(self) -> bool:
+        """
+        提交一批写入：有等待重试的批次时只提交它，否则提交当前所有待写入操作
+
+        失败的批次留待重试（不与之后的写入合并），连续失败 max_retries 次后丢弃
+
+        Returns:
+            bool: 本次提交是否成功
+        """
+        async with self._flush_lock:
+            if self._retry_batch:
+                batch = self._retry_batch
+            else:
+                batch, self._ops = self._ops, []
+            self._has_ops.clear()
+            self._batch_full.clear()
+            if not batch:
+                return True
+
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._commit, batch)
+            except Exception as e:
+                self.failed_batches += 1
+                self._retry_count += 1
+                if self._retry_count >= self.max_retries:
+                    self.dropped_ops += len(batch)
+                    self._retry_batch, self._retry_count = [], 0
+                    logger.error(f"❌ 会话写入连续提交失败 {self.max_retries} 次，丢弃 {len(batch)} 条: {e}")
+                else:
+                    self._retry_batch = batch
+                    if self._retry_count == 1:
+                        logger.error(f"❌ 会话写入提交失败 ({len(batch)} 条)，稍后重试: {e}")
+                    else:
+                        logger.warning(f"⚠️ 会话写入第 {self._retry_count} 次提交失败 ({len(batch)} 条): {e}")
+                if self._retry_batch or self._ops:
+                    self._has_ops.set()
+                return False
+
+            self._retry_batch, self._retry_count = [], 0
+            self._overflow_logged = False
+            if self._ops:
+                self._has_ops.set()  # 刚提交的是重试批次，之后的写入仍在排队
+            self.last_commit_ms = (time.perf_counter() - started) * 1000
+            self.committed_ops += len(batch)
+            self.committed_batches += 1
+            return True
+
+    def _commit(self, batch: List[_Operation]):
+        """在写线程中以一个事务提交整批操作"""
+        with self._write_conn:
+            for sql, params in batch:
+                self._write_conn.execute(sql, params)
+
+    # ==================== 读取 ====================
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchall()
+
+    def load_index(self) -> List[SessionRecord]:
+        rows = self._query(f"SELECT {', '.join(_SESSION_COLUMNS)} FROM sessions ORDER BY ordered_at")
+        return [SessionRecord(*row) for row in rows]
+
+    def load_session(self, session_id: str) -> Optional[SessionRecord]:
+        rows = self._query(
+            f"SELECT {', '.join(_SESSION_COLUMNS)} FROM sessions WHERE session_id = ?",
+            (session_id,)
+        )
+        return SessionRecord(*rows[0]) if rows else None
+
+    def load_messages(self, session_id: str, from_seq: int = 0, limit: Optional[int] = None) -> List[StoredMessage]:
+        rows = self._query(
+            "SELECT seq, role, content FROM messages WHERE session_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+            (session_id, from_seq, -1 if limit is None else limit)
+        )
+        return [StoredMessage(*row) for row in rows]
+
+    def load_messages_before(self, session_id: str, before_seq: int, limit: int) -> List[StoredMessage]:
+        # 主键 (session_id, seq) 倒序扫描，只读取需要的行
+        rows = self._query(
+            "SELECT seq, role, content FROM messages WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+            (session_id, before_seq, limit)
+        )
+        return [StoredMessage(*row) for row in reversed(rows)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "pending_ops": len(self._ops) + len(self._retry_batch),
+            "committed_ops": self.committed_ops,
+            "committed_batches": self.committed_batches,
+            "failed_batches": self.failed_batches,
+            "dropped_ops": self.dropped_ops,
+            "last_commit_ms": round(self.last_commit_ms, 2),
+        }
@@ -3,21 +3,34 @@ import subprocess
 import sys
 import os
 import signal
+from typing import List
 from app.core.config import settings
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
 class TTSServer:
-    def __init__(self):
-        self.process = None
+    def __init__(self, ports: List[int] = None):
+        # 每个端口对应一个 GPT-SoVITS 副本进程
+        self.ports = ports or [settings.TTS_API_PORT]
+        self.processes: List[subprocess.Popen] = []
+
+    @property
+    def base_urls(self) -> List[str]:
+        """所有副本的 HTTP 地址"""
+        return [f"http://{settings.TTS_API_HOST}:{port}" for port in self.ports]
 
     def start(self):
-        """启动 TTS 子进程"""
-        if self.process:
+        """启动 TTS 子进程（每个副本一个）"""
+        if self.processes:
             logger.warning("⚠️ TTS Service is already running!")
             return
 
+        for port in self.ports:
+            self._start_replica(port)
+
+    def _start_replica(self, port: int):
+        """启动单个 TTS 副本进程"""
         try:
             tts_path = str(settings.TTS_ROUTE)
             python_exec = os.path.join(tts_path, "runtime", "python.exe")
@@ -28,36 +41,38 @@ class TTSServer:
                 python_exec, 
                 "api_v2.py",
                 "-a", settings.TTS_API_HOST,
-                "-p", str(settings.TTS_API_PORT),
+                "-p", str(port),
                 "-c", os.path.join("GPT_SoVITS", "configs", "tts_infer.yaml")
             ]
 
-            logger.info(f"🚀 Launching GPT-SoVITS V2...")
+            logger.info(f"🚀 Launching GPT-SoVITS V2 on port {port}...")
             
-            self.process = subprocess.Popen(
+            process = subprocess.Popen(
                 cmd,
                 cwd=tts_path,
                 shell=True,
                 stdout=sys.stdout, 
                 stderr=sys.stderr
             )
-            logger.info(f"✅ TTS Service started with PID: {self.process.pid}")
+            self.processes.append(process)
+            logger.info(f"✅ TTS Service started with PID: {process.pid} (port {port})")
 
         except Exception as e:
-            logger.error(f"❌ Failed to start TTS Service: {e}")
+            logger.error(f"❌ Failed to start TTS Service on port {port}: {e}")
 
     def stop(self):
         """优雅关闭 TTS 子进程"""
-        if self.process:
-            if self.process.poll() is None:
-                logger.info(f"🛑 Stopping TTS Service (PID: {self.process.pid})...")
-                self.process.terminate()
+        for process in self.processes:
+            if process.poll() is None:
+                logger.info(f"🛑 Stopping TTS Service (PID: {process.pid})...")
+                process.terminate()
                 try:
-                    self.process.wait(timeout=5)
+                    process.wait(timeout=5)
                 except subprocess.TimeoutExpired:
-                    self.process.kill()
-            self.process = None
+                    process.kill()
+        if self.processes:
+            self.processes = []
             logger.info("✅ TTS Service stopped.")
 
     def is_running(self) -> bool:
-        return self.process is not None and self.process.poll() is None
+        return any(process.poll() is None for process in self.processes)
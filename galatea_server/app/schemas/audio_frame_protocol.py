@@ -0,0 +1,131 @@
+"""二进制音频帧协议（Web 与 Unity 共用）
+
+连接时通过查询参数 ``?audio=binary`` 协商，协商成功后音频不再以
+Base64 JSON 发送，而是以二进制 WebSocket 帧发送：
+
+    偏移  长度  字段
+    0     2     magic = b"GA"
+    2     1     version
+    3     1     frame_type（AudioFrameType）
+    4     16    session_id（UUID 原始字节，未知时全 0）
+    20    16    message_id（UUID 原始字节，未知时全 0）
+    36    4     sentence_index（uint32）
+    40    4     sample_rate（uint32）
+    44    4     sequence（uint32，流式模式下为帧索引，整句模式为 0）
+    48    ...   音频数据（WAV 或 PCM s16le）
+
+所有整数均为小端序。文本、起止标记等控制消息仍使用 JSON。
+"""
+import struct
+import uuid
+from enum import IntEnum
+from typing import NamedTuple, Optional
+
+AUDIO_FRAME_MAGIC = b"GA"
+AUDIO_FRAME_VERSION = 1
+AUDIO_FRAME_HEADER = struct.Struct("<2sBB16s16sIII")
+AUDIO_FRAME_HEADER_SIZE = AUDIO_FRAME_HEADER.size  # 48
+
+# 连接协商参数
+AUDIO_FORMAT_QUERY_PARAM = "audio"
+AUDIO_FORMAT_BINARY = "binary"
+AUDIO_FORMAT_JSON = "json"
+
+_EMPTY_ID = bytes(16)
+
+
+class AudioFrameType(IntEnum):
+    """二进制音频帧类型"""
+    WAV = 1        # 整句完整 WAV（整句投递模式）
+    PCM = 2        # PCM s16le 音频帧（流式投递模式）
+
+
+class AudioFrameHeader(NamedTuple):
+    """解析后的帧头"""
+    frame_type: AudioFrameType
+    session_id: Optional[str]
+    message_id: Optional[str]
+    sentence_index: int
+    sample_rate: int
+    sequence: int
+
+
+def _id_to_bytes(value: Optional[str]) -> bytes:
+    if not value:
+        return _EMPTY_ID
+    try:
+        return uuid.UUID(value).bytes
+    except ValueError:
+        return _EMPTY_ID
+
+
+def _bytes_to_id(value: bytes) -> Optional[str]:
+    if value == _EMPTY_ID:
+        return None
+    return str(uuid.UUID(bytes=value))
+
+
+def encode_audio_frame(
+    frame_type: AudioFrameType,
+    audio: bytes,
+    sentence_index: int,
+    sample_rate: int,
+    sequence: int = 0,
+    session_id: Optional[str] = None,
+    message_id: Optional[str] = None
+) -> bytes:
+    """
+    编码一个二进制音频帧
+
+    Args:
+        frame_type: 帧类型
+        audio: 音频数据
+        sentence_index: 句子索引
+        sample_rate: 采样率
+        sequence: 帧序号
+        session_id: 会话ID（UUID 字符串）
+        message_id: 消息ID（UUID 字符串）
+
+    Returns:
+        bytes: 帧头 + 音频数据
+    """
+    header = AUDIO_FRAME_HEADER.pack(
+        AUDIO_FRAME_MAGIC,
+        AUDIO_FRAME_VERSION,
+        frame_type,
+        _id_to_bytes(session_id),
+        _id_to_bytes(message_id),
+        sentence_index,
+        sample_rate,
+        sequence
+    )
+    return header + audio
+
+
+def decode_audio_frame(frame: bytes) -> tuple[AudioFrameHeader, memoryview]:
+    """
+    解析二进制音频帧
+
+    Returns:
+        tuple[帧头, 音频数据视图]
+
+    Raises:
+        ValueError: 帧过短或 magic/version 不匹配
+    """
+    if len(frame) < AUDIO_FRAME_HEADER_SIZE:
+        raise ValueError(f"Invalid audio frame: too short ({len(frame)} bytes)")
+
+    magic, version, frame_type, session_id, message_id, sentence_index, sample_rate, sequence = \
+        AUDIO_FRAME_HEADER.unpack_from(frame, 0)
+    if magic != AUDIO_FRAME_MAGIC or version != AUDIO_FRAME_VERSION:
+        raise ValueError("Invalid audio frame: bad magic or version")
+
+    header = AudioFrameHeader(
+        frame_type=AudioFrameType(frame_type),
+        session_id=_bytes_to_id(session_id),
+        message_id=_bytes_to_id(message_id),
+        sentence_index=sentence_index,
+        sample_rate=sample_rate,
+        sequence=sequence
+    )
+    return header, memoryview(frame)[AUDIO_FRAME_HEADER_SIZE:]
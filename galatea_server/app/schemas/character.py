@@ -36,6 +36,12 @@ class MetadataConfig(BaseModel):
     tags: List[str] = Field(default_factory=list, description="标签")
 
 
+class ContextConfig(BaseModel):
+    token_budget: Optional[int] = Field(None, description="上下文 token 预算（含 system prompt），为空则使用全局配置")
+    max_messages: Optional[int] = Field(None, description="上下文最多保留的消息数，为空则使用全局配置")
+    window_mode: Optional[Literal["sliding", "block"]] = Field(None, description="窗口模式，为空则使用全局配置")
+
+
 class CharacterConfig(BaseModel):
     id: str = Field(..., description="角色 ID")
     name: Union[str, Dict[str, str]] = Field(..., description="角色名称（支持字符串或多语言对象）")
@@ -48,6 +54,7 @@ class CharacterConfig(BaseModel):
     expressions: Optional[ExpressionsConfig] = None
     avatar: Optional[AvatarConfig] = None
     metadata: Optional[MetadataConfig] = None
+    context: Optional[ContextConfig] = None
     
     def get_name(self, language: str = "zh") -> str:
         """获取指定语言的角色名称"""
@@ -41,16 +41,19 @@ class Page(BaseModel, Generic[T]):
     pageSize: int = Field(20, description="每页大小")
     pages: int = Field(0, description="总页数")
     items: List[T] = Field(..., description="当前页的数据列表")
+    nextCursor: Optional[str] = Field(None, description="游标分页时下一页的游标，没有更多数据时为 None")
     
     @classmethod
-    def create(cls, items: List[T], total: int, pageNum: int, pageSize: int):
+    def create(cls, items: List[T], total: int, pageNum: int, pageSize: int, nextCursor: Optional[str] = None, **extra):
         import math
         return cls(
             items=items,
             total=total,
             pageNum=pageNum,
             pageSize=pageSize,
-            pages=math.ceil(total / pageSize) if pageSize > 0 else 0
+            pages=math.ceil(total / pageSize) if pageSize > 0 else 0,
+            nextCursor=nextCursor,
+            **extra
         )
 
 
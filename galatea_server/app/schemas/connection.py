@@ -0,0 +1,44 @@
+"""WebSocket 连接相关的 Schema"""
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class ConnectionQueueStats(BaseModel):
+    """单个连接的发送队列指标"""
+    client: str
+    audio_format: str
+    sessions: List[str]
+    depth: int              # 当前排队消息数
+    queued_bytes: int       # 当前排队字节数
+    max_depth: int          # 历史最大排队消息数
+    sent: int
+    dropped: int
+    coalesced: int          # 被合并的文本增量数
+    text_flush_ms: Optional[int] = None     # 文本增量合并窗口（仅 Web 连接）
+    text_flush_chars: Optional[int] = None
+    debounce_ms: Optional[int] = None       # 消息防抖窗口（仅 Web 连接）
+
+
+class TurnStats(BaseModel):
+    """会话轮次调度指标"""
+    policy: str             # 准入策略
+    max_pending: int        # 每个会话等待中的轮次上限
+    debounce_ms: int        # 默认防抖窗口（连接可覆盖）
+    debounce_mode: str      # 防抖方式
+    active: int             # 正在执行的回复数
+    pending: int            # 等待中的轮次数
+    cancelled: int          # 被打断的回复数
+    queued: int             # 排队等待过的消息数
+    merged: int             # 并入下一轮的消息数
+    rejected: int           # 被拒绝的消息数
+    debounced: int          # 在防抖窗口内与前一条合并的消息数
+    restarted: int          # 因防抖取消并重新开始的回复数
+
+
+class ConnectionStatsResponse(BaseModel):
+    """所有连接的发送队列指标"""
+    web: List[ConnectionQueueStats]
+    unity: List[ConnectionQueueStats]
+    web_overflow_disconnects: int    # 因跟不上被断开的 Web 连接数
+    unity_overflow_disconnects: int  # 因跟不上被断开的 Unity 连接数
+    turns: Optional[TurnStats] = None
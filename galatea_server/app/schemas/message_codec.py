@@ -0,0 +1,75 @@
+"""WebSocket 消息编码（Web 与 Unity 共用）
+
+外层消息 ``{"type":...,"data":...,"timestamp":...}`` 的 data 是 Union / dict，
+pydantic 序列化时要逐个尝试 Union 成员，比序列化 Payload 本身慢一倍左右；
+音频路径还要先 model_dump() 成 dict 再校验进外层模型。
+
+这里为每种消息类型预先生成外层前缀，data 直接用 Payload 自身的
+``model_dump_json()`` 编码后拼接，输出与 pydantic 逐字节一致
+（见 benchmarks/bench_message_codec.py 中的校验）。
+
+广播时每条消息只编码一次，所有接收方共用编码结果。
+"""
+import time
+from typing import Optional
+from pydantic import BaseModel
+from app.schemas.web_protocol import WebServerMessage, WebServerMessageType
+from app.schemas.unity_protocol import UnityMessageType
+
+# 消息外层的固定前缀：{"type":"...","data":
+_WEB_PREFIXES = {t: f'{{"type":"{t.value}","data":' for t in WebServerMessageType}
+_UNITY_PREFIXES = {t: f'{{"type":"{t.value}","data":' for t in UnityMessageType}
+
+
+def _encode_timestamp(timestamp: float) -> str:
+    return ',"timestamp":' + repr(float(timestamp)) + "}"
+
+
+def encode_web_message(message: WebServerMessage) -> str:
+    """
+    编码下行 Web 消息
+
+    data 为 Payload 模型时走快速路径，dict（如心跳）回退到 model_dump_json
+    """
+    if not isinstance(message.data, BaseModel):
+        return message.model_dump_json()
+    return _WEB_PREFIXES[message.type] + message.data.model_dump_json() + _encode_timestamp(message.timestamp)
+
+
+def encode_web_payload(
+    message_type: WebServerMessageType,
+    payload: BaseModel,
+    timestamp: Optional[float] = None
+) -> str:
+    """
+    直接由 Payload 编码 Web 消息，不构建外层 WebServerMessage
+
+    Args:
+        message_type: 消息类型
+        payload: 载荷
+        timestamp: 时间戳，默认当前时间
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    return _WEB_PREFIXES[message_type] + payload.model_dump_json() + _encode_timestamp(timestamp)
+
+
+def encode_unity_payload(
+    message_type: UnityMessageType,
+    payload: BaseModel,
+    timestamp: Optional[float] = None
+) -> str:
+    """
+    直接由 Payload 编码 Unity 消息
+
+    等价于 UnityBaseMessage(type=..., data=payload.model_dump(), timestamp=...).model_dump_json()，
+    但省去 dict 转换与再次校验
+
+    Args:
+        message_type: 消息类型
+        payload: 载荷
+        timestamp: 时间戳，默认当前时间
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    return _UNITY_PREFIXES[message_type] + payload.model_dump_json() + _encode_timestamp(timestamp)
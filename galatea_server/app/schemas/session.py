@@ -1,11 +1,13 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 from datetime import datetime
+from app.schemas.common import Page
 
 
 class CreateSessionRequest(BaseModel):
     character_id: str = Field(..., description="角色 ID")
     language: str = Field("zh", description="会话语言 (zh/en)")
+    segmentation_policy: Optional[str] = Field(None, description="分段策略 (sentence/adaptive)，默认取服务端配置")
 
 class CreateSessionResponse(BaseModel):
     session_id: str = Field(..., description="会话 ID")
@@ -36,9 +38,54 @@ class ChatMessage(BaseModel):
     content: str = Field(..., description="消息内容")
 
 
-class GetHistoryResponse(BaseModel):
+class HistoryMessage(ChatMessage):
+    seq: int = Field(..., description="消息序号（从 0 开始）")
+
+
+class GetHistoryResponse(Page[HistoryMessage]):
+    """
+    聊天记录的一页（游标分页，从最新的消息往前翻）
+
+    items 按时间从旧到新；把 nextCursor 作为 cursor 参数请求更早的一页
+    """
+    session_id: str = Field(..., description="会话 ID")
+    history: List[HistoryMessage] = Field(..., description="当前页的消息（与 items 相同，兼容旧客户端）")
+
+
+class ContextWindowInfo(BaseModel):
+    """上下文窗口情况"""
+    messages: int = Field(..., description="窗口内消息数（含 system prompt）")
+    tokens: int = Field(..., description="窗口内估算 token 数")
+    token_budget: int = Field(..., description="token 预算")
+    evicted_messages: int = Field(..., description="累计移出窗口的消息数")
+    prompt_tokens: Optional[int] = Field(None, description="服务端统计的 prompt token 数")
+    cached_tokens: Optional[int] = Field(None, description="命中服务端前缀缓存的 prompt token 数")
+    recalled_messages: Optional[int] = Field(None, description="召回的早期消息数")
+    recalled_tokens: Optional[int] = Field(None, description="召回内容的估算 token 数")
+    recall_ms: Optional[float] = Field(None, description="召回耗时（毫秒）")
+
+
+class GetContextResponse(BaseModel):
     session_id: str = Field(..., description="会话 ID")
-    history: List[ChatMessage] = Field(..., description="聊天记录")
+    current: ContextWindowInfo = Field(..., description="当前窗口")
+    last_request: Optional[ContextWindowInfo] = Field(None, description="最近一次 LLM 请求使用的窗口")
+    window_mode: str = Field(..., description="窗口模式 (sliding/block)")
+    prompt_tokens_total: int = Field(0, description="会话累计 prompt token 数")
+    cached_tokens_total: int = Field(0, description="会话累计缓存命中 token 数")
+
+
+class SessionMemoryResponse(BaseModel):
+    loaded_sessions: int = Field(..., description="已加载到内存的会话数")
+    dormant_sessions: int = Field(..., description="休眠 / 尚未加载的会话数")
+    loaded_bytes: int = Field(..., description="已加载会话的估算内存占用（字节）")
+    snapshot_bytes: int = Field(0, description="休眠会话压缩快照的大小（字节，存储不持久化时）")
+    audio_queues: int = Field(0, description="已创建的音频队列数")
+    hibernated_count: int = Field(0, description="累计休眠次数")
+    restored_count: int = Field(0, description="累计从压缩快照恢复的次数")
+    memory_budget: int = Field(0, description="内存预算（字节，0 表示不限制）")
+    idle_ttl: float = Field(0, description="空闲休眠时间（秒，0 表示不按空闲休眠）")
+    idle_hibernated: int = Field(0, description="累计因空闲休眠的会话数")
+    budget_hibernated: int = Field(0, description="累计因超出内存预算休眠的会话数")
 
 
 # 角色信息 Schema
@@ -1,6 +1,6 @@
 """TTS 模型切换相关的 Schema"""
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class SwitchTTSModelRequest(BaseModel):
@@ -17,3 +17,52 @@ class SwitchTTSModelResponse(BaseModel):
     success: bool
     message: str
 
+
+
+class TTSCacheStatsResponse(BaseModel):
+    """TTS 音频缓存统计"""
+    enabled: bool
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    memory_evictions: int = 0
+    disk_evictions: int = 0
+    memory_entries: int = 0
+    memory_bytes: int = 0
+    memory_budget: int = 0
+    disk_entries: int = 0
+    disk_bytes: int = 0
+    disk_budget: int = 0
+
+
+class TTSReplicaStatus(BaseModel):
+    """单个 TTS 副本状态"""
+    base_url: str
+    character_id: Optional[str] = None
+    gpt_weights_path: Optional[str] = None
+    sovits_weights_path: Optional[str] = None
+    switching: bool
+    in_flight: int
+    healthy: bool
+
+
+class TTSStatusResponse(BaseModel):
+    """TTS 副本池状态"""
+    replicas: List[TTSReplicaStatus]
+    switch_count: int
+    skipped_switches: int
+
+
+class TTSFirstAudioLatency(BaseModel):
+    """单个分段策略的首音频延迟统计（毫秒）"""
+    policy: str
+    samples: int
+    avg_ms: float
+    p50_ms: float
+    p90_ms: float
+    max_ms: float
+
+
+class TTSLatencyResponse(BaseModel):
+    """首音频延迟统计"""
+    first_audio: List[TTSFirstAudioLatency]
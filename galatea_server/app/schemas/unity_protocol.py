@@ -12,12 +12,13 @@ class UnityMessageType(str, Enum):
     SPEAK = "speak"
     IDLE = "idle"
     SWITCH_CHARACTER = "switch_character"  # 🆕 切换角色
+    STOP_SPEAKING = "stop_speaking"  # 打断：停止播放并丢弃已缓冲的音频
     
     # Server → Unity (音频)
-    AUDIO_START = "audio_start"      # 音频流开始（已废弃）
-    AUDIO_CHUNK = "audio_chunk"      # 音频数据块（已废弃）
-    AUDIO_END = "audio_end"          # 音频流结束（已废弃）
-    AUDIO_COMPLETE = "audio_complete"  # 完整音频（推荐）
+    AUDIO_START = "audio_start"      # 音频流开始（流式投递模式）
+    AUDIO_CHUNK = "audio_chunk"      # PCM 音频数据块（流式投递模式）
+    AUDIO_END = "audio_end"          # 音频流结束（流式投递模式）
+    AUDIO_COMPLETE = "audio_complete"  # 完整音频（整句投递模式，默认）
     
     # Unity → Server (反馈)
     ANIMATION_COMPLETE = "animation_complete"
@@ -77,6 +78,12 @@ class SwitchCharacterPayload(BaseModel):
     character_id: str  # 角色ID，如 "yanagi", "SilverWolf"
 
 
+class StopSpeakingPayload(BaseModel):
+    """停止说话载荷"""
+    reason: str = "interrupted"
+    session_id: Optional[str] = None  # 被打断的会话
+
+
 # ==================== Unity → Server 反馈 ====================
 
 class AnimationCompletePayload(BaseModel):
@@ -100,7 +107,9 @@ class AudioStartPayload(BaseModel):
     sentence_index: int              # 句子索引（从0开始）
     text: str                        # 原文本内容
     sample_rate: int = 32000         # 采样率
-    format: str = "wav"              # 音频格式
+    format: str = "wav"              # 音频格式（流式投递时为 "pcm_s16le"）
+    session_id: Optional[str] = None  # 所属会话
+    message_id: Optional[str] = None  # 所属 AI 回复
 
 
 class AudioChunkPayload(BaseModel):
@@ -110,6 +119,8 @@ class AudioChunkPayload(BaseModel):
     audio_data: str                  # Base64编码的音频数据
     sample_rate: int                 # 采样率
     chunk_size: int                  # 原始字节数
+    session_id: Optional[str] = None  # 所属会话
+    message_id: Optional[str] = None  # 所属 AI 回复
 
 
 class AudioEndPayload(BaseModel):
@@ -117,6 +128,9 @@ class AudioEndPayload(BaseModel):
     sentence_index: int              # 句子索引
     total_chunks: int                # 总音频块数
     total_bytes: int                 # 总字节数
+    duration: float = 0.0            # 音频时长（秒）
+    session_id: Optional[str] = None  # 所属会话
+    message_id: Optional[str] = None  # 所属 AI 回复
 
 
 class AudioCompletePayload(BaseModel):
@@ -126,4 +140,6 @@ class AudioCompletePayload(BaseModel):
     audio_data: str                  # Base64编码的完整音频数据（WAV格式）
     sample_rate: int = 32000         # 采样率
     total_bytes: int                 # 音频字节数
+    session_id: Optional[str] = None  # 所属会话
+    message_id: Optional[str] = None  # 所属 AI 回复
 
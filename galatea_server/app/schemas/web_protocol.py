@@ -8,6 +8,9 @@ from pydantic import BaseModel, Field
 class WebClientMessageType(str, Enum):
     """前端发给后端的类型"""
     USER_MESSAGE = "user_message"      # 用户说话
+    STOP = "stop"                      # 打断当前会话正在进行的回复
+    SUBSCRIBE = "subscribe"            # 订阅会话的文本与音频事件（发送 user_message 时自动订阅）
+    UNSUBSCRIBE = "unsubscribe"        # 取消订阅会话
     HEARTBEAT = "heartbeat"            # 心跳保活
 
 # --- 上行载荷定义 (先定义 Payload) ---
@@ -47,6 +50,9 @@ class WebServerMessageType(str, Enum):
     HEARTBEAT = "heartbeat"             # 心跳保活
     ERROR = "error"                   # 报错
     AUDIO_CHUNK = "audio_chunk"       # 音频数据（前端播放）
+    AUDIO_START = "audio_start"       # 流式音频开始（每个句子一次）
+    AUDIO_FRAME = "audio_frame"       # 流式 PCM 音频帧
+    AUDIO_END = "audio_end"           # 流式音频结束（每个句子一次）
 
 # --- 下行载荷定义 (先定义 Payload) ---
 
@@ -56,11 +62,14 @@ class AITextStreamPayload(BaseModel):
     is_finish: bool
     message_id: str
     character_id: Optional[str] = None
+    session_id: Optional[str] = None
+    truncated: bool = False  # 回复被打断（仅在 is_finish 时有意义）
 
 class AIStatusPayload(BaseModel):
     """AI 状态载荷"""
-    status: str  # "thinking" | "idle" | "listening"
+    status: str  # "thinking" | "idle" | "listening" | "queued"
     message: str = ""
+    queue_position: Optional[int] = None  # queued 时前面还有几轮
 
 class ErrorPayload(BaseModel):
     """错误信息载荷"""
@@ -74,6 +83,36 @@ class AudioChunkPayload(BaseModel):
     audio_data: str                  # Base64 编码的 WAV 数据
     sample_rate: int = 32000         # 采样率
     duration: float                  # 音频时长（秒）
+    session_id: Optional[str] = None  # 所属会话（客户端据此丢弃过期音频）
+    message_id: Optional[str] = None  # 所属 AI 回复
+
+class AudioStartPayload(BaseModel):
+    """流式音频开始载荷"""
+    sentence_index: int              # 句子索引
+    text: str                        # 原文本内容
+    sample_rate: int = 32000         # 采样率
+    channels: int = 1                # 声道数
+    bits_per_sample: int = 16        # 位深度
+    format: str = "pcm_s16le"        # 帧数据格式
+    session_id: Optional[str] = None  # 所属会话（客户端据此丢弃过期音频）
+    message_id: Optional[str] = None  # 所属 AI 回复
+
+class AudioFramePayload(BaseModel):
+    """流式 PCM 音频帧载荷"""
+    sentence_index: int              # 句子索引
+    chunk_index: int                 # 帧索引（从0开始）
+    audio_data: str                  # Base64 编码的 PCM 数据
+    session_id: Optional[str] = None  # 所属会话（客户端据此丢弃过期音频）
+    message_id: Optional[str] = None  # 所属 AI 回复
+
+class AudioEndPayload(BaseModel):
+    """流式音频结束载荷"""
+    sentence_index: int              # 句子索引
+    total_chunks: int                # 总帧数
+    total_bytes: int                 # PCM 总字节数
+    duration: float                  # 音频时长（秒）
+    session_id: Optional[str] = None  # 所属会话（客户端据此丢弃过期音频）
+    message_id: Optional[str] = None  # 所属 AI 回复
 
 # --- 下行消息定义 (后定义 Message) ---
 
@@ -83,7 +122,10 @@ class WebServerMessage(BaseModel):
     
     # ✨ 改造点：强类型 Union
     # 这里的 data 必须是这几种 Payload 之一
-    data: Union[AIStatusPayload, AITextStreamPayload, ErrorPayload, AudioChunkPayload, Dict[str, Any]] = Field(
+    data: Union[
+        AIStatusPayload, AITextStreamPayload, ErrorPayload, AudioChunkPayload,
+        AudioStartPayload, AudioFramePayload, AudioEndPayload, Dict[str, Any]
+    ] = Field(
         ..., 
         description="Payload 数据"
     )
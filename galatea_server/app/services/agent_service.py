@@ -1,55 +1,86 @@
 
 from app.schemas.web_protocol import *
-from app.infrastructure.managers.session_manager import SessionManager
-from app.services.llm_service import llm_service
+from app.infrastructure.managers.session_manager import ChatSession, SessionManager
+from app.services.llm_service import llm_service, LLMUsage
 from app.core.logger import get_logger
 from app.exceptions.base import InvalidDataException
 from app.utils.text_buffer import TextBuffer
+from app.utils.text_coalescer import TextDeltaCoalescer, TextFlushWindow, iterate_with_deadline
 from app.exceptions.session import SessionNotFoundException
 from app.exceptions.llm import LLMException
+from typing import Optional
 import time
 import uuid
 import asyncio
-from app.core.container import tts_service
+from contextlib import aclosing
+from app.core.container import tts_service, history_summarizer, turn_registry
 
 logger = get_logger(__name__)
 
+# 被打断的回复保存到历史时追加的标记，让模型知道上一轮没有说完
+TRUNCATION_MARKER = "……[回复被打断]"
 
-def create_status_message(status: str, message: str = "") -> WebServerMessage:
+
+def create_status_message(status: str, message: str = "", queue_position: Optional[int] = None) -> WebServerMessage:
     """创建 AI 状态消息"""
     return WebServerMessage(
         type=WebServerMessageType.AI_STATUS,
-        data=AIStatusPayload(status=status, message=message).model_dump(),
+        data=AIStatusPayload(status=status, message=message, queue_position=queue_position),
         timestamp=time.time()
     )
 
 
-def create_text_stream_message(text: str, is_finish: bool, message_id: str) -> WebServerMessage:
+def create_text_stream_message(
+    text: str,
+    is_finish: bool,
+    message_id: str,
+    truncated: bool = False,
+    session_id: Optional[str] = None
+) -> WebServerMessage:
     """创建文本流消息"""
     return WebServerMessage(
         type=WebServerMessageType.AI_TEXT_STREAM,
         data=AITextStreamPayload(
             text=text,
             is_finish=is_finish,
-            message_id=message_id
+            message_id=message_id,
+            session_id=session_id,
+            truncated=truncated
         ),
         timestamp=time.time()
     )
 
 
+def _record_usage(session: ChatSession, usage: LLMUsage):
+    """记录本轮 prompt 用量与前缀缓存命中"""
+    session.record_usage(usage.prompt_tokens, usage.cached_tokens)
+    logger.info(
+        f"💾 prompt {usage.prompt_tokens} tokens，缓存命中 {usage.cached_tokens} "
+        f"(会话累计命中率 {session.cached_tokens_total / max(session.prompt_tokens_total, 1):.0%})"
+    )
+
+
 async def handle_user_message(
     session_id: str, 
     session_manager: SessionManager,
-    msg: WebClientMessage
+    msg: WebClientMessage,
+    text_window: Optional[TextFlushWindow] = None
 ):
     """
     处理用户聊天消息（生成器函数，用于流式响应）
     
+    LLM 的文本增量按 text_window 合并后再发送（第一个增量立即发送），
+    TTS 的断句仍按原始增量进行，不受合并窗口影响
+    
+    所在任务被取消或生成器被提前关闭（打断）时，会停止读取 LLM 流、
+    取消本轮 TTS，并把已生成的部分回复加上截断标记保存到历史
+    
     Raises:
         InvalidDataException: 当消息内容为空时
         SessionNotFoundException: 当会话不存在时
         LLMException: 当 LLM 服务出错时
     """
+    started_at = time.monotonic()  # 首音频延迟的起点
     user_text = msg.data.content
     enable_audio = getattr(msg.data, 'enable_audio', True)  # 默认启用音频
     
@@ -60,51 +91,90 @@ async def handle_user_message(
     logger.info(f"📩 用户消息: {user_text[:50]}... (音频: {'开启' if enable_audio else '关闭'})")
     
     # 获取并验证会话
-    session = session_manager.get_session(session_id)
+    session = await session_manager.load_session(session_id)
     if session is None:
         raise SessionNotFoundException(message=f"会话 {session_id} 不存在或已过期")
     
     session_manager.move_to_front(session_id)
     
+    # 记录用户消息（在第一次 yield 之前，本轮无论在哪里被打断用户消息都已保存）
+    session.add_message("user", user_text)
+    
     # 通知前端 AI 开始思考
     yield create_status_message("thinking", "思考中...")
     
-    # 记录用户消息
-    session.add_message("user", user_text)
-    
     # 初始化流式处理所需的状态
     message_id = str(uuid.uuid4())
     full_response = ""
-    text_buffer = TextBuffer()
+    text_buffer = TextBuffer(language=session.language, policy=session.segmentation_policy)
     sentence_index = 0
+    coalescer = TextDeltaCoalescer(text_window or TextFlushWindow())
     tts_queue = asyncio.Queue()
     tts_task = None
+    reply_saved = False
     
     # 只在启用音频时启动 TTS 任务
     if enable_audio:
         logger.info("🔊 音频已启用，启动 TTS 处理任务")
         tts_task = asyncio.create_task(
-            tts_service.process_queue(tts_queue, session.character)
+            tts_service.process_queue(
+                tts_queue, session.character,
+                session_id=session_id, message_id=message_id,
+                segmentation_policy=session.segmentation_policy,
+                started_at=started_at
+            )
         )
     else:
         logger.info("🔇 音频已禁用，跳过 TTS 生成")
     
     try:
-        # 流式处理 LLM 响应
-        async for text_chunk in llm_service.chat_stream(session.get_messages()):
-            full_response += text_chunk
-            
-            # 实时发送文本片段到前端
-            yield create_text_stream_message(text_chunk, is_finish=False, message_id=message_id)
-            
-            # 只在启用音频时检测句子并加入 TTS 队列
-            if enable_audio:
-                completed_sentences = text_buffer.add_chunk(text_chunk)
-                for sentence in completed_sentences:
-                    logger.info(f"🎤 检测到完整句子 [{sentence_index}]: {sentence[:30]}...")
-                    await tts_queue.put({"index": sentence_index, "text": sentence})
-                    sentence_index += 1
+        messages = session.build_request(user_text)
+        context = session.last_request_context
+        logger.info(
+            f"📐 上下文窗口: {context.messages} 条 / ~{context.tokens} tokens "
+            f"(预算 {session.token_budget}, 累计移出 {session.evicted_messages} 条)"
+        )
+        if context.recall_ms is not None:
+            logger.info(
+                f"🔎 召回早期对话 {context.recalled_messages} 条 / ~{context.recalled_tokens} tokens "
+                f"(耗时 {context.recall_ms:.2f}ms)"
+            )
         
+        # 流式处理 LLM 响应（aclosing 保证被打断时立即关闭 LLM 的 HTTP 流）
+        # 等待下一个增量时，积攒的文本到达发送窗口也会先发出去（text_chunk 为 None）
+        async with aclosing(llm_service.chat_stream(
+            messages, on_usage=lambda usage: _record_usage(session, usage)
+        )) as llm_stream, \
+                aclosing(iterate_with_deadline(llm_stream, coalescer.time_left)) as chunks:
+            async for text_chunk in chunks:
+                if text_chunk is None:
+                    yield create_text_stream_message(
+                        coalescer.pop(), is_finish=False, message_id=message_id, session_id=session_id
+                    )
+                    continue
+                
+                full_response += text_chunk
+                
+                # 只在启用音频时检测句子并加入 TTS 队列
+                if enable_audio:
+                    completed_sentences = text_buffer.add_chunk(text_chunk)
+                    for sentence in completed_sentences:
+                        logger.info(f"🎤 检测到完整句子 [{sentence_index}]: {sentence[:30]}...")
+                        await tts_queue.put({"index": sentence_index, "text": sentence})
+                        sentence_index += 1
+                
+                # 发送文本片段到前端（按窗口合并）
+                flushed = coalescer.add(text_chunk)
+                if flushed:
+                    yield create_text_stream_message(
+                        flushed, is_finish=False, message_id=message_id, session_id=session_id
+                    )
+        
+        tail = coalescer.pop()
+        if tail:
+            yield create_text_stream_message(tail, is_finish=False, message_id=message_id, session_id=session_id)
+        
+        logger.debug(f"📦 文本增量 {coalescer.received_count} 个，合并为 {coalescer.flushed_count} 帧")
         logger.info(f"✅ LLM 回复完成: {full_response[:50]}...")
         
         # 只在启用音频时处理剩余文本
@@ -122,10 +192,29 @@ async def handle_user_message(
         
         # 保存 AI 回复到会话历史
         session.add_message("assistant", full_response)
+        reply_saved = True
+        # 移出窗口的历史在会话空闲后由后台合并进摘要
+        history_summarizer.schedule(session)
         
         # 通知前端流式响应结束
-        yield create_text_stream_message("", is_finish=True, message_id=message_id)
+        yield create_text_stream_message("", is_finish=True, message_id=message_id, session_id=session_id)
         yield create_status_message("idle")
+        
+        # 等待本轮语音发送完毕，期间仍可被打断
+        if tts_task:
+            await asyncio.wait({tts_task})
+    
+    except (asyncio.CancelledError, GeneratorExit):
+        # 被打断（新消息 / 客户端 stop / 断开连接）
+        logger.info(f"⏹️ 回复被打断 (会话: {session_id}, 已生成 {len(full_response)} 字)")
+        await tts_service.cancel_turn(tts_task, tts_queue, session_id=session_id)
+        # 防抖重新开始且还没有输出时不保存空回复，历史中的用户消息与下一轮的消息相连
+        # （取消可能落在 LLM 请求中，也可能落在调用方发送状态消息时，后者以 GeneratorExit 关闭生成器）
+        restarted = not full_response and turn_registry.is_restarting(session_id)
+        if not reply_saved and not restarted:
+            session.add_message("assistant", full_response + TRUNCATION_MARKER)
+            history_summarizer.schedule(session)
+        raise
     
     except Exception as e:
         logger.error(f"❌ LLM 处理错误: {e}", exc_info=True)
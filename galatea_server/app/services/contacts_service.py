@@ -0,0 +1,124 @@
+"""
+通讯录快照服务
+按语言缓存预先序列化好的通讯录响应，只在通讯录版本变化时重新生成
+"""
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from app.infrastructure.managers.session_manager import SessionManager
+from app.infrastructure.managers.character_registry import CharacterRegistry
+from app.schemas.session import SessionInfo, CharacterContact, ContactsResponse
+from app.schemas.common import UnifiedResponse
+from app.utils.path_utils import resolve_static_url
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class RenderedContacts:
+    """某个语言的通讯录快照"""
+    version: int  # 生成时的通讯录版本
+    etag: str
+    body: bytes   # 序列化后的 UnifiedResponse[ContactsResponse]
+
+
+class ContactsSnapshot:
+    """
+    通讯录快照
+
+    - SessionManager.contacts_version 未变时直接返回上次的快照（ETag 也不变）
+    - 版本变化时重新组装：SessionInfo 按会话缓存，只有 session_revisions 变化的会话重新构建；
+      角色名称与头像 URL 按（角色, 语言）缓存
+    - ETag 带进程启动时生成的随机前缀，重启后旧的 ETag 不会误命中
+    """
+
+    def __init__(self, session_manager: SessionManager, character_registry: CharacterRegistry):
+        self.session_manager = session_manager
+        self.character_registry = character_registry
+        self._epoch = uuid.uuid4().hex[:8]
+        self._rendered: Dict[str, RenderedContacts] = {}
+        self._session_infos: Dict[str, Tuple[int, SessionInfo]] = {}
+        self._characters: Dict[Tuple[str, str], Optional[Tuple[str, str]]] = {}
+
+        # 指标
+        self.render_count = 0
+        self.hit_count = 0
+
+    def get(self, language: str = "zh") -> RenderedContacts:
+        """
+        获取通讯录快照
+
+        Args:
+            language: 语言代码（zh/en），决定角色名称的语言
+        """
+        version = self.session_manager.contacts_version
+        rendered = self._rendered.get(language)
+        if rendered is not None and rendered.version == version:
+            self.hit_count += 1
+            return rendered
+
+        rendered = self._render(language, version)
+        self._rendered[language] = rendered
+        return rendered
+
+    def _render(self, language: str, version: int) -> RenderedContacts:
+        contacts = []
+        session_infos: Dict[str, Tuple[int, SessionInfo]] = {}
+        rebuilt = 0
+
+        for character_id in self.session_manager.character_order:
+            character = self._character(character_id, language)
+            if character is None:
+                continue
+
+            sessions = []
+            for session_id in self.session_manager.character_sessions.get(character_id, ()):
+                revision = self.session_manager.session_revisions.get(session_id, 0)
+                cached = self._session_infos.get(session_id)
+                if cached is None or cached[0] != revision:
+                    record = self.session_manager.describe_session(session_id)
+                    if record is None:
+                        continue
+                    cached = (revision, SessionInfo(
+                        session_id=session_id,
+                        message_count=record.message_count,  # 不含 system prompt
+                        preview=record.preview
+                    ))
+                    rebuilt += 1
+                session_infos[session_id] = cached
+                sessions.append(cached[1])
+
+            if sessions:
+                character_name, avatar_url = character
+                contacts.append(CharacterContact(
+                    character_id=character_id,
+                    character_name=character_name,
+                    avatar_url=avatar_url,
+                    sessions=sessions
+                ))
+
+        self._session_infos = session_infos  # 顺带丢弃已删除会话的缓存
+        self.render_count += 1
+        body = UnifiedResponse.success(
+            message="获取通讯录成功",
+            data=ContactsResponse(contacts=contacts)
+        ).model_dump_json().encode("utf-8")
+        logger.debug(
+            f"📇 通讯录快照 v{version} (语言: {language}): {len(contacts)} 个角色, "
+            f"{len(session_infos)} 个会话, 重建 {rebuilt} 个"
+        )
+        return RenderedContacts(version=version, etag=f'"{self._epoch}-{version}"', body=body)
+
+    def _character(self, character_id: str, language: str) -> Optional[Tuple[str, str]]:
+        """角色在通讯录中的名称与头像 URL（角色不存在时为 None）"""
+        key = (character_id, language)
+        if key not in self._characters:
+            gala_info = self.character_registry.get_character(character_id)
+            if not gala_info:
+                logger.warning(f"⚠️ 角色 {character_id} 不存在于注册表中")
+                self._characters[key] = None
+            else:
+                avatar_path = gala_info.avatar.image if gala_info.avatar else ""
+                self._characters[key] = (gala_info.get_name(language), resolve_static_url(avatar_path) or "")
+        return self._characters[key]
@@ -4,12 +4,41 @@ LLM 服务
 """
 from openai import AsyncOpenAI
 from app.core.config import settings
-from typing import AsyncGenerator, List, Dict
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Callable, List, Dict, Optional
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+@dataclass
+class LLMUsage:
+    """一次请求的 token 用量"""
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int  # 命中服务端前缀缓存的 prompt token 数
+
+
+def parse_usage(usage: Any) -> LLMUsage:
+    """
+    解析 usage，兼容不同服务商的缓存命中字段
+    
+    - OpenAI: usage.prompt_tokens_details.cached_tokens
+    - DeepSeek: usage.prompt_cache_hit_tokens
+    """
+    cached = 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    if details is not None and getattr(details, "cached_tokens", None):
+        cached = details.cached_tokens
+    elif getattr(usage, "prompt_cache_hit_tokens", None):
+        cached = usage.prompt_cache_hit_tokens
+    return LLMUsage(
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        cached_tokens=cached
+    )
+
+
 class LLMService:
     """
     LLM API 调用服务（无状态）
@@ -31,7 +60,8 @@ class LLMService:
     async def chat_stream(
         self, 
         messages: List[Dict[str, str]],
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        on_usage: Optional[Callable[[LLMUsage], None]] = None
     ) -> AsyncGenerator[str, None]:
         """
         流式对话（无状态）
@@ -39,6 +69,7 @@ class LLMService:
         Args:
             messages: 完整的消息历史（包括 system prompt）
             temperature: 温度参数（0.7 适合角色扮演）
+            on_usage: 收到 token 用量（流的最后一个 chunk）时的回调
             
         Yields:
             LLM 生成的文本片段
@@ -51,16 +82,22 @@ class LLMService:
                 model=self.model,
                 messages=messages,
                 stream=True,
-                temperature=temperature
+                temperature=temperature,
+                **({"stream_options": {"include_usage": True}} if settings.LLM_STREAM_USAGE else {})
             )
 
             logger.debug("🧠 LLM 连接建立，开始接收数据...")
 
-            # 流式返回
-            async for chunk in response:
-                if chunk.choices and chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
-                    yield content
+            # 流式返回（提前退出时关闭 HTTP 流，服务端随即停止生成）
+            try:
+                async for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        content = chunk.choices[0].delta.content
+                        yield content
+                    if getattr(chunk, "usage", None) and on_usage is not None:
+                        on_usage(parse_usage(chunk.usage))
+            finally:
+                await response.close()
 
             logger.debug("✅ LLM 响应完成")
 
@@ -68,6 +105,36 @@ class LLMService:
             logger.error(f"❌ LLM 调用错误: {e}", exc_info=True)
             yield f"[系统错误: {str(e)}]"
 
+    
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.3,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        非流式对话（用于摘要等后台任务）
+        
+        Args:
+            messages: 消息列表
+            temperature: 温度参数
+            max_tokens: 回复的最大 token 数
+            
+        Returns:
+            回复文本
+            
+        Raises:
+            调用失败时直接抛出异常（不像 chat_stream 那样把错误当作回复返回）
+        """
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=False,
+            temperature=temperature,
+            **({"max_tokens": max_tokens} if max_tokens else {})
+        )
+        return response.choices[0].message.content or ""
+
 
 # 单例导出
 llm_service = LLMService()
\ No newline at end of file
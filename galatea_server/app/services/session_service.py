@@ -1,17 +1,30 @@
 from app.infrastructure.managers.session_manager import SessionManager
+from app.infrastructure.managers.session_reaper import SessionReaper
+from app.services.contacts_service import ContactsSnapshot
 from app.infrastructure.managers.character_registry import CharacterRegistry
 from app.infrastructure.managers.unity_connection import UnityConnectionManager
+from app.infrastructure.managers.turn_registry import TurnRegistry
+from app.services.summary_service import HistorySummarizer
 from app.schemas.session import *
 from app.schemas.common import UnifiedResponse
 from app.core.logger import get_logger
 from app.utils.path_utils import resolve_static_url
 from app.schemas.tts import SwitchTTSModelRequest
 from app.services.tts_model_service import switch_tts_model_service
+from app.core.config import settings
+from fastapi import Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Optional
+import json
+import math
 import uuid
 import asyncio
 
 logger = get_logger(__name__)
 
+# 保存后台任务的引用，避免未完成的任务被垃圾回收
+_background_tasks = set()
+
 
 async def _switch_tts_model_in_background(request: SwitchTTSModelRequest, character_registry: CharacterRegistry):
     """
@@ -53,7 +66,8 @@ async def create_session_service(
         session_manager.create_session(
             session_id=session_id, 
             character_id=character_id,
-            language=request.language
+            language=request.language,
+            segmentation_policy=request.segmentation_policy
         )
         created = True
 
@@ -62,7 +76,10 @@ async def create_session_service(
         tts_switch_request = SwitchTTSModelRequest(character_id=character_id)
         
         # 使用 asyncio.create_task 在后台执行，不等待结果
-        asyncio.create_task(_switch_tts_model_in_background(tts_switch_request, character_registry))
+        # 权重已加载时副本池会直接跳过；同一组权重的并发切换会合并为一次
+        task = asyncio.create_task(_switch_tts_model_in_background(tts_switch_request, character_registry))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
 
         # 注意：不在这里切换角色，而是在启动 Unity 时传递角色 ID
         # 避免 Unity 未启动时消息丢失
@@ -94,9 +111,21 @@ async def create_session_service(
         logger.error(f"❌ 创建会话失败: {e}", exc_info=True)
         return UnifiedResponse(code=500, message=f"创建会话失败: {str(e)}", data=None)
     
-def delete_session_service(session_id: str, session_manager: SessionManager) -> UnifiedResponse[bool]:
-    """删除会话服务实例"""
+async def delete_session_service(
+    session_id: str,
+    session_manager: SessionManager,
+    turn_registry: TurnRegistry,
+    history_summarizer: HistorySummarizer
+) -> UnifiedResponse[bool]:
+    """
+    删除会话服务实例
+
+    先停止会话进行中和等待中的回复、取消待执行的摘要，
+    避免它们在会话删除后再写回消息或摘要
+    """
     try:
+        await turn_registry.cancel(session_id, reason="delete", drop_pending=True)
+        history_summarizer.cancel(session_id)
         session_manager.remove_session(session_id)
         logger.info(f"✅ 删除会话成功: {session_id}")
         return UnifiedResponse.success(message="删除会话成功", data=True)
@@ -107,10 +136,10 @@ def delete_session_service(session_id: str, session_manager: SessionManager) ->
 
 
 def get_contacts_service(
-    session_manager: SessionManager,
-    character_registry: CharacterRegistry,
-    language: str = "zh"
-) -> UnifiedResponse[ContactsResponse]:
+    contacts_snapshot: ContactsSnapshot,
+    language: str = "zh",
+    if_none_match: Optional[str] = None
+) -> Response:
     """
     获取通讯录（按角色分组的会话列表）
     
@@ -118,85 +147,141 @@ def get_contacts_service(
     - 角色按最近交互排序
     - 每个角色下的会话也按最近交互排序
     
+    响应带 ETag；客户端的 If-None-Match 与当前版本一致时返回 304，不带响应体
+    
     Args:
         language: 语言代码（zh/en），用于返回对应语言的角色名称
+        if_none_match: 请求头 If-None-Match
     """
     try:
-        # 获取按角色分组的会话
-        contacts_dict = session_manager.get_contacts_grouped_by_character()
-        
-        contacts = []
-        
-        # 按角色顺序构建响应
-        for character_id, sessions in contacts_dict.items():
-            # 获取角色信息
-            gala_info = character_registry.get_character(character_id)
-            if not gala_info:
-                logger.warning(f"⚠️ 角色 {character_id} 不存在于注册表中")
-                continue
-            
-            # 解析头像 URL
-            avatar_path = gala_info.avatar.image if gala_info.avatar else ""
-            avatar_url = resolve_static_url(avatar_path)
-            
-            # 获取对应语言的角色名称
-            character_name = gala_info.get_name(language)
-            
-            # 构建会话信息列表
-            session_infos = []
-            for session in sessions:
-                session_infos.append(SessionInfo(
-                    session_id=session.session_id,
-                    last_active=session.last_active.isoformat(),
-                    message_count=len(session.history) - 1  # 减去 system prompt
-                ))
-            
-            # 添加角色联系人
-            contacts.append(CharacterContact(
-                character_id=character_id,
-                character_name=character_name,
-                avatar_url=avatar_url or "",
-                sessions=session_infos
-            ))
-        
-        response_data = ContactsResponse(contacts=contacts)
-        logger.info(f"✅ 获取通讯录成功，共 {len(contacts)} 个角色 (语言: {language})")
-        
-        return UnifiedResponse.success(message="获取通讯录成功", data=response_data)
-    
+        rendered = contacts_snapshot.get(language)
     except Exception as e:
         logger.error(f"❌ 获取通讯录失败: {e}", exc_info=True)
-        return UnifiedResponse(code=500, message=f"获取通讯录失败: {str(e)}", data=None)
+        return JSONResponse(
+            UnifiedResponse(code=500, message=f"获取通讯录失败: {str(e)}", data=None).model_dump()
+        )
+    
+    headers = {"ETag": rendered.etag, "Cache-Control": "no-cache"}
+    if if_none_match and _etag_matches(if_none_match, rendered.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=rendered.body, media_type="application/json", headers=headers)
+
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 是否包含 etag（支持多个值、弱校验前缀与 *）"""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
 
-def get_history_service(
+
+async def get_history_service(
     session_id: str,
-    session_manager: SessionManager
+    session_manager: SessionManager,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
 ) -> UnifiedResponse[GetHistoryResponse]:
-    """获取会话历史记录"""
+    """
+    获取会话聊天记录的一页（游标分页，从最新的消息往前翻）
+    
+    读取的是完整记录而不是 LLM 上下文窗口；持久化存储下不会为此加载会话
+    
+    Args:
+        cursor: 上一页返回的 nextCursor，None 表示最新的一页
+        limit: 每页消息数，None 时使用配置的默认值
+    """
     try:
-        if session_id not in session_manager.sessions:
-            return UnifiedResponse(code=404, message=f"会话 {session_id} 不存在", data=None)
+        before = None
+        if cursor is not None:
+            if not cursor.isdigit():
+                return UnifiedResponse(code=400, message=f"无效的游标: {cursor}", data=None)
+            before = int(cursor)
+        limit = max(1, min(limit or settings.HISTORY_PAGE_SIZE, settings.HISTORY_PAGE_MAX))
         
-        session = session_manager.sessions[session_id]
-        history = session.get_messages()
-        
-        # 转换格式
-        chat_messages = [
-            ChatMessage(role=msg["role"], content=msg["content"]) 
-            for msg in history 
-            if msg["role"] in {"user", "assistant"}
-        ]
+        page = await session_manager.get_transcript_page(session_id, before=before, limit=limit)
+        if page is None:
+            return UnifiedResponse(code=404, message=f"会话 {session_id} 不存在", data=None)
+        messages, total = page
         
+        items = [HistoryMessage(seq=m.seq, role=m.role, content=m.content) for m in messages]
+        end = messages[-1].seq + 1 if messages else min(total, before if before is not None else total)
         return UnifiedResponse.success(
             message="获取历史记录成功",
-            data=GetHistoryResponse(session_id=session_id, history=chat_messages)
+            data=GetHistoryResponse.create(
+                items=items,
+                total=total,
+                pageNum=math.ceil((total - end) / limit) + 1,
+                pageSize=limit,
+                nextCursor=str(messages[0].seq) if messages and messages[0].seq > 0 else None,
+                session_id=session_id,
+                history=items
+            )
         )
     except Exception as e:
         logger.error(f"❌ 获取历史记录失败: {e}", exc_info=True)
         return UnifiedResponse(code=500, message=f"获取历史记录失败: {str(e)}", data=None)
 
 
+def export_history_service(
+    session_id: str,
+    session_manager: SessionManager
+) -> Response:
+    """
+    以 NDJSON 流导出会话的完整聊天记录（每行一条消息：seq / role / content）
+    
+    按批次从存储读取并逐批发送，内存占用与记录总长度无关
+    """
+    if session_manager.describe_session(session_id) is None:
+        return JSONResponse(
+            UnifiedResponse(code=404, message=f"会话 {session_id} 不存在", data=None).model_dump()
+        )
+    
+    async def lines():
+        async for batch in session_manager.iter_transcript(session_id):
+            yield "".join(
+                json.dumps({"seq": m.seq, "role": m.role, "content": m.content}, ensure_ascii=False) + "\n"
+                for m in batch
+            ).encode("utf-8")
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{session_id}.ndjson"'}
+    )
+
+
+async def get_context_service(
+    session_id: str,
+    session_manager: SessionManager
+) -> UnifiedResponse[GetContextResponse]:
+    """获取会话的上下文窗口情况"""
+    session = await session_manager.load_session(session_id)
+    if session is None:
+        return UnifiedResponse(code=404, message=f"会话 {session_id} 不存在", data=None)
+    
+    last_request = session.last_request_context
+    return UnifiedResponse.success(
+        message="获取上下文窗口成功",
+        data=GetContextResponse(
+            session_id=session_id,
+            current=ContextWindowInfo(**session.context_report().to_dict()),
+            last_request=ContextWindowInfo(**last_request.to_dict()) if last_request else None,
+            window_mode=session.window_mode,
+            prompt_tokens_total=session.prompt_tokens_total,
+            cached_tokens_total=session.cached_tokens_total
+        )
+    )
+
+
+def get_memory_service(
+    session_manager: SessionManager,
+    session_reaper: SessionReaper
+) -> UnifiedResponse[SessionMemoryResponse]:
+    """获取会话内存占用与休眠情况"""
+    return UnifiedResponse.success(
+        message="获取会话内存情况成功",
+        data=SessionMemoryResponse(**session_manager.memory_stats(), **session_reaper.stats())
+    )
+
+
 def get_available_characters_service(
     character_registry: CharacterRegistry
 ) -> UnifiedResponse[list[CharacterInfo]]:
@@ -0,0 +1,152 @@
+"""
+历史摘要服务
+把移出上下文窗口的对话合并进会话的滚动摘要，在后台空闲时执行，不占用回复路径
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Set
+from app.infrastructure.managers.session_manager import ChatSession
+from app.services.llm_service import LLMService
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+SUMMARY_PROMPT = (
+    "你负责为一段角色扮演对话维护长期记忆。"
+    "下面给出已有的摘要和刚刚移出上下文的对话，请把它们合并成一份新的摘要："
+    "保留用户的身份、偏好、约定、重要事件和未完成的话题，省略寒暄和重复内容。"
+    "使用与对话相同的语言，用第三人称陈述，只输出摘要本身，不超过 {max_chars} 字。"
+)
+
+_ROLE_NAMES = {"user": "用户", "assistant": "角色"}
+
+
+class HistorySummarizer:
+    """
+    后台滚动摘要
+
+    - 每轮回复结束后调用 schedule()；会话空闲 idle_delay 秒后才开始摘要，
+      期间有新消息则放弃，等下一轮结束时重新计时
+    - 同一会话两次摘要至少间隔 min_interval 秒，全局同时最多 max_concurrency 个摘要请求
+    - 待摘要内容不足 min_tokens 时不调用 LLM
+    """
+
+    def __init__(
+        self,
+        llm: LLMService,
+        idle_delay: float = 10.0,
+        min_interval: float = 60.0,
+        min_tokens: int = 200,
+        max_tokens: int = 300,
+        max_concurrency: int = 1
+    ):
+        """
+        Args:
+            llm: LLM 服务
+            idle_delay: 会话空闲多久后开始摘要（秒）
+            min_interval: 同一会话两次摘要的最小间隔（秒）
+            min_tokens: 待摘要内容的最小估算 token 数
+            max_tokens: 摘要的最大 token 数
+            max_concurrency: 全局同时进行的摘要请求数
+        """
+        self.llm = llm
+        self.idle_delay = idle_delay
+        self.min_interval = min_interval
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._last_run: Dict[str, float] = {}
+        self._running: Set[str] = set()  # 正在请求 LLM 的会话（不再取消，避免浪费已发出的请求）
+
+        # 指标
+        self.completed_count = 0
+        self.failed_count = 0
+
+    def schedule(self, session: ChatSession):
+        """会话一轮回复结束后调用：有待摘要的消息时安排一次后台摘要（重新计时）"""
+        if not session.summarize_evicted or not session.evicted_pending:
+            return
+        if session.session_id in self._running:
+            return  # 正在摘要，之后移出的消息留到下一轮结束时再安排
+
+        previous = self._tasks.get(session.session_id)
+        if previous is not None and not previous.done():
+            previous.cancel()
+
+        task = asyncio.create_task(self._run(session, session.last_active))
+        self._tasks[session.session_id] = task
+        task.add_done_callback(lambda done: self._on_done(session.session_id, done))
+
+    def _on_done(self, session_id: str, task: asyncio.Task):
+        if self._tasks.get(session_id) is task:
+            del self._tasks[session_id]
+
+    def is_pending(self, session_id: str) -> bool:
+        """会话是否有待执行或进行中的摘要"""
+        return session_id in self._tasks or session_id in self._running
+
+    def cancel(self, session_id: str):
+        """取消会话的待执行摘要（如删除会话时）"""
+        task = self._tasks.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+        self._last_run.pop(session_id, None)
+
+    async def _run(self, session: ChatSession, scheduled_at: datetime):
+        session_id = session.session_id
+
+        # 等待会话空闲，并满足最小间隔
+        next_allowed = self._last_run.get(session_id, 0.0) + self.min_interval
+        await asyncio.sleep(max(self.idle_delay, next_allowed - time.monotonic()))
+
+        if session.last_active != scheduled_at:
+            return  # 期间有新消息，本轮结束时会重新安排
+        if session.evicted_pending_tokens() < self.min_tokens:
+            return
+
+        async with self._semaphore:
+            if session.last_active != scheduled_at:
+                return
+            batch = session.take_evicted()
+            self._last_run[session_id] = time.monotonic()
+            self._running.add(session_id)
+            started = time.perf_counter()
+            try:
+                summary = await self.llm.complete(
+                    self._build_prompt(session.summary, batch),
+                    max_tokens=self.max_tokens
+                )
+            except asyncio.CancelledError:
+                session.restore_evicted(batch)
+                raise
+            except Exception as e:
+                session.restore_evicted(batch)
+                self.failed_count += 1
+                logger.warning(f"⚠️ 会话 {session_id} 历史摘要失败，稍后重试: {e}")
+                return
+            finally:
+                self._running.discard(session_id)
+
+        if not summary.strip():
+            session.restore_evicted(batch)
+            return
+
+        session.set_summary(summary)
+        self.completed_count += 1
+        logger.info(
+            f"📝 会话 {session_id} 已摘要 {len(batch)} 条移出的消息 "
+            f"(摘要 ~{session.summary_tokens} tokens, 耗时 {time.perf_counter() - started:.1f}s)"
+        )
+
+    def _build_prompt(self, summary: str, batch: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """构建摘要请求"""
+        dialogue = "\n".join(
+            f"{_ROLE_NAMES.get(message['role'], message['role'])}: {message['content']}"
+            for message in batch
+        )
+        return [
+            {"role": "system", "content": SUMMARY_PROMPT.format(max_chars=self.max_tokens)},
+            {"role": "user", "content": f"已有摘要：\n{summary or '（无）'}\n\n移出的对话：\n{dialogue}"},
+        ]
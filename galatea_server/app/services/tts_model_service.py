@@ -1,6 +1,6 @@
 """TTS 模型切换服务"""
 import httpx
-from app.core.config import settings
+from app.core.container import tts_replica_pool
 from app.core.logger import get_logger
 from app.schemas.tts import SwitchTTSModelRequest, SwitchTTSModelResponse
 from app.schemas.common import UnifiedResponse
@@ -18,7 +18,7 @@ async def switch_tts_model_service(
     切换 TTS 模型服务
     
     根据角色 ID 获取对应的 GPT 和 SoVITS 模型路径，
-    调用 GPT-SoVITS API 进行模型切换
+    通过 TTS 副本池确保有副本加载了该角色的权重
     
     Args:
         request: 包含 character_id 的请求
@@ -62,46 +62,9 @@ async def switch_tts_model_service(
         logger.info(f"   GPT 模型: {gpt_model_path}")
         logger.info(f"   SoVITS 模型: {sovits_model_path}")
         
-        # 3. 调用 GPT-SoVITS API 切换模型
-        base_url = f"http://{settings.TTS_API_HOST}:{settings.TTS_API_PORT}"
-        timeout = 30.0
-        
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            # 3.1 切换 GPT 模型
-            logger.info(f"📡 调用 API: GET {base_url}/set_gpt_weights")
-            gpt_response = await client.get(
-                f"{base_url}/set_gpt_weights",
-                params={"weights_path": gpt_model_path}
-            )
-            
-            if gpt_response.status_code != 200:
-                error_msg = f"GPT 模型切换失败: {gpt_response.status_code} - {gpt_response.text}"
-                logger.error(f"❌ {error_msg}")
-                return UnifiedResponse(
-                    code=500,
-                    message=error_msg,
-                    data=None
-                )
-            
-            logger.info(f"✅ GPT 模型切换成功")
-            
-            # 3.2 切换 SoVITS 模型
-            logger.info(f"📡 调用 API: GET {base_url}/set_sovits_weights")
-            sovits_response = await client.get(
-                f"{base_url}/set_sovits_weights",
-                params={"weights_path": sovits_model_path}
-            )
-            
-            if sovits_response.status_code != 200:
-                error_msg = f"SoVITS 模型切换失败: {sovits_response.status_code} - {sovits_response.text}"
-                logger.error(f"❌ {error_msg}")
-                return UnifiedResponse(
-                    code=500,
-                    message=error_msg,
-                    data=None
-                )
-            
-            logger.info(f"✅ SoVITS 模型切换成功")
+        # 3. 由副本池选择副本：已有副本加载了该角色则直接复用，否则在空闲副本上切换
+        replica = await tts_replica_pool.ensure_loaded(character_id, voice_config)
+        logger.info(f"✅ 角色 {character_id} 的权重已就绪 (副本: {replica.base_url})")
         
         # 4. 返回成功响应
         response_data = SwitchTTSModelResponse(
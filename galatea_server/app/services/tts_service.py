@@ -4,23 +4,39 @@
 import httpx
 import asyncio
 import base64
-from typing import AsyncGenerator, Tuple, Optional, TYPE_CHECKING
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import AsyncGenerator, Deque, Dict, List, Tuple, Optional, TYPE_CHECKING
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.infrastructure.cache.tts_audio_cache import make_cache_key
+from app.infrastructure.managers.tts_replica_pool import TTSReplicaPool, build_tts_params
+from app.exceptions.tts import TTSException
+from app.schemas.character import VoiceConfig
 from app.schemas.unity_protocol import (
     UnityBaseMessage,
     UnityMessageType,
-    AudioCompletePayload
+    AudioCompletePayload,
+    AudioStartPayload as UnityAudioStartPayload,
+    AudioChunkPayload as UnityAudioChunkPayload,
+    AudioEndPayload as UnityAudioEndPayload
 )
 from app.schemas.web_protocol import (
     WebServerMessage,
     WebServerMessageType,
-    AudioChunkPayload
+    AudioChunkPayload,
+    AudioStartPayload,
+    AudioFramePayload,
+    AudioEndPayload
 )
-from app.utils.audio_utils import fix_wav_header
+from app.schemas.audio_frame_protocol import AudioFrameType, encode_audio_frame
+from app.schemas.message_codec import encode_web_payload, encode_unity_payload
+from app.utils.audio_utils import fix_wav_header, WavStreamParser
+from app.utils.reorder_buffer import ReorderBuffer
 import time
 
 if TYPE_CHECKING:
+    from app.infrastructure.cache.tts_audio_cache import TTSAudioCache
     from app.infrastructure.managers.character_registry import CharacterRegistry
     from app.infrastructure.managers.unity_connection import UnityConnectionManager
     from app.infrastructure.managers.web_connection import WebConnectionManager
@@ -28,20 +44,47 @@ if TYPE_CHECKING:
 logger = get_logger(__name__)
 
 
+@dataclass
+class TTSTurn:
+    """一轮 AI 回复的 TTS 上下文"""
+    character_id: str
+    session_id: Optional[str] = None
+    message_id: Optional[str] = None
+    segmentation_policy: str = "sentence"
+    started_at: Optional[float] = None  # 收到用户消息的时刻（time.monotonic），用于统计首音频延迟
+    first_audio_sent: bool = False
+
+
 class TTSService:
     """
     TTS 服务（无状态）
     通过HTTP调用已启动的TTS服务（由TTSServer进程管理）
     """
     
-    def __init__(self, character_registry: 'CharacterRegistry', unity_manager: Optional['UnityConnectionManager'] = None, web_manager: Optional['WebConnectionManager'] = None):
-        self.base_url = f"http://{settings.TTS_API_HOST}:{settings.TTS_API_PORT}"
+    def __init__(
+        self,
+        character_registry: 'CharacterRegistry',
+        unity_manager: Optional['UnityConnectionManager'] = None,
+        web_manager: Optional['WebConnectionManager'] = None,
+        audio_cache: Optional['TTSAudioCache'] = None,
+        replica_pool: Optional[TTSReplicaPool] = None
+    ):
+        self.replica_pool = replica_pool or TTSReplicaPool(
+            [f"http://{settings.TTS_API_HOST}:{settings.TTS_API_PORT}"]
+        )
         self.timeout = 60.0
+        self.stall_timeout = settings.TTS_STALL_TIMEOUT  # 超过该时间没有收到音频数据视为卡住
+        self.chunk_size = 8192
+        self.pipeline_depth = settings.TTS_PIPELINE_DEPTH  # 同时进行中的句子合成数量
+        self.delivery_mode = settings.TTS_DELIVERY_MODE  # complete = 整句发送, stream = 流式 PCM 帧
         self.character_registry = character_registry
         self.unity_manager = unity_manager
         self.web_manager = web_manager
+        self.audio_cache = audio_cache  # 为 None 时不使用缓存
+        # 首音频延迟（毫秒），按分段策略分别保留最近的样本
+        self.first_audio_latency: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=200))
         
-        logger.info(f"🎤 TTS Service 初始化: {self.base_url}")
+        logger.info(f"🎤 TTS Service 初始化: {len(self.replica_pool.replicas)} 个副本")
     
     async def synthesize_streaming(
         self, 
@@ -69,51 +112,119 @@ class TTSService:
         
         voice_config = character.voice
         
-        # 构建参考音频的完整路径
-        # 配置文件中是相对路径如 "/audio/yanagi.wav"
-        # 需要转换为 BASE_DIR/assets/audio/yanagi.wav
-        ref_audio_path = voice_config.reference_audio
-        if ref_audio_path.startswith("/"):
-            ref_audio_path = str(settings.BASE_DIR / "app" / "assets" / ref_audio_path.lstrip("/"))
-        
-        params = {
-            "text": text,
-            "text_lang": voice_config.language,
-            "ref_audio_path": ref_audio_path,
-            "prompt_lang": voice_config.language,
-            "streaming_mode": 1,  # 1=最佳质量流式
-            "media_type": "wav",
-            "batch_size": 1,
-            "speed_factor": voice_config.speed,
-            "temperature": 1.0,
-            "top_p": 1.0,
-            "top_k": 5,
-        }
-        
-        # 如果提供了 prompt_text，则添加到参数中
-        if voice_config.prompt_text:
-            params["prompt_text"] = voice_config.prompt_text
+        if self.audio_cache is None:
+            async for item in self._synthesize_from_backend(text, character_id, voice_config):
+                yield item
+            return
+        
+        # 命中缓存则直接按块返回，不再请求 TTS 服务
+        cache_key = make_cache_key(character_id, voice_config, text)
+        cached = await self.audio_cache.get(cache_key)
+        if cached is not None:
+            audio, sample_rate = cached
+            logger.debug(f"🗄️ TTS缓存命中: {text[:30]}...")
+            for offset in range(0, len(audio), self.chunk_size):
+                yield (audio[offset:offset + self.chunk_size], sample_rate)
+            return
+        
+        # 未命中：边转发边收集，完整合成后写入缓存
+        audio_buffer = bytearray()
+        sample_rate = 32000
+        async for audio_chunk, sample_rate in self._synthesize_from_backend(text, character_id, voice_config):
+            audio_buffer.extend(audio_chunk)
+            yield (audio_chunk, sample_rate)
+        
+        if audio_buffer:
+            await self.audio_cache.put(cache_key, bytes(audio_buffer), sample_rate)
+    
+    async def _synthesize_from_backend(
+        self,
+        text: str,
+        character_id: str,
+        voice_config: VoiceConfig
+    ) -> AsyncGenerator[Tuple[bytes, int], None]:
+        """
+        调用 GPT-SoVITS 流式合成（不经过缓存）
+        
+        请求被路由到已加载该角色权重的副本；如果副本在产出任何音频之前
+        卡住或连接失败，会标记该副本故障并转移到其他副本重试
+        
+        Args:
+            text: 要合成的文本（单个句子）
+            character_id: 角色ID（用于副本路由）
+            voice_config: 角色声音配置
+        
+        Yields:
+            Tuple[audio_chunk: bytes, sample_rate: int]
+        """
+        params = build_tts_params(text, voice_config)
         
         logger.debug(f"🎤 TTS请求参数: {params}")
         
+        tried = set()
+        max_attempts = len(self.replica_pool.replicas)
+        for attempt in range(max_attempts):
+            yielded = False
+            replica = None
+            try:
+                async with self.replica_pool.acquire(character_id, voice_config, exclude=tried) as replica:
+                    async for item in self._request_tts(replica.base_url, text, params):
+                        yielded = True
+                        yield item
+                return
+            
+            except (httpx.TimeoutException, httpx.TransportError, TTSException) as e:
+                # 已经产出过音频的请求无法透明重试
+                if yielded:
+                    raise
+                
+                # replica 为 None 说明权重切换失败，副本池已将其置入冷却期
+                if replica is not None:
+                    self.replica_pool.mark_failed(replica)
+                    tried.add(replica)
+                
+                if attempt == max_attempts - 1:
+                    raise
+                logger.warning(f"⚠️ TTS 副本失败 ({e})，转移到其他副本: {text[:30]}...")
+    
+    async def _request_tts(
+        self,
+        base_url: str,
+        text: str,
+        params: dict
+    ) -> AsyncGenerator[Tuple[bytes, int], None]:
+        """
+        向单个 GPT-SoVITS 副本发起流式合成请求
+        
+        Args:
+            base_url: 副本地址
+            text: 要合成的文本（用于日志）
+            params: /tts 请求参数
+        
+        Yields:
+            Tuple[audio_chunk: bytes, sample_rate: int]
+        """
+        # read 超时即两次数据之间的最长间隔，用于发现卡住的副本
+        timeout = httpx.Timeout(self.timeout, read=self.stall_timeout)
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=timeout) as client:
                 async with client.stream(
                     "GET", 
-                    f"{self.base_url}/tts", 
+                    f"{base_url}/tts", 
                     params=params
                 ) as response:
                     # 检查响应状态
                     if response.status_code != 200:
                         error_text = await response.aread()
                         logger.error(f"❌ TTS服务错误 {response.status_code}: {error_text}")
-                        raise Exception(f"TTS服务错误 {response.status_code}")
+                        raise TTSException(message=f"TTS服务错误 {response.status_code}")
                     
                     sample_rate = 32000  # GPT-SoVITS默认采样率
                     chunk_count = 0
                     
                     # 流式读取音频块
-                    async for chunk in response.aiter_bytes(chunk_size=8192):
+                    async for chunk in response.aiter_bytes(chunk_size=self.chunk_size):
                         if chunk:
                             chunk_count += 1
                             yield (chunk, sample_rate)
@@ -121,57 +232,143 @@ class TTSService:
                     logger.debug(f"✅ TTS完成: {text[:30]}... ({chunk_count} 个音频块)")
         
         except httpx.TimeoutException:
-            logger.error(f"❌ TTS服务超时: {text[:30]}...")
-            raise Exception("TTS服务超时")
+            logger.error(f"❌ TTS服务超时 ({base_url}): {text[:30]}...")
+            raise
         except Exception as e:
-            logger.error(f"❌ TTS服务调用失败: {e}")
+            logger.error(f"❌ TTS服务调用失败 ({base_url}): {e}")
             raise
     
     async def process_queue(
         self,
         queue: asyncio.Queue, 
-        character_id: str
+        character_id: str,
+        session_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+        segmentation_policy: str = "sentence",
+        started_at: Optional[float] = None
     ):
         """
         后台处理TTS队列，并将音频流发送给Unity
         
+        流水线模式：最多同时合成 pipeline_depth 个句子，
+        合成结果经重排缓冲按 sentence_index 顺序发送，保证播放顺序不变
+        
         Args:
             queue: TTS任务队列
             character_id: 角色ID
+            session_id: 会话ID（写入二进制音频帧头）
+            message_id: AI 回复的消息ID（写入二进制音频帧头）
+            segmentation_policy: 本轮使用的分段策略（用于按策略统计首音频延迟）
+            started_at: 收到用户消息的时刻（time.monotonic）
         """
-        while True:
-            item = await queue.get()
-            
-            # 检查哨兵值（结束标记）
-            if item is None:
-                logger.info("✅ TTS队列处理完成")
-                break
-            
-            sentence_index = item["index"]
-            text = item["text"]
-            
-            logger.info(f"🎵 TTS [{sentence_index}]: {text[:30]}...")
-            
-            try:
-                await self._process_single_sentence(sentence_index, text, character_id)
+        turn = TTSTurn(
+            character_id=character_id,
+            session_id=session_id,
+            message_id=message_id,
+            segmentation_policy=segmentation_policy,
+            started_at=started_at
+        )
+        
+        if self.delivery_mode == "stream":
+            await self._process_queue_streaming(queue, turn)
+            return
+        
+        # 窗口同时限制进行中的合成数量和重排缓冲的大小：
+        # 队首句子未发送前，最多再开始 pipeline_depth - 1 个后续句子
+        reorder_buffer = ReorderBuffer(window=max(1, self.pipeline_depth))
+        send_lock = asyncio.Lock()
+        tasks = []
+        first_item = True
+        
+        try:
+            while True:
+                item = await queue.get()
+                
+                # 检查哨兵值（结束标记）
+                if item is None:
+                    break
+                
+                sentence_index = item["index"]
+                text = item["text"]
+                
+                # 以本轮第一个句子的索引作为重排起点
+                if first_item:
+                    reorder_buffer.next_index = sentence_index
+                    first_item = False
+                
+                logger.info(f"🎵 TTS [{sentence_index}]: {text[:30]}...")
+                
+                # 等待句子进入重排窗口
+                await reorder_buffer.wait_for_slot(sentence_index)
+                tasks.append(asyncio.create_task(
+                    self._pipeline_sentence(
+                        sentence_index, text, turn,
+                        reorder_buffer, send_lock
+                    )
+                ))
             
-            except Exception as e:
-                logger.error(f"❌ TTS失败 [{sentence_index}]: {e}", exc_info=True)
-                # 继续处理队列中的其他任务，不中断整个流程
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except asyncio.CancelledError:
+            # 本轮被打断：取消所有进行中的合成（连带关闭对应的 HTTP 请求）
+            await self._cancel_tasks(tasks)
+            logger.info("⏹️ TTS队列已取消")
+            raise
+        
+        logger.info("✅ TTS队列处理完成")
     
-    async def _process_single_sentence(
+    async def _pipeline_sentence(
         self,
         sentence_index: int,
         text: str,
-        character_id: str
+        turn: TTSTurn,
+        reorder_buffer: ReorderBuffer,
+        send_lock: asyncio.Lock
     ):
         """
-        处理单个句子的TTS合成和音频传输（发送完整音频到Unity）
+        流水线中的单个句子：合成后放入重排缓冲，并按顺序发送已就绪的音频
+        
+        Args:
+            sentence_index: 句子索引
+            text: 文本内容
+            turn: 本轮回复的上下文
+            reorder_buffer: 按句子索引重排的缓冲（发送后释放窗口）
+            send_lock: 保证发送串行的锁
+        """
+        result = None
+        try:
+            audio_data, sample_rate = await self._synthesize_sentence(sentence_index, text, turn.character_id)
+            result = (text, audio_data, sample_rate)
+        except Exception as e:
+            # 失败的句子会被跳过，不阻塞后续句子
+            logger.error(f"❌ TTS失败 [{sentence_index}]: {e}", exc_info=True)
+        
+        # 加锁后统一释放，保证多个任务不会交错发送
+        async with send_lock:
+            reorder_buffer.put(sentence_index, result)
+            for ready_index, (ready_text, audio_data, sample_rate) in reorder_buffer.pop_ready():
+                try:
+                    await self._send_sentence_audio(turn, ready_index, ready_text, audio_data, sample_rate)
+                    self._record_first_audio(turn)
+                except Exception as e:
+                    logger.error(f"❌ 音频发送失败 [{ready_index}]: {e}", exc_info=True)
+    
+    async def _synthesize_sentence(
+        self,
+        sentence_index: int,
+        text: str,
+        character_id: str
+    ) -> Tuple[bytes, int]:
+        """
+        合成单个句子的完整音频
         
         Args:
             sentence_index: 句子索引
             text: 文本内容
             character_id: 角色ID
+        
+        Returns:
+            Tuple[修复 header 后的 WAV 数据, 采样率]
         """
         sample_rate = 32000  # 默认采样率
         
@@ -195,44 +392,403 @@ class TTSService:
         logger.info(f"✅ 音频生成完成 [{sentence_index}]: {total_bytes} bytes @ {sample_rate}Hz")
         
         # 修复 WAV header
-        fixed_audio = fix_wav_header(complete_audio, sample_rate)
+        return fix_wav_header(complete_audio, sample_rate), sample_rate
+    
+    async def _send_sentence_audio(
+        self,
+        turn: TTSTurn,
+        sentence_index: int,
+        text: str,
+        fixed_audio: bytes,
+        sample_rate: int
+    ):
+        """
+        发送单个句子的完整音频到前端和 Unity
+        
+        二进制连接收到 WAV 帧，其余连接收到 Base64 JSON（仅在需要时编码一次）
+        
+        Args:
+            turn: 本轮回复的上下文
+            sentence_index: 句子索引
+            text: 文本内容
+            fixed_audio: 修复 header 后的 WAV 数据
+            sample_rate: 采样率
+        """
         fixed_total_bytes = len(fixed_audio)
+        duration = fixed_total_bytes / (sample_rate * 2)  # 16-bit = 2 bytes per sample
+        
+        frame = encode_audio_frame(
+            AudioFrameType.WAV,
+            fixed_audio,
+            sentence_index=sentence_index,
+            sample_rate=sample_rate,
+            session_id=turn.session_id,
+            message_id=turn.message_id
+        )
         
-        # Base64 编码（使用修复后的音频）
-        audio_b64 = base64.b64encode(fixed_audio).decode('utf-8')
+        audio_b64 = None
+        
+        def get_audio_b64() -> str:
+            # Base64 编码（使用修复后的音频），web 与 Unity 共用一次编码结果
+            nonlocal audio_b64
+            if audio_b64 is None:
+                audio_b64 = base64.b64encode(fixed_audio).decode('utf-8')
+            return audio_b64
         
         # ✅ 优先发送音频到前端（立即播放）
         if self.web_manager and self.web_manager.has_active_client:
-            duration = fixed_total_bytes / (sample_rate * 2)  # 16-bit = 2 bytes per sample
-            
-            web_audio_message = WebServerMessage(
-                type=WebServerMessageType.AUDIO_CHUNK,
-                data=AudioChunkPayload(
+            await self.web_manager.broadcast_audio(frame, lambda: encode_web_payload(
+                WebServerMessageType.AUDIO_CHUNK,
+                AudioChunkPayload(
                     sentence_index=sentence_index,
-                    audio_data=audio_b64,
+                    audio_data=get_audio_b64(),
                     sample_rate=sample_rate,
-                    duration=duration
-                ).model_dump(),
-                timestamp=time.time()
-            )
-            await self.web_manager.broadcast(web_audio_message)
+                    duration=duration,
+                    session_id=turn.session_id,
+                    message_id=turn.message_id
+                )
+            ), session_id=turn.session_id)
             logger.info(f"🔊 [优先] 音频已发送到前端 [{sentence_index}]: {duration:.2f}秒")
         
         # 发送完整音频到 Unity（用于口型同步）
         if self.unity_manager and self.unity_manager.has_active_client:
-            complete_message = UnityBaseMessage(
-                type=UnityMessageType.AUDIO_COMPLETE,
-                data=AudioCompletePayload(
+            await self.unity_manager.broadcast_audio(frame, lambda: encode_unity_payload(
+                UnityMessageType.AUDIO_COMPLETE,
+                AudioCompletePayload(
                     sentence_index=sentence_index,
                     text=text,
-                    audio_data=audio_b64,
+                    audio_data=get_audio_b64(),
                     sample_rate=sample_rate,
-                    total_bytes=fixed_total_bytes
-                ).model_dump(),
-                timestamp=time.time()
-            )
-            await self.unity_manager.broadcast(complete_message)
+                    total_bytes=fixed_total_bytes,
+                    session_id=turn.session_id,
+                    message_id=turn.message_id
+                )
+            ), session_id=turn.session_id)
             logger.debug(f"📤 音频已发送到 Unity [{sentence_index}]")
         
         logger.info(f"✅ TTS 完成 [{sentence_index}]")
-
+    
+    # ==================== 流式投递模式 ====================
+    
+    async def _process_queue_streaming(
+        self,
+        queue: asyncio.Queue,
+        turn: TTSTurn
+    ):
+        """
+        流式投递：GPT-SoVITS 每产出一段 PCM 就立即转发给前端和 Unity
+        
+        每个句子以 AUDIO_START / AUDIO_FRAME... / AUDIO_END 成帧。
+        多个句子可以同时合成，但只有当前句子的音频会实时转发，
+        后续句子的帧先暂存在各自的帧队列中，轮到它们时再依次发出。
+        已开始但尚未发送完的句子最多 pipeline_depth 个，客户端跟不上时暂存的帧不会无限增长。
+        
+        Args:
+            queue: TTS任务队列
+            turn: 本轮回复的上下文
+        """
+        # 句子发送完（而不是合成完）才释放，同时限制进行中的合成与暂存的句子数
+        window = asyncio.Semaphore(max(1, self.pipeline_depth))
+        # 按句子顺序排列的 (sentence_index, text, frame_queue)
+        ordered_sentences: asyncio.Queue = asyncio.Queue()
+        sender_task = asyncio.create_task(self._stream_sender(ordered_sentences, turn, window))
+        tasks = []
+        
+        try:
+            while True:
+                item = await queue.get()
+                
+                # 检查哨兵值（结束标记）
+                if item is None:
+                    break
+                
+                sentence_index = item["index"]
+                text = item["text"]
+                
+                logger.info(f"🎵 TTS [{sentence_index}] (流式): {text[:30]}...")
+                
+                # 等待最早的句子发送完，窗口出现空位
+                await window.acquire()
+                frame_queue: asyncio.Queue = asyncio.Queue()
+                await ordered_sentences.put((sentence_index, text, frame_queue))
+                tasks.append(asyncio.create_task(
+                    self._stream_sentence(sentence_index, text, turn.character_id, frame_queue)
+                ))
+            
+            await ordered_sentences.put(None)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            await sender_task
+        except asyncio.CancelledError:
+            # 本轮被打断：停止转发并取消所有进行中的合成
+            await self._cancel_tasks(tasks + [sender_task])
+            logger.info("⏹️ TTS队列已取消 (流式)")
+            raise
+        
+        logger.info("✅ TTS队列处理完成 (流式)")
+    
+    async def _stream_sentence(
+        self,
+        sentence_index: int,
+        text: str,
+        character_id: str,
+        frame_queue: asyncio.Queue
+    ):
+        """
+        合成单个句子，把对齐后的 PCM 帧依次放入帧队列（以 None 结束）
+        
+        Args:
+            sentence_index: 句子索引
+            text: 文本内容
+            character_id: 角色ID
+            frame_queue: 该句子的帧队列，元素为 (pcm, parser)
+        """
+        parser = WavStreamParser()
+        try:
+            async for audio_chunk, sample_rate in self.synthesize_streaming(text, character_id):
+                pcm = parser.feed(audio_chunk)
+                if pcm:
+                    await frame_queue.put((pcm, parser))
+        except Exception as e:
+            # 已经发出的帧保留，句子照常以 AUDIO_END 结束
+            logger.error(f"❌ TTS失败 [{sentence_index}]: {e}", exc_info=True)
+        finally:
+            await frame_queue.put(None)
+    
+    async def _stream_sender(self, ordered_sentences: asyncio.Queue, turn: TTSTurn, window: asyncio.Semaphore):
+        """
+        按句子顺序转发音频帧
+        
+        Args:
+            ordered_sentences: 按 sentence_index 排列的句子队列（以 None 结束）
+            turn: 本轮回复的上下文
+            window: 句子窗口，每个句子发送完后释放
+        """
+        while True:
+            entry = await ordered_sentences.get()
+            if entry is None:
+                break
+            
+            sentence_index, text, frame_queue = entry
+            chunk_index = 0
+            total_bytes = 0
+            parser = None
+            
+            while True:
+                frame = await frame_queue.get()
+                if frame is None:
+                    break
+                
+                pcm, parser = frame
+                try:
+                    if chunk_index == 0:
+                        await self._send_stream_start(turn, sentence_index, text, parser)
+                    await self._send_stream_frame(turn, sentence_index, chunk_index, pcm, parser)
+                    self._record_first_audio(turn)
+                except Exception as e:
+                    logger.error(f"❌ 音频帧发送失败 [{sentence_index}]: {e}", exc_info=True)
+                chunk_index += 1
+                total_bytes += len(pcm)
+            window.release()  # 该句子的帧已全部取出，允许开始下一个句子
+            
+            # 没有产出任何帧的句子（合成失败）不发送起止标记
+            if chunk_index == 0:
+                continue
+            
+            try:
+                await self._send_stream_end(turn, sentence_index, chunk_index, total_bytes, parser)
+            except Exception as e:
+                logger.error(f"❌ 音频结束标记发送失败 [{sentence_index}]: {e}", exc_info=True)
+            
+            logger.info(f"✅ TTS 完成 [{sentence_index}] (流式): {chunk_index} 帧, {total_bytes} bytes")
+    
+    @staticmethod
+    async def _cancel_tasks(tasks: List[asyncio.Task]):
+        """取消并等待一组任务结束"""
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def cancel_turn(
+        self,
+        tts_task: Optional[asyncio.Task],
+        queue: asyncio.Queue,
+        session_id: Optional[str] = None
+    ):
+        """
+        打断本轮语音：清空待合成的句子，取消 TTS 任务，并通知 Unity 停止说话
+        
+        Args:
+            tts_task: process_queue 所在的任务（未启用音频时为 None）
+            queue: 本轮的 TTS 任务队列
+            session_id: 会话ID（只通知关注该会话的 Unity 连接）
+        """
+        # 丢弃尚未开始合成的句子
+        while not queue.empty():
+            queue.get_nowait()
+        
+        if tts_task is None:
+            return
+        
+        if not tts_task.done():
+            await self._cancel_tasks([tts_task])
+        
+        if self.unity_manager and self.unity_manager.has_active_client:
+            try:
+                await self.unity_manager.notify_stop_speaking(session_id=session_id)
+            except Exception as e:
+                logger.error(f"❌ 通知 Unity 停止说话失败: {e}")
+    
+    def _record_first_audio(self, turn: TTSTurn):
+        """记录本轮第一段音频发出时的延迟（从收到用户消息起算）"""
+        if turn.first_audio_sent:
+            return
+        turn.first_audio_sent = True
+        if turn.started_at is None:
+            return
+        
+        latency_ms = (time.monotonic() - turn.started_at) * 1000
+        self.first_audio_latency[turn.segmentation_policy].append(latency_ms)
+        logger.info(f"⏱️ 首音频延迟: {latency_ms:.0f}ms (分段策略: {turn.segmentation_policy})")
+    
+    def first_audio_latency_stats(self) -> List[Dict[str, float]]:
+        """
+        按分段策略汇总首音频延迟
+        
+        Returns:
+            每个策略一项：样本数、平均值、P50、P90、最大值（毫秒）
+        """
+        stats = []
+        for policy, samples in self.first_audio_latency.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            count = len(ordered)
+            stats.append({
+                "policy": policy,
+                "samples": count,
+                "avg_ms": sum(ordered) / count,
+                "p50_ms": ordered[int(0.5 * (count - 1))],
+                "p90_ms": ordered[int(0.9 * (count - 1))],
+                "max_ms": ordered[-1],
+            })
+        return stats
+    
+    async def _send_stream_start(self, turn: TTSTurn, sentence_index: int, text: str, parser: WavStreamParser):
+        """发送句子的流式音频开始标记"""
+        if self.web_manager and self.web_manager.has_active_client:
+            await self.web_manager.broadcast(WebServerMessage(
+                type=WebServerMessageType.AUDIO_START,
+                data=AudioStartPayload(
+                    sentence_index=sentence_index,
+                    text=text,
+                    sample_rate=parser.sample_rate,
+                    channels=parser.channels,
+                    bits_per_sample=parser.bits_per_sample,
+                    session_id=turn.session_id,
+                    message_id=turn.message_id
+                ),
+                timestamp=time.time()
+            ), session_id=turn.session_id)
+        
+        if self.unity_manager and self.unity_manager.has_active_client:
+            await self.unity_manager.broadcast(UnityBaseMessage(
+                type=UnityMessageType.AUDIO_START,
+                data=UnityAudioStartPayload(
+                    sentence_index=sentence_index,
+                    text=text,
+                    sample_rate=parser.sample_rate,
+                    format="pcm_s16le",
+                    session_id=turn.session_id,
+                    message_id=turn.message_id
+                ).model_dump(),
+                timestamp=time.time()
+            ), session_id=turn.session_id)
+        
+        logger.debug(f"📤 流式音频开始 [{sentence_index}] @ {parser.sample_rate}Hz")
+    
+    async def _send_stream_frame(
+        self,
+        turn: TTSTurn,
+        sentence_index: int,
+        chunk_index: int,
+        pcm: bytes,
+        parser: WavStreamParser
+    ):
+        """发送一帧 PCM 音频（二进制连接直接发送 PCM，其余连接发送 Base64 JSON）"""
+        frame = encode_audio_frame(
+            AudioFrameType.PCM,
+            pcm,
+            sentence_index=sentence_index,
+            sample_rate=parser.sample_rate,
+            sequence=chunk_index,
+            session_id=turn.session_id,
+            message_id=turn.message_id
+        )
+        
+        audio_b64 = None
+        
+        def get_audio_b64() -> str:
+            nonlocal audio_b64
+            if audio_b64 is None:
+                audio_b64 = base64.b64encode(pcm).decode('utf-8')
+            return audio_b64
+        
+        if self.web_manager and self.web_manager.has_active_client:
+            await self.web_manager.broadcast_audio(frame, lambda: encode_web_payload(
+                WebServerMessageType.AUDIO_FRAME,
+                AudioFramePayload(
+                    sentence_index=sentence_index,
+                    chunk_index=chunk_index,
+                    audio_data=get_audio_b64(),
+                    session_id=turn.session_id,
+                    message_id=turn.message_id
+                )
+            ), session_id=turn.session_id)
+        
+        if self.unity_manager and self.unity_manager.has_active_client:
+            await self.unity_manager.broadcast_audio(frame, lambda: encode_unity_payload(
+                UnityMessageType.AUDIO_CHUNK,
+                UnityAudioChunkPayload(
+                    sentence_index=sentence_index,
+                    chunk_index=chunk_index,
+                    audio_data=get_audio_b64(),
+                    sample_rate=parser.sample_rate,
+                    chunk_size=len(pcm),
+                    session_id=turn.session_id,
+                    message_id=turn.message_id
+                )
+            ), session_id=turn.session_id)
+    
+    async def _send_stream_end(self, turn: TTSTurn, sentence_index: int, total_chunks: int, total_bytes: int, parser: WavStreamParser):
+        """发送句子的流式音频结束标记"""
+        duration = total_bytes / (parser.sample_rate * parser.block_align)
+        
+        if self.web_manager and self.web_manager.has_active_client:
+            await self.web_manager.broadcast(WebServerMessage(
+                type=WebServerMessageType.AUDIO_END,
+                data=AudioEndPayload(
+                    sentence_index=sentence_index,
+                    total_chunks=total_chunks,
+                    total_bytes=total_bytes,
+                    duration=duration,
+                    session_id=turn.session_id,
+                    message_id=turn.message_id
+                ),
+                timestamp=time.time()
+            ), session_id=turn.session_id)
+        
+        if self.unity_manager and self.unity_manager.has_active_client:
+            await self.unity_manager.broadcast(UnityBaseMessage(
+                type=UnityMessageType.AUDIO_END,
+                data=UnityAudioEndPayload(
+                    sentence_index=sentence_index,
+                    total_chunks=total_chunks,
+                    total_bytes=total_bytes,
+                    duration=duration,
+                    session_id=turn.session_id,
+                    message_id=turn.message_id
+                ).model_dump(),
+                timestamp=time.time()
+            ), session_id=turn.session_id)
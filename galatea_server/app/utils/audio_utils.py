@@ -142,3 +142,80 @@ def validate_wav_format(wav_data: bytes) -> dict:
         'data_size': data_size,
         'duration': duration
     }
+
+
+class WavStreamParser:
+    """
+    流式 WAV 增量解析器
+    
+    GPT-SoVITS 流式返回时先发送一个 WAV header，随后是裸 PCM 数据。
+    此解析器剥离 header、读取 fmt 信息，并保证每次输出的 PCM 按采样帧对齐
+    （音频块的边界可能落在一个采样的中间）。
+    """
+    
+    def __init__(self, sample_rate: int = 32000, channels: int = 1, bits_per_sample: int = 16):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bits_per_sample = bits_per_sample
+        self._header_done = False
+        self._pending = bytearray()
+    
+    @property
+    def block_align(self) -> int:
+        """每个采样帧的字节数"""
+        return max(1, self.channels * self.bits_per_sample // 8)
+    
+    def feed(self, chunk: bytes) -> bytes:
+        """
+        输入一个音频块，返回可以立即转发的 PCM 数据
+        
+        Args:
+            chunk: TTS 服务返回的原始音频块
+        
+        Returns:
+            bytes: 按采样帧对齐的 PCM 数据（header 未解析完时返回空）
+        """
+        self._pending.extend(chunk)
+        
+        if not self._header_done and not self._parse_header():
+            return b""
+        
+        usable = len(self._pending) - len(self._pending) % self.block_align
+        pcm = bytes(self._pending[:usable])
+        del self._pending[:usable]
+        return pcm
+    
+    def _parse_header(self) -> bool:
+        """解析 WAV header，成功（或确认是裸 PCM）时返回 True"""
+        buf = self._pending
+        if len(buf) < 12:
+            return False
+        
+        if buf[:4] != b'RIFF' or buf[8:12] != b'WAVE':
+            # 没有 header，按裸 PCM 处理
+            self._header_done = True
+            return True
+        
+        offset = 12
+        while offset + 8 <= len(buf):
+            chunk_id = bytes(buf[offset:offset + 4])
+            chunk_size = struct.unpack_from('<I', buf, offset + 4)[0]
+            
+            if chunk_id == b'data':
+                # 流式 header 中的 data size 不可信，后续所有数据都视为 PCM
+                del buf[:offset + 8]
+                self._header_done = True
+                return True
+            
+            if offset + 8 + chunk_size > len(buf):
+                return False
+            
+            if chunk_id == b'fmt ' and chunk_size >= 16:
+                _, channels, sample_rate, _, _, bits_per_sample = struct.unpack_from('<HHIIHH', buf, offset + 8)
+                self.channels = channels
+                self.sample_rate = sample_rate
+                self.bits_per_sample = bits_per_sample
+            
+            offset += 8 + chunk_size + (chunk_size & 1)
+        
+        return False
@@ -0,0 +1,91 @@
+"""BM25 倒排索引工具
+
+纯内存、增量更新的 BM25 检索，用于从会话的早期对话中召回与当前消息相关的内容。
+中日韩文字按相邻两字（bigram）切分，其余文字按单词切分。
+"""
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+_WORD_RE = re.compile(r"[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def tokenize(text: str) -> List[str]:
+    """切分检索词：英文单词 / 中日韩 bigram（单字词保留单字）"""
+    terms = []
+    for word in _WORD_RE.findall(text.lower()):
+        if not _CJK_RE.match(word):
+            terms.append(word)
+        elif len(word) == 1:
+            terms.append(word)
+        else:
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+class BM25Index:
+    """
+    增量 BM25 索引
+
+    文档编号由调用方指定（会话中为消息序号），add() 只更新该文档涉及的倒排项，
+    idf 与平均文档长度在查询时由计数器即时计算，不需要重建索引
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}  # term → {doc_id: 词频}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+        self.posting_count = 0  # 倒排项总数，用于估算内存占用
+
+    def add(self, doc_id: int, text: str):
+        """加入一个文档"""
+        terms = Counter(tokenize(text))
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.posting_count += len(terms)
+
+    def search(self, query: str, k: int, max_doc_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        检索与 query 最相关的文档
+
+        Args:
+            query: 查询文本
+            k: 返回的文档数
+            max_doc_id: 只检索编号小于该值的文档（用于排除仍在上下文窗口中的消息）
+
+        Returns:
+            List[Tuple[doc_id, score]]: 按得分从高到低排列
+        """
+        doc_count = len(self.doc_lengths)
+        if doc_count == 0 or k <= 0:
+            return []
+
+        avg_length = self.total_length / doc_count
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                if max_doc_id is not None and doc_id >= max_doc_id:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def approx_bytes(self) -> int:
+        """索引的估算内存占用（字节）：每个倒排项约一个 dict 条目加两个 int"""
+        return self.posting_count * 100 + len(self.postings) * 120
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
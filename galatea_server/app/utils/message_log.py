@@ -0,0 +1,114 @@
+"""紧凑的会话消息存储
+
+ChatSession 的消息不再逐条保存为 {"role", "content"} dict：
+role 以 1 字节编码存放在 bytearray 中（角色名驻留，全局只有一份），
+content 存放在 list 中，token 数存放在 array('I') 中，三者按下标一一对应。
+"""
+import sys
+from array import array
+from typing import Dict, Iterator, List, Tuple
+
+# 角色编码表（编码即下标）；新角色第一次出现时追加
+_ROLE_NAMES: List[str] = [sys.intern(role) for role in ("system", "user", "assistant")]
+_ROLE_CODES: Dict[str, int] = {role: code for code, role in enumerate(_ROLE_NAMES)}
+
+# 头部已丢弃的槽位超过该数量且超过一半时才整体压缩
+_COMPACT_MIN = 64
+
+
+def _role_code(role: str) -> int:
+    code = _ROLE_CODES.get(role)
+    if code is None:
+        code = len(_ROLE_NAMES)
+        _ROLE_NAMES.append(sys.intern(role))
+        _ROLE_CODES[_ROLE_NAMES[code]] = code
+    return code
+
+
+class MessageLog:
+    """
+    按序号追加的消息记录（并行数组）
+
+    保存序号在 [first_seq, end_seq) 内的消息。drop_before() 只移动头指针，
+    头部空位累积到一半以上时才一次性删除，均摊 O(1)，窗口滑动时不会重建列表
+    """
+
+    __slots__ = ("_roles", "_contents", "_tokens", "_base_seq", "_head", "_content_bytes")
+
+    def __init__(self, first_seq: int = 0):
+        """
+        Args:
+            first_seq: 第一条消息的序号（从存储恢复部分消息时不为 0）
+        """
+        self._roles = bytearray()
+        self._contents: List[str] = []
+        self._tokens = array("I")
+        self._base_seq = first_seq  # 物理下标 0 对应的序号
+        self._head = 0              # 头部已丢弃的槽位数
+        self._content_bytes = 0     # 保留消息的 content 内存占用，增量维护
+
+    @property
+    def first_seq(self) -> int:
+        return self._base_seq + self._head
+
+    @property
+    def end_seq(self) -> int:
+        """下一条消息的序号"""
+        return self._base_seq + len(self._contents)
+
+    def __len__(self) -> int:
+        return len(self._contents) - self._head
+
+    def append(self, role: str, content: str, tokens: int) -> int:
+        """追加一条消息，返回其序号"""
+        self._roles.append(_role_code(role))
+        self._contents.append(content)
+        self._tokens.append(tokens)
+        self._content_bytes += sys.getsizeof(content)
+        return self.end_seq - 1
+
+    def role(self, seq: int) -> str:
+        return _ROLE_NAMES[self._roles[seq - self._base_seq]]
+
+    def content(self, seq: int) -> str:
+        return self._contents[seq - self._base_seq]
+
+    def tokens(self, seq: int) -> int:
+        return self._tokens[seq - self._base_seq]
+
+    def message(self, seq: int) -> Dict[str, str]:
+        """生成一条消息的 dict（调用方持有的是新对象）"""
+        i = seq - self._base_seq
+        return {"role": _ROLE_NAMES[self._roles[i]], "content": self._contents[i]}
+
+    def messages(self, start_seq: int, end_seq: int) -> List[Dict[str, str]]:
+        lo, hi = start_seq - self._base_seq, end_seq - self._base_seq
+        return [
+            {"role": _ROLE_NAMES[code], "content": content}
+            for code, content in zip(self._roles[lo:hi], self._contents[lo:hi])
+        ]
+
+    def items(self, start_seq: int, end_seq: int) -> Iterator[Tuple[int, str, str]]:
+        """遍历 (seq, role, content)"""
+        for i in range(start_seq - self._base_seq, end_seq - self._base_seq):
+            yield self._base_seq + i, _ROLE_NAMES[self._roles[i]], self._contents[i]
+
+    def drop_before(self, seq: int):
+        """丢弃序号小于 seq 的消息"""
+        head = min(max(seq - self._base_seq, self._head), len(self._contents))
+        for i in range(self._head, head):
+            self._content_bytes -= sys.getsizeof(self._contents[i])
+            self._contents[i] = ""  # 立即释放文本，槽位留到压缩时再删
+        self._head = head
+        if self._head >= _COMPACT_MIN and self._head * 2 >= len(self._contents):
+            del self._roles[:self._head]
+            del self._contents[:self._head]
+            del self._tokens[:self._head]
+            self._base_seq += self._head
+            self._head = 0
+
+    def approx_bytes(self) -> int:
+        """估算内存占用（字节）：content 文本 + 三个数组的槽位"""
+        slots = len(self._contents)
+        return self._content_bytes + slots * (8 + 1 + self._tokens.itemsize) + sys.getsizeof(self._contents)
+
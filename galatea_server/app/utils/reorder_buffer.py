@@ -0,0 +1,68 @@
+"""有序重排缓冲工具"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ReorderBuffer:
+    """
+    按序号重排的缓冲器
+
+    并发任务可能乱序完成，缓冲器暂存结果，
+    只有当下一个期望序号到达时才按顺序释放连续的结果。
+
+    指定 window 时，生产方通过 wait_for_slot 只能领取 [next_index, next_index + window) 内的序号，
+    某个序号迟迟不完成时，暂存的结果最多 window - 1 条，不会无限增长。
+    """
+
+    def __init__(self, start_index: int = 0, window: Optional[int] = None):
+        self.next_index = start_index
+        self.window = window
+        self._pending: Dict[int, Any] = {}
+        self._advanced = asyncio.Event()
+
+    async def wait_for_slot(self, index: int):
+        """
+        等待序号进入窗口（未指定 window 时立即返回）
+
+        Args:
+            index: 即将开始处理的序号
+        """
+        if self.window is None:
+            return
+        while index >= self.next_index + self.window:
+            self._advanced.clear()
+            await self._advanced.wait()
+
+    def put(self, index: int, result: Any):
+        """
+        放入一个结果
+
+        Args:
+            index: 结果序号
+            result: 结果数据（None 表示该序号失败，释放时会被跳过）
+        """
+        if index < self.next_index:
+            # 已经释放过的序号，直接丢弃
+            return
+        self._pending[index] = result
+
+    def pop_ready(self) -> List[Tuple[int, Any]]:
+        """
+        取出从期望序号开始的所有连续结果
+
+        Returns:
+            List[Tuple[index, result]]: 按序号排列的可释放结果（不含失败项）
+        """
+        ready = []
+        start_index = self.next_index
+        while self.next_index in self._pending:
+            result = self._pending.pop(self.next_index)
+            if result is not None:
+                ready.append((self.next_index, result))
+            self.next_index += 1
+        if self.next_index != start_index:
+            self._advanced.set()
+        return ready
+
+    def __len__(self) -> int:
+        return len(self._pending)
@@ -1,69 +1,227 @@
 """文本缓冲工具"""
-from typing import List
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+
+# 各语言的分句配置
+# - terminators: 句末标点（连续出现时视为一个边界，如 "？！"、"……"）
+# - closers: 可以紧跟在句末标点之后、归属于当前句子的闭合符号（引号、括号）
+# - abbreviations: 以 "." 结尾但不表示句子结束的缩写（小写，不含 "."）
+# - clauses: 子句分隔符（仅在自适应策略切分首段时使用）
+SENTENCE_DELIMITERS: Dict[str, Dict[str, str | FrozenSet[str]]] = {
+    "zh": {
+        "terminators": "。！？!?；;…",
+        "closers": "”’」』）)】》\"'",
+        "clauses": "，,、：:",
+        "abbreviations": frozenset(),
+    },
+    "en": {
+        "terminators": "!?;…。！？",
+        "closers": "\"')]}”’",
+        "clauses": ",:，",
+        "abbreviations": frozenset({
+            "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc",
+            "e.g", "i.e", "no", "fig", "inc", "ltd", "co", "mt",
+        }),
+    },
+    "ja": {
+        "terminators": "。！？!?…",
+        "closers": "」』）)】”’\"'",
+        "clauses": "、，,",
+        "abbreviations": frozenset(),
+    },
+}
+
+_WORD_BEFORE_DOT = re.compile(r"([A-Za-z](?:[A-Za-z.]*[A-Za-z])?)$")
+
+
+def _compile_boundary_pattern(terminators: str, closers: str, clauses: str = "") -> re.Pattern:
+    """
+    编译句子边界正则
+
+    匹配：一串句末标点（或子句分隔符） | 单独的 "." | 空行，之后可跟任意个闭合符号
+    """
+    return re.compile(
+        rf"(?:[{re.escape(terminators + clauses)}]+|\.+|\n\n+)[{re.escape(closers)}]*"
+    )
+
+
+_PATTERNS: Dict[str, re.Pattern] = {
+    language: _compile_boundary_pattern(table["terminators"], table["closers"])
+    for language, table in SENTENCE_DELIMITERS.items()
+}
+
+_CLAUSE_PATTERNS: Dict[str, re.Pattern] = {
+    language: _compile_boundary_pattern(table["terminators"], table["closers"], table["clauses"])
+    for language, table in SENTENCE_DELIMITERS.items()
+}
+
+
+@dataclass(frozen=True)
+class SegmentationPolicy:
+    """
+    分段策略
+
+    - first_clause_min_length: 首段达到该长度后即可在子句边界（逗号、顿号等）提前切分，
+      让第一句语音尽早开始；None 表示首段也只在句末切分
+    - min_lengths: 第 n 段的最小长度（超出元组长度后沿用最后一个值），
+      后续段更长，减少 TTS 请求次数
+    """
+    first_clause_min_length: Optional[int] = None
+    min_lengths: Tuple[int, ...] = (5,)
+
+
+SEGMENTATION_POLICIES: Dict[str, SegmentationPolicy] = {
+    # 逐句切分（默认）
+    "sentence": SegmentationPolicy(),
+    # 延迟优先：首段在子句边界提前切分，后续段逐步变长
+    "adaptive": SegmentationPolicy(first_clause_min_length=6, min_lengths=(5, 12, 24, 48)),
+}
 
 
 class TextBuffer:
-    """增量文本缓冲器，用于检测句子边界"""
-    
-    def __init__(self):
+    """
+    增量文本缓冲器，用于检测句子边界
+
+    - 只扫描新追加的文本（记录上次扫描位置），使用预编译正则一次完成匹配
+    - 小数（3.14）、时间（3:30）与常见缩写（Mr.）不会被切分
+    - 过短的片段不会被丢弃，而是并入下一个句子
+    - 分段长度由 SegmentationPolicy 控制（见 SEGMENTATION_POLICIES）
+    """
+
+    def __init__(self, language: str = "zh", policy: str = "sentence"):
+        if language not in SENTENCE_DELIMITERS:
+            language = "zh"
+        self.language = language
+        self.policy = SEGMENTATION_POLICIES.get(policy, SEGMENTATION_POLICIES["sentence"])
         self.buffer = ""
-        # 中文和英文的句子分隔符
-        self.sentence_delimiters = ["。", "！", "？", ".", "!", "?", "\n\n"]
-        self.min_chunk_length = 5  # 最小句子长度，避免过短的片段
-    
+        self._pattern = _PATTERNS[language]
+        self._clause_pattern = _CLAUSE_PATTERNS[language]
+        self._abbreviations = SENTENCE_DELIMITERS[language]["abbreviations"]
+        self._scan_pos = 0  # 下次从此处开始扫描（之前的文本已确认不含边界）
+        self._segment_index = 0  # 已输出的段数
+
+    @property
+    def min_chunk_length(self) -> int:
+        """当前段的最小长度，更短的片段并入下一句"""
+        if self._segment_index == 0 and self.policy.first_clause_min_length is not None:
+            return self.policy.first_clause_min_length
+        lengths = self.policy.min_lengths
+        return lengths[min(self._segment_index, len(lengths) - 1)]
+
+    @property
+    def _current_pattern(self) -> re.Pattern:
+        """首段在自适应策略下额外允许子句边界"""
+        if self._segment_index == 0 and self.policy.first_clause_min_length is not None:
+            return self._clause_pattern
+        return self._pattern
+
     def add_chunk(self, text: str) -> List[str]:
         """
         添加文本块，返回完成的句子列表
-        
+
         Args:
             text: 新增的文本片段
-            
+
         Returns:
             List[str]: 已完成的句子列表
         """
+        deferred = self._scan_pos < len(self.buffer)
         self.buffer += text
+
+        # 快速路径：没有待定边界，且新文本不含任何分隔符，无需扫描
+        if not deferred and self._current_pattern.search(text) is None:
+            self._scan_pos = self._settled_pos(self.buffer)
+            return []
+
+        return self._extract_sentences()
+
+    def _extract_sentences(self) -> List[str]:
+        buffer = self.buffer
         completed = []
-        
+        start = 0
+        scan_pos = self._scan_pos
+
         while True:
-            # 找到第一个分隔符
-            earliest_pos = -1
-            earliest_delimiter = None
-            
-            for delimiter in self.sentence_delimiters:
-                pos = self.buffer.find(delimiter)
-                if pos != -1 and (earliest_pos == -1 or pos < earliest_pos):
-                    earliest_pos = pos
-                    earliest_delimiter = delimiter
-            
-            if earliest_pos == -1:
+            # 首段与后续段的边界规则不同，每次匹配前重新取当前规则
+            match = self._current_pattern.search(buffer, scan_pos)
+            if match is None:
+                scan_pos = self._settled_pos(buffer)
+                break
+
+            end = match.end()
+
+            # 边界紧贴缓冲区末尾：后续文本可能是数字、更多标点或闭合引号，等下一块再判断
+            if end == len(buffer):
+                scan_pos = match.start()
                 break
-            
-            # 提取句子（包含分隔符）
-            sentence = self.buffer[:earliest_pos + len(earliest_delimiter)].strip()
-            
-            # 移除已处理的部分
-            self.buffer = self.buffer[earliest_pos + len(earliest_delimiter):]
-            
-            # 过滤过短的片段
-            if len(sentence) >= self.min_chunk_length:
-                completed.append(sentence)
-        
+
+            scan_pos = end
+            if not self._is_boundary(buffer, match):
+                continue
+
+            sentence = buffer[start:end].strip()
+            # 过短的片段保留在缓冲区，与下一句合并
+            if len(sentence) < self.min_chunk_length:
+                continue
+
+            completed.append(sentence)
+            start = end
+            self._segment_index += 1
+
+        if start:
+            self.buffer = buffer[start:]
+            scan_pos -= start
+        self._scan_pos = scan_pos
+
         return completed
-    
-    def flush(self) -> str:
+
+    @staticmethod
+    def _settled_pos(buffer: str) -> int:
+        """已确认不含边界的位置（末尾单个换行可能与下一块组成空行，需要重新扫描）"""
+        return len(buffer) - 1 if buffer.endswith("\n") else len(buffer)
+
+    def _is_boundary(self, buffer: str, match: re.Match) -> bool:
+        """过滤小数点、千分位、时间与缩写中的 "." / "," / ":" """
+        first_char = buffer[match.start()]
+        if first_char not in ".,:":
+            return True
+
+        # 小数、千分位与时间：3.14 / 1,000 / 3:30
+        next_char = buffer[match.end()] if match.end() < len(buffer) else ""
+        prev_char = buffer[match.start() - 1] if match.start() > 0 else ""
+        if prev_char.isdigit() and next_char.isdigit():
+            return False
+
+        if first_char in ",:":
+            return True
+
+        # 缩写：Mr. / e.g. / 单字母首字母缩写 J. K.
+        word = _WORD_BEFORE_DOT.search(buffer, max(0, match.start() - 8), match.start())
+        if word:
+            token = word.group(1).lower()
+            if token in self._abbreviations or (len(token) == 1 and word.group(1).isupper()):
+                return False
+
+        return True
+
+    def flush(self) -> Optional[str]:
         """
         获取剩余的文本（在LLM结束时调用）
-        
+
         Returns:
-            str: 剩余文本，如果太短则返回None
+            Optional[str]: 剩余文本（包括过短的片段），只有标点或空白时返回 None
         """
         remaining = self.buffer.strip()
-        self.buffer = ""
-        
-        if remaining and len(remaining) >= self.min_chunk_length:
+        self.clear()
+
+        if remaining and any(ch.isalnum() for ch in remaining):
             return remaining
         return None
-    
+
     def clear(self):
         """清空缓冲区"""
         self.buffer = ""
+        self._scan_pos = 0
+        self._segment_index = 0
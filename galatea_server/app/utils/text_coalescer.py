@@ -0,0 +1,112 @@
+"""文本增量合并工具
+
+部分 LLM 服务每个 chunk 只返回一两个字，逐个转发会产生大量 WebSocket 帧。
+这里把增量按时间 / 长度窗口合并后再发送，第一个增量总是立即发送，
+不影响首字延迟。
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional
+
+
+@dataclass(frozen=True)
+class TextFlushWindow:
+    """
+    文本增量的发送窗口
+
+    - interval_ms: 距上次发送超过该时间就发送（0 表示不合并，逐个发送）
+    - max_chars: 积攒的文字达到该长度就发送
+    """
+    interval_ms: int = 50
+    max_chars: int = 32
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval_ms > 0 and self.max_chars > 1
+
+
+class TextDeltaCoalescer:
+    """
+    按窗口合并文本增量
+
+    add() 返回需要立即发送的文本；窗口内没有新增量时，
+    调用方在 time_left() 到期后调用 pop() 取出积攒的文本
+    """
+
+    def __init__(self, window: TextFlushWindow):
+        self.window = window
+        self._pending = ""
+        self._last_flush: Optional[float] = None  # None 表示还没发送过（下一个增量立即发送）
+        self.received_count = 0
+        self.flushed_count = 0
+
+    def add(self, text: str) -> Optional[str]:
+        """
+        加入一个增量
+
+        Returns:
+            需要立即发送的文本；None 表示继续积攒
+        """
+        if not text:
+            return None
+        self.received_count += 1
+        self._pending += text
+        if (
+            self._last_flush is None
+            or not self.window.enabled
+            or len(self._pending) >= self.window.max_chars
+            or self.time_left() == 0
+        ):
+            return self.pop()
+        return None
+
+    def pop(self) -> str:
+        """取出积攒的文本（可能为空）"""
+        text, self._pending = self._pending, ""
+        if text:
+            self._last_flush = time.monotonic()
+            self.flushed_count += 1
+        return text
+
+    def time_left(self) -> Optional[float]:
+        """积攒的文本还能等待多久（秒）；没有积攒的文本时返回 None"""
+        if not self._pending or self._last_flush is None:
+            return None
+        elapsed = time.monotonic() - self._last_flush
+        return max(0.0, self.window.interval_ms / 1000 - elapsed)
+
+
+async def iterate_with_deadline(
+    stream: AsyncIterator[str],
+    time_left: Callable[[], Optional[float]]
+) -> AsyncIterator[Optional[str]]:
+    """
+    迭代 stream，等待下一个元素超过 time_left() 时先产出 None
+
+    等待中的读取不会被超时打断，下次迭代继续等待同一个元素；
+    生成器关闭时取消未完成的读取，之后 stream 可以安全关闭
+
+    Args:
+        stream: 异步文本流
+        time_left: 返回当前最长等待时间（秒），None 表示无限等待
+    """
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(stream))
+            done, _ = await asyncio.wait({pending}, timeout=time_left())
+            if not done:
+                yield None
+                continue
+            future, pending = pending, None
+            try:
+                item = future.result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.wait({pending})
@@ -0,0 +1,77 @@
+"""本地 token 估算工具
+
+上下文窗口按 token 预算裁剪历史，只需要估算值，不需要与服务端完全一致。
+估算器按名称注册，可通过配置 TOKEN_ESTIMATOR 切换，也可以注册自定义估算器。
+"""
+import re
+from typing import Callable, Dict
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+TokenEstimator = Callable[[str], int]
+
+# 每条消息的固定开销（role、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# 中日韩文字与全角标点：大致每个字 1 个 token
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def estimate_tokens_heuristic(text: str) -> int:
+    """中日韩文字每字 1 token，其余文字约 4 字符 1 token"""
+    if not text:
+        return 0
+    rest = _CJK_RE.sub("", text)
+    return (len(text) - len(rest)) + (len(rest) + 3) // 4
+
+
+def estimate_tokens_chars(text: str) -> int:
+    """每字符 1 token（最保守的估算）"""
+    return len(text)
+
+
+def _tiktoken_estimator() -> TokenEstimator:
+    """使用 tiktoken 精确计数（可选依赖，未安装时回退到启发式估算）"""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("⚠️ 未安装 tiktoken，token 估算回退到 heuristic")
+        return estimate_tokens_heuristic
+
+    encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+_ESTIMATORS: Dict[str, TokenEstimator] = {
+    "heuristic": estimate_tokens_heuristic,
+    "chars": estimate_tokens_chars,
+}
+_FACTORIES: Dict[str, Callable[[], TokenEstimator]] = {
+    "tiktoken": _tiktoken_estimator,
+}
+
+
+def register_token_estimator(name: str, estimator: TokenEstimator):
+    """注册自定义估算器"""
+    _ESTIMATORS[name] = estimator
+
+
+def get_token_estimator(name: str) -> TokenEstimator:
+    """
+    按名称获取估算器
+
+    Args:
+        name: 估算器名称（heuristic / chars / tiktoken 或已注册的自定义名称）
+
+    Returns:
+        估算函数；名称未知时返回 heuristic
+    """
+    if name not in _ESTIMATORS and name in _FACTORIES:
+        _ESTIMATORS[name] = _FACTORIES[name]()
+    estimator = _ESTIMATORS.get(name)
+    if estimator is None:
+        logger.warning(f"⚠️ 未知的 token 估算器 {name}，使用 heuristic")
+        return estimate_tokens_heuristic
+    return estimator
@@ -0,0 +1,69 @@
+"""上下文窗口前缀稳定性基准
+
+模拟一段长对话，统计每次 LLM 请求中与上一次请求逐字节相同的 prompt 前缀
+（服务端前缀缓存能命中的上限），对比 sliding 与 block 两种窗口模式。
+
+运行方式（在 galatea_server 目录下）：
+    python -m benchmarks.bench_context_window
+"""
+import random
+from typing import Dict, List
+
+from app.infrastructure.managers.session_manager import ChatSession
+from app.utils.token_estimator import MESSAGE_OVERHEAD_TOKENS, estimate_tokens_heuristic
+
+SYSTEM_PROMPT = "你是一个温柔的角色扮演助手。" * 40
+TURNS = 200
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens_heuristic(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def common_prefix_tokens(previous: List[Dict[str, str]], current: List[Dict[str, str]]) -> int:
+    """两次请求逐条相同的前缀消息的 token 数"""
+    tokens = 0
+    for old, new in zip(previous, current):
+        if old != new:
+            break
+        tokens += message_tokens(new)
+    return tokens
+
+
+def simulate(window_mode: str, seed: int = 0) -> Dict[str, float]:
+    rng = random.Random(seed)
+    session = ChatSession(
+        session_id="bench",
+        character="bench",
+        system_prompt=SYSTEM_PROMPT,
+        token_budget=3000,
+        window_mode=window_mode
+    )
+    previous: List[Dict[str, str]] = []
+    prompt_total = cacheable_total = 0
+    for turn in range(TURNS):
+        session.add_message("user", f"第{turn}轮的问题" * rng.randint(1, 6))
+        request = session.get_messages()
+        prompt_total += sum(message_tokens(m) for m in request)
+        cacheable_total += common_prefix_tokens(previous, request)
+        session.add_message("assistant", "这是一段回答。" * rng.randint(2, 40))
+        previous = request
+    return {
+        "prompt_tokens": prompt_total / TURNS,
+        "cacheable_ratio": cacheable_total / prompt_total,
+        "evicted": session.evicted_messages,
+    }
+
+
+def main():
+    print(f"{'模式':<8} {'平均 prompt tokens':>18} {'可缓存前缀占比':>14} {'移出消息数':>10}")
+    for mode in ("sliding", "block"):
+        result = simulate(mode)
+        print(
+            f"{mode:<8} {result['prompt_tokens']:>18.0f} "
+            f"{result['cacheable_ratio']:>14.1%} {result['evicted']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
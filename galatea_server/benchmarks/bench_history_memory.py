@@ -0,0 +1,98 @@
+"""会话消息存储的内存基准
+
+对比两种表示：
+- dict：每条消息一个 {"role", "content"} dict，窗口 list + 与之对应的 token 数 list，
+  保留完整记录时另有一个 transcript list（与窗口共享 dict）
+- MessageLog：role 编码 bytearray + content list + token 数 array('I')
+
+消息文本在开始统计前就已创建，两种表示共享同一批字符串，
+"结构开销"只统计表示本身分配的内存；同时给出包含文本在内的每条消息字节数。
+
+运行方式（在 galatea_server 目录下）：
+    python -m benchmarks.bench_history_memory
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+from app.utils.message_log import MessageLog
+from app.utils.token_estimator import MESSAGE_OVERHEAD_TOKENS, estimate_tokens_heuristic
+
+VOCABULARY = "我们今天明天去公园散步天气很好你觉得怎么样猫狗火锅爬山上海工作周末电影音乐咖啡学习考试旅行"
+
+
+def make_contents(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choice(VOCABULARY) for _ in range(rng.randint(10, 200))) for _ in range(count)]
+
+
+def build_dicts(contents: List[str]):
+    history, token_counts, transcript = [{"role": "system", "content": "persona"}], [0], []
+    for i, content in enumerate(contents):
+        message = {"role": "user" if i % 2 == 0 else "assistant", "content": content}
+        history.append(message)
+        token_counts.append(estimate_tokens_heuristic(content) + MESSAGE_OVERHEAD_TOKENS)
+        transcript.append(message)
+    return history, token_counts, transcript
+
+
+def build_log(contents: List[str]):
+    log = MessageLog()
+    for i, content in enumerate(contents):
+        log.append("user" if i % 2 == 0 else "assistant", content, estimate_tokens_heuristic(content) + MESSAGE_OVERHEAD_TOKENS)
+    return log
+
+
+def measure(build: Callable, sessions: List[List[str]]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = [build(contents) for contents in sessions]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del built
+    return used
+
+
+def time_request(messages, rounds: int = 200) -> float:
+    """构建一次请求并完整遍历（SDK 序列化时的访问方式）的平均耗时（微秒）"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages():
+            message["role"], message["content"]
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+def main():
+    session_count, per_session = 200, 500
+    sessions = [make_contents(per_session, seed=i) for i in range(session_count)]
+    total = session_count * per_session
+    text_bytes = sum(len(content.encode("utf-8")) for contents in sessions for content in contents)
+    text_memory = sum(sys.getsizeof(content) for contents in sessions for content in contents)
+
+    dict_bytes = measure(build_dicts, sessions)
+    log_bytes = measure(build_log, sessions)
+
+    print(f"{session_count} 个会话 × {per_session} 条消息 (文本 UTF-8 {text_bytes / 1024 / 1024:.1f} MB)")
+    print(f"{'表示':<12} {'结构开销 B/条':>14} {'含文本 B/条':>12} {'总计 MB':>9}")
+    for name, used in (("dict", dict_bytes), ("MessageLog", log_bytes)):
+        print(f"{name:<12} {used / total:>14.1f} {(used + text_memory) / total:>12.1f} {(used + text_memory) / 1024 / 1024:>9.1f}")
+
+    # 每轮请求：ChatSession 为窗口另存一份 dict 列表，get_messages() 只做浅复制；
+    # 对照每轮从 MessageLog 重新生成窗口的 dict
+    history, _, _ = build_dicts(sessions[0][-40:])
+    log = build_log(sessions[0][-40:])
+    head = ({"role": "system", "content": "persona"},)
+    window = log.messages(log.first_seq, log.end_seq)
+    copy_us = time_request(lambda: [*head, *window])
+    rebuild_us = time_request(lambda: [*head, *log.messages(log.first_seq, log.end_seq)])
+    print(f"\n40 条窗口的请求构建 + 遍历: 窗口 list 复制 {copy_us:.1f}us, 每轮重新生成 {rebuild_us:.1f}us")
+    window_bytes = measure(lambda contents: build_dicts(contents)[0], [contents[-40:] for contents in sessions])
+    print(f"40 条窗口 dict 列表的额外占用: {window_bytes / session_count:.0f} B/会话")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""WebSocket 消息编码基准
+
+对比旧路径（每个接收方各自 model_dump_json，状态与 Unity 音频经 model_dump()
+转 dict 后再校验进外层模型）与 message_codec（预生成外层前缀、直接编码 Payload、
+每次广播只编码一次）的单条消息耗时，并校验两种路径的输出逐字节一致。
+
+运行方式（在 galatea_server 目录下）：
+    python -m benchmarks.bench_message_codec
+"""
+import base64
+import json
+import time
+from typing import Callable
+
+from app.schemas import unity_protocol as unity
+from app.schemas import web_protocol as web
+from app.schemas.message_codec import encode_unity_payload, encode_web_message, encode_web_payload
+from app.services.agent_service import create_status_message, create_text_stream_message
+
+TIMESTAMP = 1760000000.123456
+RECIPIENTS = (1, 4, 16)
+
+
+def bench(fn: Callable[[], object], number: int = 20000, repeat: int = 5) -> float:
+    """返回单次调用耗时（微秒，取多轮最小值）"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / number * 1e6
+
+
+# ==================== 文本增量 ====================
+
+def legacy_text_stream(recipients: int):
+    message = web.WebServerMessage(
+        type=web.WebServerMessageType.AI_TEXT_STREAM,
+        data=web.AITextStreamPayload(text="你好，", is_finish=False, message_id="m-1", session_id="s-1"),
+        timestamp=TIMESTAMP
+    )
+    for _ in range(recipients):
+        message.model_dump_json()
+
+
+def codec_text_stream(recipients: int):
+    encode_web_message(create_text_stream_message("你好，", is_finish=False, message_id="m-1", session_id="s-1"))
+
+
+# ==================== 状态 ====================
+
+def legacy_status(recipients: int):
+    message = web.WebServerMessage(
+        type=web.WebServerMessageType.AI_STATUS,
+        data=web.AIStatusPayload(status="thinking", message="思考中...").model_dump(),
+        timestamp=TIMESTAMP
+    )
+    for _ in range(recipients):
+        message.model_dump_json()
+
+
+def codec_status(recipients: int):
+    encode_web_message(create_status_message("thinking", "思考中..."))
+
+
+# ==================== 音频帧（4KB PCM） ====================
+
+AUDIO_B64 = base64.b64encode(bytes(4096)).decode("utf-8")
+
+
+def legacy_unity_audio(recipients: int):
+    message = unity.UnityBaseMessage(
+        type=unity.UnityMessageType.AUDIO_CHUNK,
+        data=unity.AudioChunkPayload(
+            sentence_index=0, chunk_index=3, audio_data=AUDIO_B64,
+            sample_rate=32000, chunk_size=4096, session_id="s-1", message_id="m-1"
+        ).model_dump(),
+        timestamp=TIMESTAMP
+    )
+    for _ in range(recipients):
+        message.model_dump_json()
+
+
+def codec_unity_audio(recipients: int):
+    encode_unity_payload(
+        unity.UnityMessageType.AUDIO_CHUNK,
+        unity.AudioChunkPayload(
+            sentence_index=0, chunk_index=3, audio_data=AUDIO_B64,
+            sample_rate=32000, chunk_size=4096, session_id="s-1", message_id="m-1"
+        ),
+        TIMESTAMP
+    )
+
+
+def legacy_web_audio(recipients: int):
+    message = web.WebServerMessage(
+        type=web.WebServerMessageType.AUDIO_FRAME,
+        data=web.AudioFramePayload(
+            sentence_index=0, chunk_index=3, audio_data=AUDIO_B64, session_id="s-1", message_id="m-1"
+        ),
+        timestamp=TIMESTAMP
+    )
+    for _ in range(recipients):
+        message.model_dump_json()
+
+
+def codec_web_audio(recipients: int):
+    encode_web_payload(
+        web.WebServerMessageType.AUDIO_FRAME,
+        web.AudioFramePayload(
+            sentence_index=0, chunk_index=3, audio_data=AUDIO_B64, session_id="s-1", message_id="m-1"
+        ),
+        TIMESTAMP
+    )
+
+
+# ==================== 接收 ====================
+
+RAW_USER_MESSAGE = json.dumps({
+    "type": "user_message",
+    "session_id": "s-1",
+    "data": {"content": "今天天气怎么样？", "enable_audio": True},
+    "timestamp": TIMESTAMP
+}, ensure_ascii=False)
+
+
+def legacy_receive():
+    web.WebClientMessage(**json.loads(RAW_USER_MESSAGE))
+
+
+def codec_receive():
+    web.WebClientMessage.model_validate_json(RAW_USER_MESSAGE)
+
+
+def check_equivalence():
+    """快速编码的输出必须与 pydantic 一致"""
+    samples = [
+        web.WebServerMessage(
+            type=web.WebServerMessageType.AI_TEXT_STREAM,
+            data=web.AITextStreamPayload(
+                text='引号"反斜杠\\换行\n控制\x01 emoji 😀', is_finish=True,
+                message_id="m-1", session_id="s-1", truncated=True
+            ),
+            timestamp=TIMESTAMP
+        ),
+        web.WebServerMessage(
+            type=web.WebServerMessageType.AUDIO_CHUNK,
+            data=web.AudioChunkPayload(sentence_index=2, audio_data=AUDIO_B64, sample_rate=32000, duration=1 / 3),
+            timestamp=TIMESTAMP
+        ),
+    ]
+    for message in samples:
+        assert encode_web_message(message) == message.model_dump_json(), message.type
+
+    payload = unity.AudioCompletePayload(sentence_index=1, text="你好", audio_data=AUDIO_B64, total_bytes=4096)
+    expected = unity.UnityBaseMessage(
+        type=unity.UnityMessageType.AUDIO_COMPLETE, data=payload.model_dump(), timestamp=TIMESTAMP
+    ).model_dump_json()
+    assert encode_unity_payload(unity.UnityMessageType.AUDIO_COMPLETE, payload, TIMESTAMP) == expected
+
+
+def main():
+    check_equivalence()
+    print("✅ 快速编码输出与 pydantic 一致\n")
+
+    cases = [
+        ("文本增量", legacy_text_stream, codec_text_stream),
+        ("状态", legacy_status, codec_status),
+        ("Web 音频帧", legacy_web_audio, codec_web_audio),
+        ("Unity 音频帧", legacy_unity_audio, codec_unity_audio),
+    ]
+    print(f"{'消息类型':<12} {'接收方':>6} {'旧路径 us':>10} {'codec us':>10} {'加速':>6}")
+    for name, legacy, codec in cases:
+        for recipients in RECIPIENTS:
+            legacy_us = bench(lambda: legacy(recipients), number=5000)
+            codec_us = bench(lambda: codec(recipients), number=5000)
+            print(f"{name:<12} {recipients:>6} {legacy_us:>10.2f} {codec_us:>10.2f} {legacy_us / codec_us:>5.1f}x")
+
+    legacy_us = bench(legacy_receive)
+    codec_us = bench(codec_receive)
+    print(f"\n{'接收 user_message':<12} {'':>6} {legacy_us:>10.2f} {codec_us:>10.2f} {legacy_us / codec_us:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""早期对话召回（BM25）延迟基准
+
+模拟不同长度的会话记录，测量每条消息的索引耗时与每次召回的耗时。
+
+运行方式（在 galatea_server 目录下）：
+    python -m benchmarks.bench_recall
+"""
+import random
+import time
+from typing import List
+
+from app.utils.bm25_index import BM25Index
+
+VOCABULARY = "我们今天明天去公园散步天气很好你觉得怎么样猫狗火锅爬山上海工作周末电影音乐咖啡学习考试旅行"
+
+
+def make_messages(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choice(VOCABULARY) for _ in range(rng.randint(10, 120))) for _ in range(count)]
+
+
+def main():
+    queries = make_messages(200, seed=1)
+    print(f"{'消息数':>8} {'索引 us/条':>12} {'召回 p50 ms':>12} {'召回 p99 ms':>12}")
+    for count in (100, 1000, 5000, 20000):
+        messages = make_messages(count)
+        index = BM25Index()
+        started = time.perf_counter()
+        for doc_id, text in enumerate(messages):
+            index.add(doc_id, text)
+        add_us = (time.perf_counter() - started) / count * 1e6
+
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, k=3, max_doc_id=count - 20)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"{count:>8} {add_us:>12.1f} {p50:>12.2f} {p99:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""TextBuffer 分句性能基准
+
+对比旧实现（每个 token 对 7 个分隔符从头 str.find，并逐句重切缓冲区）
+与增量分句器的单 token 耗时。
+
+运行方式（在 galatea_server 目录下）：
+    python -m benchmarks.bench_text_buffer
+"""
+import random
+import time
+from typing import List
+
+from app.utils.text_buffer import TextBuffer
+
+
+class LegacyTextBuffer:
+    """旧版 TextBuffer.add_chunk 的原样实现（仅用于对比）"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.sentence_delimiters = ["。", "！", "？", ".", "!", "?", "\n\n"]
+        self.min_chunk_length = 5
+
+    def add_chunk(self, text: str) -> List[str]:
+        self.buffer += text
+        completed = []
+        while True:
+            earliest_pos = -1
+            earliest_delimiter = None
+            for delimiter in self.sentence_delimiters:
+                pos = self.buffer.find(delimiter)
+                if pos != -1 and (earliest_pos == -1 or pos < earliest_pos):
+                    earliest_pos = pos
+                    earliest_delimiter = delimiter
+            if earliest_pos == -1:
+                break
+            sentence = self.buffer[:earliest_pos + len(earliest_delimiter)].strip()
+            self.buffer = self.buffer[earliest_pos + len(earliest_delimiter):]
+            if len(sentence) >= self.min_chunk_length:
+                completed.append(sentence)
+        return completed
+
+
+def make_tokens(sentence_length: int, sentences: int, seed: int = 0) -> List[str]:
+    """生成模拟 LLM 流式输出的 token（每个 1~3 个字符）"""
+    rng = random.Random(seed)
+    alphabet = "我们今天去公园散步天气很好你觉得怎么样"
+    text = "".join(
+        "".join(rng.choice(alphabet) for _ in range(sentence_length)) + rng.choice("。！？")
+        for _ in range(sentences)
+    )
+    tokens = []
+    i = 0
+    while i < len(text):
+        step = rng.randint(1, 3)
+        tokens.append(text[i:i + step])
+        i += step
+    return tokens
+
+
+def bench(factory, tokens: List[str], repeat: int = 20) -> float:
+    """返回单 token 平均耗时（微秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        buffer = factory()
+        started = time.perf_counter()
+        for token in tokens:
+            buffer.add_chunk(token)
+        best = min(best, time.perf_counter() - started)
+    return best / len(tokens) * 1e6
+
+
+def main():
+    print(f"{'句长':>6} {'句数':>6} {'token数':>8} {'旧实现 us/token':>16} {'增量分句 us/token':>18}")
+    for sentence_length in (10, 50, 200, 1000, 5000):
+        tokens = make_tokens(sentence_length, sentences=20)
+        legacy = bench(LegacyTextBuffer, tokens)
+        current = bench(TextBuffer, tokens)
+        print(f"{sentence_length:>6} {20:>6} {len(tokens):>8} {legacy:>16.3f} {current:>18.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""ChatSession 早期对话召回"""
+from app.infrastructure.managers.session_manager import ChatSession
+from app.utils.bm25_index import BM25Index
+
+FACT = "我的猫叫咪咪，它是一只橘猫"
+QUERY = "你还记得我的猫叫什么吗？"
+
+
+def make_session() -> ChatSession:
+    session = ChatSession(
+        session_id="s", character="c", system_prompt="sys",
+        token_budget=300, recall_index=BM25Index()
+    )
+    session.add_message("user", FACT)
+    session.add_message("assistant", "记住了，咪咪。")
+    for i in range(30):
+        session.add_message("user", f"随便聊聊第{i}件事")
+        session.add_message("assistant", "嗯嗯，好的呢" * 3)
+    return session
+
+
+def test_recall_finds_evicted_message():
+    session = make_session()
+    session.add_message("user", QUERY)
+    session.build_request(QUERY)
+    assert session.last_request_context.recalled_messages > 0
+
+
+def test_recall_returns_nothing_after_clear_history():
+    session = make_session()
+    session.clear_history()
+    for i in range(30):
+        session.add_message("user", f"清空之后的第{i}句")
+        session.add_message("assistant", "好的" * 3)
+    session.add_message("user", QUERY)
+    messages = list(session.build_request(QUERY))
+    assert session.last_request_context.recalled_messages == 0
+    assert all(FACT not in message["content"] for message in messages)
@@ -0,0 +1,27 @@
+"""ChatSession 从存储恢复消息"""
+from app.infrastructure.managers.session_manager import ChatSession
+from app.infrastructure.persistence.session_store import StoredMessage
+
+
+def make_session() -> ChatSession:
+    return ChatSession(session_id="s", character="c", system_prompt="sys", token_budget=10_000)
+
+
+def test_restore_keeps_stored_seqs():
+    session = make_session()
+    messages = [StoredMessage(seq, "user", f"第{seq}句") for seq in range(5, 9)]
+    session.restore(messages, window_start=5, message_count=9)
+    assert session.message_count == 9
+    assert [m.seq for m in session.transcript_slice(0, 9)] == [5, 6, 7, 8]
+
+
+def test_restore_skips_messages_before_a_seq_gap():
+    session = make_session()
+    # 序号 3、4 的写入批次被丢弃
+    messages = [StoredMessage(seq, "user", f"第{seq}句") for seq in (0, 1, 2, 5, 6)]
+    session.restore(messages, window_start=0, message_count=7)
+    assert session.window_start == 5
+    assert session.message_count == 7
+    assert [(m.seq, m.content) for m in session.transcript_slice(0, 7)] == [(5, "第5句"), (6, "第6句")]
+    session.add_message("user", "新消息")
+    assert session.transcript_slice(7, 8)[0].seq == 7
@@ -0,0 +1,111 @@
+"""ConnectionWriter 队列策略"""
+import asyncio
+
+from app.infrastructure.managers.connection_writer import ConnectionWriter, OutgoingMessage, SendPolicy
+
+
+class StuckSocket:
+    """第一条消息之后的发送一直阻塞，模拟跟不上的客户端"""
+
+    def __init__(self):
+        self.sent = []
+        self.unblock = asyncio.Event()
+
+    async def send_text(self, data: str):
+        self.sent.append(data)
+        await self.unblock.wait()
+
+    async def send_bytes(self, data: bytes):
+        await self.send_text(data)
+
+
+def make_writer(**kwargs):
+    overflows = []
+
+    async def on_overflow(websocket, reason):
+        overflows.append(reason)
+
+    writer = ConnectionWriter(
+        StuckSocket(), on_overflow,
+        coalesce=lambda older, newer: older + newer, encode=lambda message: message,
+        **kwargs
+    )
+    return writer, overflows
+
+
+async def occupy(writer: ConnectionWriter):
+    """发出一条消息让写任务停在发送上，之后的消息都留在队列里"""
+    await writer.put(OutgoingMessage(SendPolicy.BLOCK, data="head"))
+    await asyncio.sleep(0)
+
+
+def text_delta(text: str) -> OutgoingMessage:
+    return OutgoingMessage(SendPolicy.COALESCE, data=text, message=text, coalesce_key="m")
+
+
+def test_coalesced_deltas_count_toward_the_byte_budget():
+    async def main():
+        writer, overflows = make_writer(max_bytes=25)
+        await occupy(writer)
+        for _ in range(3):
+            await writer.put(text_delta("abcde"))
+        assert writer.stats()["depth"] == 1
+        assert writer.stats()["coalesced"] == 2
+        assert writer.queued_bytes == 15
+        await writer.put(OutgoingMessage(SendPolicy.NEVER_DROP, data=b"x" * 12))
+        assert overflows == ["音频积压超出预算"]
+        writer.close()
+
+    asyncio.run(main())
+
+
+def test_merged_delta_is_sent_once_with_all_text():
+    async def main():
+        writer, _ = make_writer()
+        await occupy(writer)
+        await writer.put(text_delta("ab"))
+        await writer.put(text_delta("cd"))
+        writer.websocket.unblock.set()
+        await asyncio.sleep(0.01)
+        assert writer.websocket.sent == ["head", "abcd"]
+        assert writer.queued_bytes == 0
+        writer.close()
+
+    asyncio.run(main())
+
+
+def test_drop_oldest_discards_the_oldest_droppable_message():
+    async def main():
+        writer, overflows = make_writer(max_messages=2)
+        await occupy(writer)
+        for data in ("1", "2", "3"):
+            await writer.put(OutgoingMessage(SendPolicy.DROP_OLDEST, data=data))
+        assert [item.data for item in writer.queue] == ["2", "3"]
+        assert writer.dropped_count == 1 and not overflows
+        writer.close()
+
+    asyncio.run(main())
+
+
+def test_block_policy_overflows_after_the_timeout():
+    async def main():
+        writer, overflows = make_writer(max_messages=1, block_timeout=0.01)
+        await occupy(writer)
+        await writer.put(OutgoingMessage(SendPolicy.BLOCK, data="1"))
+        await writer.put(OutgoingMessage(SendPolicy.BLOCK, data="2"))
+        assert len(overflows) == 1
+        writer.close()
+
+    asyncio.run(main())
+
+
+def test_never_drop_ignores_the_message_limit():
+    async def main():
+        writer, overflows = make_writer(max_messages=1)
+        await occupy(writer)
+        for _ in range(3):
+            await writer.put(OutgoingMessage(SendPolicy.NEVER_DROP, data=b"pcm"))
+        assert len(writer.queue) == 3 and not overflows
+        writer.close()
+
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""ReorderBuffer 重排与窗口"""
+import asyncio
+
+from app.utils.reorder_buffer import ReorderBuffer
+
+
+def test_results_are_released_in_order_and_failures_skipped():
+    buffer = ReorderBuffer(start_index=3)
+    buffer.put(4, "b")
+    assert buffer.pop_ready() == []
+    buffer.put(3, "a")
+    buffer.put(5, None)
+    buffer.put(6, "d")
+    assert buffer.pop_ready() == [(3, "a"), (4, "b"), (6, "d")]
+    assert len(buffer) == 0 and buffer.next_index == 7
+
+
+def test_window_blocks_the_producer_until_the_head_is_released():
+    async def main():
+        buffer = ReorderBuffer(window=2)
+        await buffer.wait_for_slot(0)
+        await buffer.wait_for_slot(1)
+        waiting = asyncio.create_task(buffer.wait_for_slot(2))
+        await asyncio.sleep(0)
+        buffer.put(1, "b")
+        buffer.pop_ready()
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        buffer.put(0, "a")
+        assert buffer.pop_ready() == [(0, "a"), (1, "b")]
+        await asyncio.wait_for(waiting, 1)
+
+    asyncio.run(main())
+
+
+def test_pending_results_stay_within_the_window():
+    async def main():
+        buffer, peak = ReorderBuffer(window=3), 0
+
+        async def work(index: int):
+            nonlocal peak
+            await asyncio.sleep(0.05 if index == 0 else 0)
+            buffer.put(index, index)
+            peak = max(peak, len(buffer))
+            buffer.pop_ready()
+
+        tasks = []
+        for index in range(20):
+            await buffer.wait_for_slot(index)
+            tasks.append(asyncio.create_task(work(index)))
+        await asyncio.gather(*tasks)
+        assert peak <= 3 and buffer.next_index == 20
+
+    asyncio.run(main())
@@ -0,0 +1,25 @@
+"""TextBuffer 句子边界"""
+from app.utils.text_buffer import TextBuffer
+
+
+def feed(buffer: TextBuffer, text: str, chunk_size: int = 3):
+    sentences = []
+    for i in range(0, len(text), chunk_size):
+        sentences += buffer.add_chunk(text[i:i + chunk_size])
+    tail = buffer.flush()
+    return sentences + ([tail] if tail else [])
+
+
+def test_adaptive_first_clause_does_not_split_times():
+    sentences = feed(TextBuffer("en", "adaptive"), "Let's meet at 3:30 tomorrow, okay? Sounds good to me.")
+    assert sentences[0] == "Let's meet at 3:30 tomorrow,"
+
+
+def test_adaptive_first_clause_splits_on_colon_before_words():
+    sentences = feed(TextBuffer("en", "adaptive"), "Here is the plan: we leave early. Then we rest.")
+    assert sentences[0] == "Here is the plan:"
+
+
+def test_decimals_and_abbreviations_stay_in_one_sentence():
+    sentences = feed(TextBuffer("en"), "Mr. Smith paid 3.50 dollars. He left.")
+    assert sentences == ["Mr. Smith paid 3.50 dollars.", "He left."]
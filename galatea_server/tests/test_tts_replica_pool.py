@@ -0,0 +1,78 @@
+"""TTSReplicaPool 权重切换"""
+import asyncio
+
+import pytest
+
+from app.exceptions.tts import TTSException
+from app.infrastructure.managers.tts_replica_pool import TTSReplicaPool
+from app.schemas.character import VoiceConfig
+
+VOICE = VoiceConfig(gpt_model="a.ckpt", sovits_model="a.pth", reference_audio="a.wav")
+
+
+def make_pool() -> TTSReplicaPool:
+    return TTSReplicaPool(["http://replica"], warmup_enabled=False)
+
+
+async def load_instantly(replica, weights):
+    replica.gpt_weights_path = weights.gpt_path
+    replica.sovits_weights_path = weights.sovits_path
+
+
+async def use(pool: TTSReplicaPool):
+    async with pool.acquire("c", VOICE) as replica:
+        return replica
+
+
+def test_cancel_during_switch_releases_the_replica():
+    async def main():
+        pool = make_pool()
+        switching = asyncio.Event()
+
+        async def load_slowly(replica, weights):
+            switching.set()
+            await asyncio.sleep(10)
+
+        pool._load_weights = load_slowly
+        task = asyncio.create_task(use(pool))
+        await switching.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert pool.status()[0]["switching"] is False
+        assert pool.replicas[0].is_healthy  # 取消不是后端故障，不进入冷却
+        pool._load_weights = load_instantly
+        await asyncio.wait_for(use(pool), 1)
+
+    asyncio.run(main())
+
+
+def test_failed_switch_puts_the_replica_in_cooldown():
+    async def main():
+        pool = make_pool()
+
+        async def load_failing(replica, weights):
+            raise TTSException(message="set_gpt_weights 调用失败")
+
+        pool._load_weights = load_failing
+        with pytest.raises(TTSException):
+            await use(pool)
+        assert pool.replicas[0].switching_to is None
+        assert not pool.replicas[0].is_healthy
+
+    asyncio.run(main())
+
+
+def test_ensure_loaded_skips_loaded_weights_without_waiting():
+    async def main():
+        pool = make_pool()
+        pool._load_weights = load_instantly
+        await use(pool)
+        async with pool.acquire("c", VOICE):
+            # 副本正忙也不等待
+            replica = await asyncio.wait_for(pool.ensure_loaded("c", VOICE), 1)
+        assert replica is pool.replicas[0]
+        assert pool.skipped_switches == 1
+
+    asyncio.run(main())
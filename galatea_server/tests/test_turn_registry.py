@@ -0,0 +1,170 @@
+"""TurnRegistry 准入策略与防抖"""
+import asyncio
+
+from app.infrastructure.managers.turn_registry import AdmissionPolicy, DebounceMode, TurnRegistry
+
+
+class Recorder:
+    """记录每轮收到的用户消息；release 之前每轮都停在执行中"""
+
+    def __init__(self):
+        self.started = []
+        self.finished = []
+        self.cancelled = []
+        self.release = asyncio.Event()
+
+    async def run(self, text: str):
+        self.started.append(text)
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled.append(text)
+            raise
+        self.finished.append(text)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_turns_of_one_session_run_one_at_a_time():
+    async def main():
+        registry, recorder = TurnRegistry(policy=AdmissionPolicy.QUEUE), Recorder()
+        first = registry.submit("s", "a", recorder.run)
+        second = registry.submit("s", "b", recorder.run)
+        await settle()
+        assert recorder.started == ["a"]
+        assert second.position == 1
+        recorder.release.set()
+        await asyncio.gather(first.task, second.task)
+        assert recorder.finished == ["a", "b"]
+        assert not registry.is_active("s")
+
+    asyncio.run(main())
+
+
+def test_queue_policy_rejects_when_pending_is_full():
+    async def main():
+        registry, recorder = TurnRegistry(policy=AdmissionPolicy.QUEUE, max_pending=1), Recorder()
+        registry.submit("s", "a", recorder.run)
+        await settle()
+        assert registry.submit("s", "b", recorder.run).accepted
+        rejected = registry.submit("s", "c", recorder.run)
+        assert not rejected.accepted and registry.rejected_count == 1
+        await registry.cancel("s", drop_pending=True)
+
+    asyncio.run(main())
+
+
+def test_merge_policy_folds_messages_into_the_waiting_turn():
+    async def main():
+        registry, recorder = TurnRegistry(policy=AdmissionPolicy.MERGE), Recorder()
+        registry.submit("s", "a", recorder.run)
+        await settle()
+        registry.submit("s", "b", recorder.run)
+        merged = registry.submit("s", "c", recorder.run)
+        assert merged.merged
+        recorder.release.set()
+        await merged.task
+        assert recorder.finished == ["a", "b\nc"]
+
+    asyncio.run(main())
+
+
+def test_reject_policy_rejects_while_busy():
+    async def main():
+        registry, recorder = TurnRegistry(policy=AdmissionPolicy.REJECT), Recorder()
+        registry.submit("s", "a", recorder.run)
+        await settle()
+        assert not registry.submit("s", "b", recorder.run).accepted
+        assert registry.submit("other", "c", recorder.run).accepted
+        await registry.cancel("s")
+        await registry.cancel("other")
+
+    asyncio.run(main())
+
+
+def test_interrupt_policy_cancels_the_running_turn():
+    async def main():
+        registry, recorder = TurnRegistry(policy=AdmissionPolicy.INTERRUPT), Recorder()
+        registry.submit("s", "a", recorder.run)
+        await settle()
+        admission = registry.submit("s", "b", recorder.run)
+        await settle()
+        assert recorder.cancelled == ["a"]
+        assert recorder.started == ["a", "b"]
+        recorder.release.set()
+        await admission.task
+        assert recorder.finished == ["b"]
+
+    asyncio.run(main())
+
+
+def test_debounce_merge_combines_messages_within_the_window():
+    async def main():
+        registry = TurnRegistry(debounce=0.05, debounce_mode=DebounceMode.MERGE)
+        recorder = Recorder()
+        recorder.release.set()
+        registry.submit("s", "a", recorder.run)
+        await asyncio.sleep(0.01)
+        admission = registry.submit("s", "b", recorder.run)
+        await admission.task
+        assert recorder.finished == ["a\nb"]
+        assert registry.debounced_count == 1
+
+    asyncio.run(main())
+
+
+def test_debounce_restart_marks_the_superseded_turn():
+    async def main():
+        registry = TurnRegistry(debounce=1.0, debounce_mode=DebounceMode.RESTART)
+        restarting = []
+
+        async def run(text: str):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                restarting.append(registry.is_restarting("s"))
+                raise
+
+        registry.submit("s", "a", run)
+        await settle()
+        admission = registry.submit("s", "b", run)
+        assert admission.restarted
+        await settle()
+        assert restarting == [True]
+        await registry.cancel("s")
+
+    asyncio.run(main())
+
+
+def test_debounce_restart_keeps_turns_that_have_output():
+    async def main():
+        registry = TurnRegistry(debounce=1.0, debounce_mode=DebounceMode.RESTART, policy=AdmissionPolicy.QUEUE)
+        recorder = Recorder()
+        registry.submit("s", "a", recorder.run)
+        await settle()
+        registry.mark_output("s")
+        admission = registry.submit("s", "b", recorder.run)
+        assert not admission.restarted and admission.position == 1
+        recorder.release.set()
+        await admission.task
+        assert recorder.finished == ["a", "b"]
+
+    asyncio.run(main())
+
+
+def test_cancel_with_drop_pending_clears_the_session():
+    async def main():
+        registry, recorder = TurnRegistry(policy=AdmissionPolicy.QUEUE), Recorder()
+        registry.submit("s", "a", recorder.run)
+        pending = registry.submit("s", "b", recorder.run)
+        await settle()
+        assert await registry.cancel("s", drop_pending=True)
+        await settle()
+        assert pending.task.cancelled()
+        assert recorder.started == ["a"]
+        assert not registry.is_active("s")
+
+    asyncio.run(main())